@@ -0,0 +1,71 @@
+import hashlib
+from functools import wraps
+
+from django.utils.cache import get_conditional_response, patch_vary_headers
+from django.utils.http import http_date, quote_etag
+
+
+def make_etag(*parts) -> str:
+    """ETag из частей состояния ответа (время изменения, счётчики, пользователь)."""
+    state = ':'.join(str(part) for part in parts)
+    return quote_etag(hashlib.md5(state.encode(), usedforsecurity=False).hexdigest())
+
+
+def _get_not_modified_response(request, validators):
+    etag, last_modified = validators
+    return get_conditional_response(
+        request,
+        etag=etag,
+        last_modified=int(last_modified.timestamp()) if last_modified else None,
+    )
+
+
+def _set_validator_headers(response, validators):
+    etag, last_modified = validators
+    if response.status_code in {200, 304}:
+        response['ETag'] = etag
+        if last_modified:
+            response['Last-Modified'] = http_date(last_modified.timestamp())
+    patch_vary_headers(response, ('Authorization',))
+    return response
+
+
+def conditional_get(view_method):
+    """Отвечает 304 Not Modified на условный GET, не выполняя метод ViewSet.
+
+    Валидаторы (etag, last_modified) возвращает
+    view.get_conditional_validators(request, *args, **kwargs) — дешёвым
+    запросом, до основной выборки и сериализации. None — проверка пропускается.
+    Ответ зависит от пользователя, поэтому добавляется Vary: Authorization.
+    """
+
+    @wraps(view_method)
+    def wrapper(self, request, *args, **kwargs):
+        validators = self.get_conditional_validators(request, *args, **kwargs)
+        if validators is None:
+            return view_method(self, request, *args, **kwargs)
+        response = _get_not_modified_response(request, validators)
+        if response is None:
+            response = view_method(self, request, *args, **kwargs)
+        return _set_validator_headers(response, validators)
+
+    return wrapper
+
+
+def aconditional_get(view_method):
+    """conditional_get для асинхронных методов ViewSet.
+
+    Валидаторы возвращает await view.aget_conditional_validators(...).
+    """
+
+    @wraps(view_method)
+    async def wrapper(self, request, *args, **kwargs):
+        validators = await self.aget_conditional_validators(request, *args, **kwargs)
+        if validators is None:
+            return await view_method(self, request, *args, **kwargs)
+        response = _get_not_modified_response(request, validators)
+        if response is None:
+            response = await view_method(self, request, *args, **kwargs)
+        return _set_validator_headers(response, validators)
+
+    return wrapper
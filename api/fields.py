@@ -0,0 +1,174 @@
+import base64
+import binascii
+import io
+import uuid
+
+from django.conf import settings
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.utils.translation import gettext_lazy as _
+from drf_extra_fields.fields import Base64ImageField
+from drf_spectacular.types import OpenApiTypes
+from drf_spectacular.utils import extend_schema_field
+from PIL import Image
+from rest_framework.fields import Field, FileField
+
+
+def get_image_file_name(image) -> str:
+    extension = 'jpg' if image.format == 'JPEG' else image.format.lower()
+    return f'{uuid.uuid4()}.{extension}'
+
+
+@extend_schema_field(OpenApiTypes.OBJECT)
+class ImageRenditionsField(Field):
+    """Ссылки на варианты изображения для srcset: {вариант: {формат: url}}.
+
+    Пока варианты не созданы (или устарели), вместо них отдаётся оригинал.
+    """
+
+    def __init__(self, image_field, **kwargs):
+        self.image_field = image_field
+        kwargs['source'] = '*'
+        kwargs['read_only'] = True
+        super().__init__(**kwargs)
+
+    def to_representation(self, instance):
+        field_file = getattr(instance, self.image_field)
+        if not field_file:
+            return None
+
+        renditions = getattr(instance, f'{self.image_field}_renditions')
+        if renditions.get('source') != field_file.name:
+            renditions = {}
+        original_url = self._build_url(field_file.url)
+        urls = {}
+        for rendition in settings.IMAGE_RENDITIONS:
+            names = renditions.get(rendition, {})
+            urls[rendition] = {
+                image_format: (
+                    self._build_url(field_file.storage.url(names[image_format]))
+                    if image_format in names
+                    else original_url
+                )
+                for image_format in settings.IMAGE_RENDITION_FORMATS
+            }
+        return urls
+
+    def _build_url(self, url):
+        request = self.context.get('request')
+        return request.build_absolute_uri(url) if request else url
+
+
+class ImageLimitsMixin:
+    """Ограничения изображения: размер файла, формат, разрешение и габариты.
+
+    Проверки используют только заголовок изображения (Image.open),
+    пиксели при этом не декодируются.
+    """
+
+    ALLOWED_TYPES = Base64ImageField.ALLOWED_TYPES
+
+    default_error_messages = {
+        'invalid_image': Base64ImageField.INVALID_FILE_MESSAGE,
+        'max_size': _('File size exceeded (currently {size}).'),
+        'max_dimensions': _('Image dimensions exceeded (currently {width} * {height}).'),
+        'max_pixels': _('Image resolution exceeded.'),
+        'disallowed_type': _('Type disallowed (currently {image_format}).'),
+    }
+
+    def __init__(
+        self,
+        *args,
+        max_size_bytes=None,
+        max_width=None,
+        max_height=None,
+        allowed_types=None,
+        max_pixels=None,
+        **kwargs,
+    ):
+        self.max_size_bytes = max_size_bytes
+        self.max_width = max_width
+        self.max_height = max_height
+        self.allowed_types = allowed_types or self.ALLOWED_TYPES
+        self.max_pixels = max_pixels
+        super().__init__(*args, **kwargs)
+
+    def validate_size(self, size):
+        if self.max_size_bytes is not None and size > self.max_size_bytes:
+            self.fail('max_size', size=size)
+
+    def validate_image(self, image):
+        width, height = image.size
+        max_pixels = self.max_pixels or settings.BASE64_IMAGE_MAX_PIXELS
+        if image.format.lower() not in self.allowed_types:
+            self.fail('disallowed_type', image_format=image.format)
+        if width * height > max_pixels:
+            self.fail('max_pixels')
+        if (self.max_width is not None and width > self.max_width) or (
+            self.max_height is not None and height > self.max_height
+        ):
+            self.fail('max_dimensions', width=width, height=height)
+
+    def open_image(self, image_file):
+        """Открывает изображение одним вызовом Image.open и проверяет ограничения."""
+        try:
+            image = Image.open(image_file)
+            image.verify()
+        except Image.DecompressionBombError:
+            self.fail('max_pixels')
+        except Exception:
+            # Pillow выбрасывает разные исключения для повреждённых файлов
+            self.fail('invalid_image')
+        self.validate_image(image)
+        return image
+
+
+class ValidatedBase64ImageField(ImageLimitsMixin, Base64ImageField):
+    """Изображение в base64 с проверкой размера, формата и разрешения за один проход.
+
+    Размер оценивается по длине base64-строки ещё до декодирования,
+    формат и разрешение читаются из заголовка одним вызовом Image.open,
+    поэтому пиксели изображения при проверке не декодируются.
+    """
+
+    def to_internal_value(self, base64_data):
+        if base64_data in self.EMPTY_VALUES:
+            return None
+        if not isinstance(base64_data, str):
+            return super().to_internal_value(base64_data)
+
+        content_type = None
+        if ';base64,' in base64_data:
+            header, base64_data = base64_data.split(';base64,', 1)
+            if self.trust_provided_content_type:
+                content_type = header.replace('data:', '')
+
+        self.validate_size(len(base64_data) * 3 // 4 - base64_data[-2:].count('='))
+        try:
+            decoded_file = base64.b64decode(base64_data)
+        except (TypeError, binascii.Error, ValueError):
+            self.fail('invalid_image')
+        self.validate_size(len(decoded_file))
+
+        image = self.open_image(io.BytesIO(decoded_file))
+        data = SimpleUploadedFile(
+            name=get_image_file_name(image),
+            content=decoded_file,
+            content_type=content_type or Image.MIME.get(image.format),
+        )
+        # ImageField.to_internal_value открыл бы изображение повторно
+        data = FileField.to_internal_value(self, data)
+        data.image = image
+        return data
+
+
+class StreamedImageField(ImageLimitsMixin, FileField):
+    """Изображение из multipart/form-data, проверенное ImageUploadHandler.
+
+    Обработчик проверяет файл по мере получения, поэтому поле принимает
+    только файлы, для которых он уже прочитал заголовок изображения.
+    """
+
+    def to_internal_value(self, data):
+        if getattr(data, 'image', None) is None:
+            self.fail('invalid_image')
+        return super().to_internal_value(data)
@@ -0,0 +1,101 @@
+import base64
+import io
+import itertools
+import timeit
+
+from django.conf import settings
+from django.contrib.auth.models import AnonymousUser
+from django.core.management.base import BaseCommand, CommandError
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+
+from api.parsers import ORJSONParser
+from api.renderers import ORJSONRenderer
+from api.serializers import ArticleSerializer
+from api.views import ArticleViewSet
+
+
+class Command(BaseCommand):
+    help = (
+        'Сравнивает время рендеринга страницы статей (ArticleSerializer) '
+        'и разбора тела с base64-изображением стандартным JSON и orjson.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--page-size',
+            type=int,
+            default=settings.CURSOR_PAGINATION_MAX_PAGE_SIZE,
+            help='Количество статей на странице.',
+        )
+        parser.add_argument(
+            '--number',
+            type=int,
+            default=100,
+            help='Количество повторов в одном замере.',
+        )
+
+    def handle(self, *args, **options):
+        page = self.get_page_data(options['page_size'])
+        body = JSONRenderer().render(self.get_create_request_data(page[0]))
+        self.stdout.write(
+            f'Page: {len(page)} articles, '
+            f'{len(JSONRenderer().render(page))} bytes; '
+            f'request body: {len(body)} bytes',
+        )
+
+        renderers = (('json', JSONRenderer()), ('orjson', ORJSONRenderer()))
+        self.report(
+            'render',
+            {name: lambda r=renderer: r.render(page) for name, renderer in renderers},
+            options['number'],
+        )
+        parsers = (('json', JSONParser()), ('orjson', ORJSONParser()))
+        self.report(
+            'parse',
+            {
+                name: lambda p=parser: p.parse(io.BytesIO(body))
+                for name, parser in parsers
+            },
+            options['number'],
+        )
+
+    def get_page_data(self, page_size):
+        """Данные страницы статей в том виде, в каком их рендерит список статей."""
+        request = Request(APIRequestFactory().get('/'))
+        request.user = AnonymousUser()
+        view = ArticleViewSet(request=request, action='list', format_kwarg=None)
+        articles = list(view.get_queryset()[:page_size])
+        if not articles:
+            raise CommandError('No published articles to benchmark.')
+        # статей в базе может быть меньше размера страницы
+        articles = list(itertools.islice(itertools.cycle(articles), page_size))
+        return ArticleSerializer(
+            articles,
+            many=True,
+            context={'request': request},
+        ).data
+
+    @staticmethod
+    def get_create_request_data(article):
+        """Тело запроса на создание статьи с изображением ~1 МБ в base64."""
+        return {
+            'title': article['title'],
+            'annotation': article['annotation'],
+            'text': article['text'],
+            'image': base64.b64encode(bytes(2**20)).decode(),
+        }
+
+    def report(self, operation, functions, number):
+        timings = {
+            name: min(timeit.repeat(function, number=number, repeat=3)) / number
+            for name, function in functions.items()
+        }
+        baseline = timings['json']
+        for name, seconds in timings.items():
+            self.stdout.write(
+                f'{operation} {name}: {seconds * 1000:.3f} ms '
+                f'(x{baseline / seconds:.1f})',
+            )
@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from api.openapi import generate_schema_artefacts
+
+
+class Command(BaseCommand):
+    help = 'Генерирует схему OpenAPI, которую отдаёт api/v1/schema/.'
+
+    def handle(self, *args, **options):
+        for path in generate_schema_artefacts():
+            self.stdout.write(f'Schema written to {path}')
@@ -0,0 +1,115 @@
+import json
+import time
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from urllib.error import URLError
+from urllib.parse import urljoin
+
+from django.core.management.base import BaseCommand, CommandError
+
+DEFAULT_PATHS = (
+    'articles/',
+    'articles/search/?query=covid',
+    'tags/roots/',
+)
+
+
+class Command(BaseCommand):
+    help = (
+        'Нагрузочное сравнение развертываний: параллельные GET-запросы к ручкам '
+        'чтения API запущенного сервера, RPS и задержки. Запускается поочерёдно '
+        'против WSGI и ASGI развертывания с одинаковыми ресурсами.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--base-url',
+            default='http://localhost:8000/api/v1/',
+            help='Адрес API.',
+        )
+        parser.add_argument(
+            '--path',
+            action='append',
+            dest='paths',
+            help=(
+                'Путь относительно --base-url, можно указать несколько раз. '
+                'По умолчанию — список, поиск, корневые теги и первая статья.'
+            ),
+        )
+        parser.add_argument(
+            '--concurrency',
+            type=int,
+            default=32,
+            help='Количество одновременных клиентов.',
+        )
+        parser.add_argument(
+            '--requests',
+            type=int,
+            default=1000,
+            help='Количество запросов на каждый путь.',
+        )
+        parser.add_argument(
+            '--timeout',
+            type=float,
+            default=10,
+            help='Таймаут запроса, секунды.',
+        )
+
+    def handle(self, *args, **options):
+        base_url = options['base_url']
+        paths = options['paths'] or self.get_default_paths(base_url, options['timeout'])
+        self.stdout.write(
+            f'{base_url}: concurrency {options["concurrency"]}, '
+            f'{options["requests"]} requests per path',
+        )
+        with ThreadPoolExecutor(max_workers=options['concurrency']) as executor:
+            for path in paths:
+                url = urljoin(base_url, path)
+                started_at = time.perf_counter()
+                results = list(
+                    executor.map(
+                        lambda _: self.request(url, options['timeout']),
+                        range(options['requests']),
+                    ),
+                )
+                elapsed = time.perf_counter() - started_at
+                self.report(path, results, elapsed)
+
+    def get_default_paths(self, base_url, timeout):
+        paths = list(DEFAULT_PATHS)
+        try:
+            with urllib.request.urlopen(
+                urljoin(base_url, 'articles/'),
+                timeout=timeout,
+            ) as response:
+                articles = json.load(response)['results']
+        except (URLError, OSError, ValueError, KeyError) as exc:
+            raise CommandError(f'API is not available at {base_url}: {exc}')
+        if articles:
+            paths.append(f'articles/{articles[0]["id"]}/')
+        return paths
+
+    @staticmethod
+    def request(url, timeout):
+        """Время ответа в секундах или None, если запрос завершился ошибкой."""
+        started_at = time.perf_counter()
+        try:
+            with urllib.request.urlopen(url, timeout=timeout) as response:
+                response.read()
+        except (URLError, OSError):
+            return None
+        return time.perf_counter() - started_at
+
+    def report(self, path, results, elapsed):
+        timings = sorted(seconds for seconds in results if seconds is not None)
+        errors = len(results) - len(timings)
+        if not timings:
+            self.stdout.write(f'{path}: all {errors} requests failed')
+            return
+        latencies = ', '.join(
+            f'p{percent} {timings[len(timings) * percent // 100] * 1000:.1f} ms'
+            for percent in (50, 95, 99)
+        )
+        self.stdout.write(
+            f'{path}: {len(timings) / elapsed:.1f} rps, {latencies}, errors {errors}',
+        )
@@ -1,10 +1,25 @@
+import hashlib
+import json
+from functools import update_wrapper
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import IntegrityError, transaction
+from django.http import Http404
+from django.utils.decorators import classonlymethod
+from django.utils.translation import gettext_lazy as _
 from rest_framework import status
 from rest_framework.decorators import action
-from rest_framework.permissions import IsAuthenticated
+from rest_framework.generics import get_object_or_404
+from rest_framework.permissions import SAFE_METHODS, IsAuthenticated
 from rest_framework.response import Response
 
+from api.conditional import aconditional_get, conditional_get
 from api.permissions import LikesIsNotObjectOwner
-from articles.models import Viewer
+from articles.models import IdempotencyKey, Viewer
+from core.db.replicas import is_pinned_to_primary, set_read_from_replicas
 from core.utils import get_client_ip
 from likes import services
 from likes.models import VoteTypes
@@ -38,19 +53,220 @@ class LikedMixin:
         return Response(status=status.HTTP_204_NO_CONTENT)
 
 
+class AsyncViewSetMixin:
+    """Асинхронная обработка запросов ViewSet при запуске через ASGI.
+
+    Включается настройкой API_ASYNC_VIEWS. Для действия, у которого есть
+    асинхронная версия a<действие> (alist, aretrieve, ...), вызывается она,
+    остальные действия выполняются как обычно, в потоке (sync_to_async).
+    Аутентификация и проверка прав тоже выполняются в потоке: они обращаются
+    к базе синхронно.
+
+    В Django 4.2 асинхронный ORM сам выполняет запросы в потоке через
+    sync_to_async, а сериализация идёт в пуле потоков.
+    """
+
+    is_async = False
+
+    @classonlymethod
+    def as_view(cls, actions=None, **initkwargs):
+        initkwargs.setdefault('is_async', settings.API_ASYNC_VIEWS)
+        view = super().as_view(actions, **initkwargs)
+        if not initkwargs['is_async']:
+            return view
+
+        async def async_view(request, *args, **kwargs):
+            return await view(request, *args, **kwargs)
+
+        return update_wrapper(async_view, view)
+
+    def dispatch(self, request, *args, **kwargs):
+        if self.is_async:
+            return self.adispatch(request, *args, **kwargs)
+        return super().dispatch(request, *args, **kwargs)
+
+    async def adispatch(self, request, *args, **kwargs):
+        self.args = args
+        self.kwargs = kwargs
+        request = self.initialize_request(request, *args, **kwargs)
+        self.request = request
+        self.headers = self.default_response_headers
+
+        try:
+            await sync_to_async(self.initial)(request, *args, **kwargs)
+            response = await self.get_async_handler(request)(request, *args, **kwargs)
+        except Exception as exc:
+            response = self.handle_exception(exc)
+
+        self.response = self.finalize_response(request, response, *args, **kwargs)
+        return self.response
+
+    def get_async_handler(self, request):
+        async_handler = getattr(self, f'a{self.action}', None) if self.action else None
+        if async_handler is not None:
+            return async_handler
+        method = request.method.lower()
+        handler = self.http_method_not_allowed
+        if method in self.http_method_names:
+            handler = getattr(self, method, self.http_method_not_allowed)
+        return sync_to_async(handler)
+
+
+class ReplicaReadMixin:
+    """Безопасные запросы читают из реплик базы (core.db.routers.ReplicaRouter).
+
+    Пользователь, недавно изменявший данные, читает из основной базы, чтобы
+    сразу видеть свои изменения (core.middleware.PrimaryPinMiddleware).
+    Действия из primary_read_actions всегда читают из основной базы.
+    """
+
+    primary_read_actions = ()
+
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        set_read_from_replicas(
+            bool(settings.DATABASE_REPLICAS)
+            and request.method in SAFE_METHODS
+            and self.action not in self.primary_read_actions
+            and not is_pinned_to_primary(request),
+        )
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        set_read_from_replicas(False)
+        return super().finalize_response(request, response, *args, **kwargs)
+
+
 class CountViewerMixin:
+    """Учитывает просмотр объекта до формирования ответа.
+
+    Число просмотров входит в ответ и в его ETag (см. ConditionalGetMixin),
+    поэтому просмотр учитывается до их вычисления. Объект ищется в
+    get_viewed_queryset() — без аннотаций основного queryset.
+    """
+
+    def get_viewed_queryset(self):
+        return self.get_queryset()
+
     def retrieve(self, request, *args, **kwargs):
-        response = super().retrieve(request, *args, **kwargs)
-        instance = self.get_object()
+        lookup_url_kwarg = self.lookup_url_kwarg or self.lookup_field
+        instance = get_object_or_404(
+            self.get_viewed_queryset(),
+            **{self.lookup_field: kwargs[lookup_url_kwarg]},
+        )
         if hasattr(instance, 'viewers'):  # noqa: WPS110
             viewer, created = Viewer.objects.get_or_create(
-                ipaddress=None
-                if request.user.is_authenticated
-                else get_client_ip(request),
-                user=request.user if request.user.is_authenticated else None,
+                **self._get_viewer_lookup(request),
             )
 
             if not instance.viewers.filter(id=viewer.id).exists():
                 instance.viewers.add(viewer)
 
-        return response
+        return super().retrieve(request, *args, **kwargs)
+
+    async def aretrieve(self, request, *args, **kwargs):
+        lookup_url_kwarg = self.lookup_url_kwarg or self.lookup_field
+        try:
+            queryset = self.get_viewed_queryset().filter(
+                **{self.lookup_field: kwargs[lookup_url_kwarg]},
+            )
+            instance = await queryset.afirst()
+        except (TypeError, ValueError, ValidationError):
+            instance = None
+        if instance is None:
+            raise Http404
+        if hasattr(instance, 'viewers'):  # noqa: WPS110
+            viewer, created = await Viewer.objects.aget_or_create(
+                **self._get_viewer_lookup(request),
+            )
+
+            if not await instance.viewers.filter(id=viewer.id).aexists():
+                await instance.viewers.aadd(viewer)
+
+        return await super().aretrieve(request, *args, **kwargs)
+
+    @staticmethod
+    def _get_viewer_lookup(request):
+        if request.user.is_authenticated:
+            return {'ipaddress': None, 'user': request.user}
+        return {'ipaddress': get_client_ip(request), 'user': None}
+
+
+class ConditionalGetMixin:
+    """Ответ 304 Not Modified на условные запросы списка и объекта.
+
+    Валидаторы возвращает get_conditional_validators() (см. conditional_get),
+    в асинхронных действиях — aget_conditional_validators().
+    """
+
+    def get_conditional_validators(self, request, *args, **kwargs):
+        return None
+
+    async def aget_conditional_validators(self, request, *args, **kwargs):
+        return await sync_to_async(self.get_conditional_validators)(
+            request,
+            *args,
+            **kwargs,
+        )
+
+    @conditional_get
+    def list(self, request, *args, **kwargs):
+        return super().list(request, *args, **kwargs)
+
+    @conditional_get
+    def retrieve(self, request, *args, **kwargs):
+        return super().retrieve(request, *args, **kwargs)
+
+    @aconditional_get
+    async def alist(self, request, *args, **kwargs):
+        return await sync_to_async(super().list)(request, *args, **kwargs)
+
+    @aconditional_get
+    async def aretrieve(self, request, *args, **kwargs):
+        return await sync_to_async(super().retrieve)(request, *args, **kwargs)
+
+
+class IdempotentCreateMixin:
+    """Повторный POST с тем же заголовком Idempotency-Key возвращает первый ответ.
+
+    Сохраняются только успешные ответы: после ошибки запрос можно повторить
+    с тем же ключом. Ключ, использованный с другим телом запроса, отклоняется.
+    """
+
+    def create(self, request, *args, **kwargs):
+        key = request.headers.get('Idempotency-Key')
+        if not key or not request.user.is_authenticated:
+            return super().create(request, *args, **kwargs)
+        if len(key) > IdempotencyKey._meta.get_field('key').max_length:
+            return Response(
+                {'Idempotency-Key': [_('Idempotency-Key is too long.')]},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        request_hash = hashlib.sha256(
+            json.dumps(request.data, sort_keys=True, cls=DjangoJSONEncoder).encode(),
+        ).hexdigest()
+        saved = IdempotencyKey.objects.filter(user=request.user, key=key).first()
+        if saved is None:
+            try:
+                with transaction.atomic():
+                    response = super().create(request, *args, **kwargs)
+                    IdempotencyKey.objects.create(
+                        user=request.user,
+                        key=key,
+                        request_hash=request_hash,
+                        status_code=response.status_code,
+                        response=response.data,
+                    )
+                return response
+            except IntegrityError:
+                # параллельный запрос с тем же ключом успел выполниться первым
+                saved = IdempotencyKey.objects.filter(user=request.user, key=key).first()
+                if saved is None:
+                    raise
+
+        if saved.request_hash != request_hash:
+            return Response(
+                {'Idempotency-Key': [_('Idempotency-Key is used for another request.')]},
+                status=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            )
+        return Response(saved.response, status=saved.status_code)
@@ -0,0 +1,64 @@
+import gzip
+import hashlib
+import os
+from functools import lru_cache
+from pathlib import Path
+from typing import NamedTuple
+
+from django.conf import settings
+from django.utils.http import quote_etag
+from drf_spectacular.renderers import OpenApiJsonRenderer, OpenApiYamlRenderer
+from drf_spectacular.settings import spectacular_settings
+
+# формат (renderer.format) -> renderer, которым схема записывается в артефакт
+OPENAPI_SCHEMA_RENDERERS = {
+    OpenApiYamlRenderer.format: OpenApiYamlRenderer,
+    OpenApiJsonRenderer.format: OpenApiJsonRenderer,
+}
+
+
+class SchemaArtefact(NamedTuple):
+    content: bytes
+    compressed: bytes
+    etag: str
+
+
+def get_schema_path(schema_format: str) -> Path:
+    return Path(settings.OPENAPI_SCHEMA_ROOT) / f'schema.{schema_format}.gz'
+
+
+def generate_schema_artefacts() -> list[Path]:
+    """Генерирует схему OpenAPI и записывает её во всех форматах, сжатой gzip."""
+    generator = spectacular_settings.DEFAULT_GENERATOR_CLASS()
+    schema = generator.get_schema(request=None, public=spectacular_settings.SERVE_PUBLIC)
+
+    paths = []
+    for schema_format, renderer_class in OPENAPI_SCHEMA_RENDERERS.items():
+        path = get_schema_path(schema_format)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        content = renderer_class().render(schema, renderer_context={})
+        # запись через временный файл: артефакт могут читать запускающиеся воркеры
+        temp_path = path.with_name(f'{path.name}.{os.getpid()}.tmp')
+        temp_path.write_bytes(gzip.compress(content, mtime=0))
+        temp_path.replace(path)
+        paths.append(path)
+    load_schema_artefacts.cache_clear()
+    return paths
+
+
+@lru_cache(maxsize=None)
+def load_schema_artefacts() -> dict[str, SchemaArtefact]:
+    """Артефакты схемы в памяти процесса; недостающие генерируются при первом вызове."""
+    if not all(get_schema_path(fmt).exists() for fmt in OPENAPI_SCHEMA_RENDERERS):
+        generate_schema_artefacts()
+
+    artefacts = {}
+    for schema_format in OPENAPI_SCHEMA_RENDERERS:
+        compressed = get_schema_path(schema_format).read_bytes()
+        content = gzip.decompress(compressed)
+        artefacts[schema_format] = SchemaArtefact(
+            content=content,
+            compressed=compressed,
+            etag=quote_etag(hashlib.sha256(content).hexdigest()[:32]),
+        )
+    return artefacts
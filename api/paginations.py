@@ -1,5 +1,6 @@
 from django.conf import settings
 from rest_framework import pagination
+from rest_framework.utils.urls import remove_query_param
 
 
 class CursorPagination(pagination.CursorPagination):
@@ -9,3 +10,55 @@ class CursorPagination(pagination.CursorPagination):
     max_page_size = settings.CURSOR_PAGINATION_MAX_PAGE_SIZE
     cursor_query_description = 'Значение курсора пагинации.'
     page_size_query_description = 'Количество результатов на страницу.'
+
+
+class SearchPagination(pagination.CursorPagination):
+    """Курсорная навигация по ранжированному списку id результатов поиска.
+
+    Результаты упорядочены по релевантности, а не по полю статьи, поэтому
+    курсор хранит позицию в списке. Параметр cursor и формат ответа те же,
+    что у CursorPagination.
+    """
+
+    page_size = settings.CURSOR_PAGINATION_PAGE_SIZE
+    page_size_query_param = 'page_size'
+    max_page_size = settings.CURSOR_PAGINATION_MAX_PAGE_SIZE
+    offset_cutoff = settings.SEARCH_RESULTS_MAX_IDS
+    cursor_query_description = 'Значение курсора пагинации.'
+    page_size_query_description = 'Количество результатов на страницу.'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.page_size = self.get_page_size(request)
+        if not self.page_size:
+            return None
+
+        self.base_url = request.build_absolute_uri()
+        self.cursor = self.decode_cursor(request)
+        start = self.cursor.offset if self.cursor else 0
+        end = start + self.page_size
+        self.start = start
+        self.has_previous = start > 0
+        self.has_next = end < len(queryset)
+        return list(queryset[start:end])
+
+    def get_next_link(self):
+        if not self.has_next:
+            return None
+        return self.encode_cursor(
+            pagination.Cursor(
+                offset=self.start + self.page_size,
+                reverse=False,
+                position=None,
+            ),
+        )
+
+    def get_previous_link(self):
+        if not self.has_previous:
+            return None
+        offset = max(self.start - self.page_size, 0)
+        if not offset:
+            return remove_query_param(self.base_url, self.cursor_query_param)
+        return self.encode_cursor(
+            pagination.Cursor(offset=offset, reverse=False, position=None),
+        )
@@ -0,0 +1,128 @@
+import io
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.core.files.uploadhandler import SkipFile, TemporaryFileUploadHandler
+from django.http.multipartparser import MultiPartParser as DjangoMultiPartParser
+from django.http.multipartparser import MultiPartParserError
+from PIL import Image
+from rest_framework.exceptions import ParseError, ValidationError
+from rest_framework.parsers import DataAndFiles, JSONParser, MultiPartParser
+
+from api.fields import StreamedImageField, get_image_file_name
+from api.renderers import ORJSONRenderer, orjson
+
+
+class ImageUploadHandler(TemporaryFileUploadHandler):
+    """Пишет изображения во временный файл по частям и проверяет их на лету.
+
+    Размер проверяется после каждой части, формат и разрешение — как только
+    получен заголовок изображения. При нарушении ограничений загрузка
+    прерывается, не дочитывая тело запроса. Файлы из полей, которых нет
+    среди переданных, пропускаются.
+    """
+
+    def __init__(self, request, image_fields):
+        super().__init__(request)
+        self.image_fields = image_fields
+
+    def new_file(self, field_name, *args, **kwargs):
+        self.image_field = self.image_fields.get(field_name)
+        if self.image_field is None:
+            raise SkipFile()
+        super().new_file(field_name, *args, **kwargs)
+        self.header = b''
+        self.image = None
+
+    def receive_data_chunk(self, raw_data, start):
+        with self._reject_on_error():
+            self.image_field.validate_size(start + len(raw_data))
+            if self.image is None:
+                self._read_header(raw_data)
+        return super().receive_data_chunk(raw_data, start)
+
+    def file_complete(self, file_size):
+        with self._reject_on_error():
+            if self.image is None:
+                self.image_field.fail('invalid_image')
+        uploaded_file = super().file_complete(file_size)
+        uploaded_file.name = get_image_file_name(self.image)
+        uploaded_file.content_type = Image.MIME.get(self.image.format)
+        uploaded_file.image = self.image
+        return uploaded_file
+
+    def _read_header(self, raw_data):
+        self.header += raw_data
+        try:
+            image = Image.open(io.BytesIO(self.header))
+        except Image.DecompressionBombError:
+            self.image_field.fail('max_pixels')
+        except Exception:
+            # заголовок ещё не получен целиком или файл не является изображением
+            if len(self.header) >= settings.IMAGE_UPLOAD_HEADER_MAX_BYTES:
+                self.image_field.fail('invalid_image')
+            return
+        self.image_field.validate_image(image)
+        self.image = image
+        self.header = b''
+
+    @contextmanager
+    def _reject_on_error(self):
+        """Закрывает (и тем самым удаляет) временный файл при ошибке проверки."""
+        try:
+            yield
+        except ValidationError as exc:
+            self.file.close()
+            raise ValidationError({self.field_name: exc.detail})
+
+
+class ImageMultiPartParser(MultiPartParser):
+    """multipart/form-data для загрузки изображений без буферизации тела запроса.
+
+    Файлы полей StreamedImageField сериализатора представления
+    принимает ImageUploadHandler, остальные файлы отбрасываются.
+    """
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        parser_context = parser_context or {}
+        request = parser_context['request']
+        view = parser_context['view']
+        encoding = parser_context.get('encoding', settings.DEFAULT_CHARSET)
+        meta = request.META.copy()
+        meta['CONTENT_TYPE'] = media_type
+        image_fields = {
+            name: field
+            for name, field in view.get_serializer().fields.items()
+            if isinstance(field, StreamedImageField)
+        }
+        upload_handlers = [ImageUploadHandler(request, image_fields)]
+
+        try:
+            parser = DjangoMultiPartParser(meta, stream, upload_handlers, encoding)
+            data, files = parser.parse()
+            return DataAndFiles(data, files)
+        except MultiPartParserError as exc:
+            raise ParseError(f'Multipart form parse error - {exc}')
+
+
+class ORJSONParser(JSONParser):
+    """JSONParser на orjson, если он установлен: тело разбирается из bytes целиком.
+
+    NaN и бесконечность, как и в строгом режиме JSONParser, не допускаются.
+    """
+
+    renderer_class = ORJSONRenderer
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        parser_context = parser_context or {}
+        encoding = parser_context.get('encoding', settings.DEFAULT_CHARSET)
+        if orjson is None or not self.strict:
+            return super().parse(stream, media_type, parser_context)
+
+        try:
+            body = stream.read()
+            if encoding.lower().replace('-', '') != 'utf8':
+                body = body.decode(encoding)
+            return orjson.loads(body)
+        except ValueError as exc:
+            raise ParseError(f'JSON parse error - {exc}')
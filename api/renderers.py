@@ -0,0 +1,41 @@
+from rest_framework.renderers import JSONRenderer
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+ORJSON_OPTIONS = (orjson.OPT_NON_STR_KEYS | orjson.OPT_UTC_Z) if orjson else 0
+
+
+class ORJSONRenderer(JSONRenderer):
+    """JSONRenderer на orjson, если он установлен.
+
+    UUID и дата/время сериализуются orjson без вызова Python-кода, в том же
+    виде, что у JSONRenderer (UTC как «Z»); Decimal, ленивые строки перевода
+    и остальное — через JSONEncoder DRF. Отличие одно: NaN и бесконечность
+    выводятся как null, а не вызывают ошибку. Ответы с отступами (Browsable
+    API, Accept: application/json; indent=4) и настройка UNICODE_JSON=False
+    обрабатываются стандартным JSONRenderer.
+    """
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        renderer_context = renderer_context or {}
+        indent = self.get_indent(accepted_media_type, renderer_context)
+        if orjson is None or indent or self.ensure_ascii or not self.compact:
+            return super().render(data, accepted_media_type, renderer_context)
+        if data is None:
+            return b''
+
+        rendered = orjson.dumps(
+            data,
+            default=self.encoder_class().default,
+            option=ORJSON_OPTIONS,
+        )
+        # как и JSONRenderer, экранируем разделители строк, недопустимые в JavaScript
+        if b'\xe2\x80\xa8' in rendered or b'\xe2\x80\xa9' in rendered:
+            rendered = rendered.replace(b'\xe2\x80\xa8', b'\\u2028').replace(
+                b'\xe2\x80\xa9',
+                b'\\u2029',
+            )
+        return rendered
@@ -4,11 +4,19 @@ from drf_spectacular.utils import OpenApiExample, OpenApiParameter, extend_schem
 from rest_framework import status
 
 from api.serializers import (
+    ArticleBatchSerializer,
+    ArticleChangesSerializer,
     ArticleCreateSerializer,
+    ArticleImageSerializer,
+    ArticleSearchSerializer,
     ArticleSerializer,
     CommentSerializer,
     NotAuthenticatedSerializer,
     NotFoundSerializer,
+    SuggestSerializer,
+    UploadSessionFinalizeSerializer,
+    UploadSessionSerializer,
+    UserAvatarSerializer,
     UserCreateSerializer,
     UserSerializer,
     ValidationSerializer,
@@ -20,6 +28,19 @@ ARTICLE_VIEW_SET_SCHEMA = {
     ),
     'create': extend_schema(
         summary='Создать статью.',
+        description=(
+            'Изображение передаётся в base64 (image) или токеном '
+            'завершённой загрузки (image_upload). Повторный запрос с тем же '
+            'заголовком Idempotency-Key возвращает ответ на первый запрос.'
+        ),
+        parameters=[
+            OpenApiParameter(
+                name='Idempotency-Key',
+                type=OpenApiTypes.STR,
+                location=OpenApiParameter.HEADER,
+                description='Уникальный ключ запроса на создание статьи.',
+            ),
+        ],
         request=ArticleCreateSerializer,
         responses={
             status.HTTP_201_CREATED: ArticleSerializer,
@@ -114,6 +135,28 @@ ARTICLE_VIEW_SET_SCHEMA = {
             status.HTTP_401_UNAUTHORIZED: NotAuthenticatedSerializer,
         },
     ),
+    'image': extend_schema(
+        summary='Загрузить изображение статьи.',
+        description=(
+            'Файл передаётся в multipart/form-data (поле image) '
+            'и проверяется по мере загрузки.'
+        ),
+        request={'multipart/form-data': ArticleImageSerializer},
+        parameters=[
+            OpenApiParameter(
+                name='id',
+                type=OpenApiTypes.UUID,
+                location=OpenApiParameter.PATH,
+                description='Идентификатор статьи (UUID).',
+            ),
+        ],
+        responses={
+            status.HTTP_200_OK: ArticleImageSerializer,
+            status.HTTP_400_BAD_REQUEST: ValidationSerializer,
+            status.HTTP_401_UNAUTHORIZED: NotAuthenticatedSerializer,
+            status.HTTP_404_NOT_FOUND: NotFoundSerializer,
+        },
+    ),
     'the_most_popular': extend_schema(
         summary='Получить самую популярную статью.',
         request=None,
@@ -132,14 +175,177 @@ ARTICLE_VIEW_SET_SCHEMA = {
                 location=OpenApiParameter.QUERY,
                 description='Поисковый запрос',
             ),
+            OpenApiParameter(
+                name='headline_words',
+                type=OpenApiTypes.INT,
+                location=OpenApiParameter.QUERY,
+                description='Максимальная длина выдержки highlight, слов',
+            ),
+            OpenApiParameter(
+                name='headline_fragments',
+                type=OpenApiTypes.INT,
+                location=OpenApiParameter.QUERY,
+                description='Количество фрагментов в выдержке highlight',
+            ),
+            OpenApiParameter(
+                name='facets',
+                type=OpenApiTypes.STR,
+                location=OpenApiParameter.QUERY,
+                description=(
+                    'Фасеты через запятую (tags, author, month), '
+                    'их счётчики возвращаются в поле facets'
+                ),
+            ),
+        ],
+        responses={
+            status.HTTP_200_OK: ArticleSearchSerializer(many=True),
+            status.HTTP_422_UNPROCESSABLE_ENTITY: None,
+        },
+    ),
+    'batch': extend_schema(
+        summary='Получить статьи по списку id.',
+        description=(
+            'Статьи возвращаются в порядке переданных id одним запросом, просмотры '
+            'не учитываются. Id отсутствующих и неопубликованных статей '
+            'перечислены в missing.'
+        ),
+        request=None,
+        parameters=[
+            OpenApiParameter(
+                name='ids',
+                type=OpenApiTypes.STR,
+                location=OpenApiParameter.QUERY,
+                description='Идентификаторы статей (UUID) через запятую',
+            ),
+        ],
+        responses={
+            status.HTTP_200_OK: ArticleBatchSerializer,
+            status.HTTP_400_BAD_REQUEST: ValidationSerializer,
+        },
+    ),
+    'changes': extend_schema(
+        summary='Получить изменения статей для синхронизации.',
+        description=(
+            'Опубликованные, изменённые, снятые с публикации и удалённые статьи '
+            'после отметки since в порядке изменения. Следующая страница '
+            'запрашивается с отметкой watermark из ответа, пока has_more истинно. '
+            'Устаревшая отметка — 410, нужна полная синхронизация.'
+        ),
+        request=None,
+        parameters=[
+            OpenApiParameter(
+                name='since',
+                type=OpenApiTypes.STR,
+                location=OpenApiParameter.QUERY,
+                description='Отметка watermark из предыдущего ответа',
+            ),
+        ],
+        responses={
+            status.HTTP_200_OK: ArticleChangesSerializer,
+            status.HTTP_400_BAD_REQUEST: ValidationSerializer,
+            status.HTTP_410_GONE: None,
+        },
+    ),
+    'related': extend_schema(
+        summary='Получить похожие статьи.',
+        description='Список предрассчитан по общим тегам и похожести текста.',
+        request=None,
+        parameters=[
+            OpenApiParameter(
+                name='id',
+                type=OpenApiTypes.UUID,
+                location=OpenApiParameter.PATH,
+                description='Идентификатор статьи (UUID).',
+            ),
         ],
         responses={
             status.HTTP_200_OK: ArticleSerializer(many=True),
+            status.HTTP_404_NOT_FOUND: NotFoundSerializer,
+        },
+    ),
+    'suggest': extend_schema(
+        summary='Подсказки для строки поиска.',
+        description='Заголовки статей и имена тегов, совпадающие с началом запроса.',
+        request=None,
+        parameters=[
+            OpenApiParameter(
+                name='q',
+                type=OpenApiTypes.STR,
+                location=OpenApiParameter.QUERY,
+                description='Начало поискового запроса',
+            ),
+        ],
+        responses={
+            status.HTTP_200_OK: SuggestSerializer,
             status.HTTP_422_UNPROCESSABLE_ENTITY: None,
         },
     ),
 }
 
+UPLOAD_SESSION_VIEW_SET_SCHEMA = {
+    'create': extend_schema(
+        summary='Начать загрузку изображения по частям.',
+        responses={
+            status.HTTP_201_CREATED: UploadSessionSerializer,
+            status.HTTP_400_BAD_REQUEST: ValidationSerializer,
+            status.HTTP_401_UNAUTHORIZED: NotAuthenticatedSerializer,
+        },
+    ),
+    'retrieve': extend_schema(
+        summary='Получить состояние загрузки.',
+        description='Поле offset — сколько байт принято, с него продолжается загрузка.',
+        parameters=[
+            OpenApiParameter(
+                name='id',
+                type=OpenApiTypes.UUID,
+                location=OpenApiParameter.PATH,
+                description='Идентификатор загрузки (UUID).',
+            ),
+        ],
+    ),
+    'update': extend_schema(
+        summary='Загрузить часть файла.',
+        request={'application/octet-stream': OpenApiTypes.BINARY},
+        parameters=[
+            OpenApiParameter(
+                name='id',
+                type=OpenApiTypes.UUID,
+                location=OpenApiParameter.PATH,
+                description='Идентификатор загрузки (UUID).',
+            ),
+            OpenApiParameter(
+                name='Content-Range',
+                type=OpenApiTypes.STR,
+                location=OpenApiParameter.HEADER,
+                required=True,
+                description='Положение части в файле: bytes <start>-<end>/<size>.',
+            ),
+        ],
+        responses={
+            status.HTTP_200_OK: UploadSessionSerializer,
+            status.HTTP_400_BAD_REQUEST: ValidationSerializer,
+            status.HTTP_409_CONFLICT: OpenApiTypes.OBJECT,
+        },
+    ),
+    'finalize': extend_schema(
+        summary='Завершить загрузку.',
+        description='Возвращает token для поля image_upload при создании статьи.',
+        request=None,
+        parameters=[
+            OpenApiParameter(
+                name='id',
+                type=OpenApiTypes.UUID,
+                location=OpenApiParameter.PATH,
+                description='Идентификатор загрузки (UUID).',
+            ),
+        ],
+        responses={
+            status.HTTP_200_OK: UploadSessionFinalizeSerializer,
+            status.HTTP_400_BAD_REQUEST: ValidationSerializer,
+        },
+    ),
+}
+
 TOKEN_CREATE_VIEW_SCHEMA = {
     'post': extend_schema(
         summary='Авторизовать пользователя.',
@@ -171,6 +377,33 @@ TOKEN_DESTROY_VIEW_SCHEMA = {
 }
 
 
+ARTICLE_EXPORT_VIEW_SCHEMA = {
+    'get': extend_schema(
+        summary='Выгрузить статьи, теги, голоса и просмотры.',
+        description=(
+            'Поток NDJSON: по JSON-объекту на строке, тип записи в поле type '
+            '(tag, article, vote, view). С updated_since выгружается только '
+            'изменённое начиная с этого момента. Ответ сжимается gzip, если '
+            'клиент это поддерживает. Доступно администраторам.'
+        ),
+        request=None,
+        parameters=[
+            OpenApiParameter(
+                name='updated_since',
+                type=OpenApiTypes.DATETIME,
+                location=OpenApiParameter.QUERY,
+                description='Выгрузить только изменённое начиная с этого момента',
+            ),
+        ],
+        responses={
+            (status.HTTP_200_OK, 'application/x-ndjson'): OpenApiTypes.BINARY,
+            status.HTTP_400_BAD_REQUEST: ValidationSerializer,
+            status.HTTP_401_UNAUTHORIZED: NotAuthenticatedSerializer,
+        },
+    ),
+}
+
+
 USER_VIEW_SET_SCHEMA = {
     'list': extend_schema(
         summary='Получить список пользователей.',
@@ -222,6 +455,19 @@ USER_VIEW_SET_SCHEMA = {
             },
         ),
     },
+    'avatar': extend_schema(
+        summary='Загрузить аватар пользователя.',
+        description=(
+            'Файл передаётся в multipart/form-data (поле avatar) '
+            'и проверяется по мере загрузки.'
+        ),
+        request={'multipart/form-data': UserAvatarSerializer},
+        responses={
+            status.HTTP_200_OK: UserAvatarSerializer,
+            status.HTTP_400_BAD_REQUEST: ValidationSerializer,
+            status.HTTP_401_UNAUTHORIZED: NotAuthenticatedSerializer,
+        },
+    ),
     'reset_password': extend_schema(
         summary='Сменить пароль пользователя (восстановление доступа).',
         description='Отправляется письмо со ссылкой для смены пароля.',
@@ -1,5 +1,6 @@
 from django.conf import settings
 from django.contrib.auth import get_user_model
+from django.utils.translation import gettext_lazy as _
 from djoser.serializers import ActivationSerializer as DjoserActivationSerializer
 from djoser.serializers import UserSerializer as DjoserUserSerializer
 from drf_extra_fields.fields import Base64ImageField
@@ -7,20 +8,33 @@ from rest_framework.exceptions import ValidationError
 from rest_framework.serializers import (
     BooleanField,
     CharField,
+    ChoiceField,
     CurrentUserDefault,
+    DateTimeField,
     HiddenField,
     ListField,
+    ListSerializer,
     ModelSerializer,
     Serializer,
     SerializerMethodField,
+    UUIDField,
 )
 
-from api.validators import (
-    ImageBytesSizeValidator,
-    ImageContentTypeValidator,
-    ImageDimensionValidator,
+from api.fields import (
+    ImageRenditionsField,
+    StreamedImageField,
+    ValidatedBase64ImageField,
+    get_image_file_name,
 )
-from articles.models import Article, Comment, Tag
+from articles.changes import (
+    ARTICLE_DELETED,
+    ARTICLE_PUBLISHED,
+    ARTICLE_UNPUBLISHED,
+    decode_watermark,
+)
+from articles.models import Article, Comment, Tag, UploadSession
+from articles.uploads import delete_upload_session, finalize_upload, open_upload
+from users.services import get_user_stats, get_users_stats
 
 User = get_user_model()
 
@@ -51,16 +65,13 @@ class UserCreateSerializer(DjoserUserSerializer):
 class UserSimpleSerializer(DjoserUserSerializer):
     """Сериализатор модели User для сериализатора модели Article."""
 
-    avatar = Base64ImageField(
-        validators=(
-            ImageBytesSizeValidator(settings.BASE64_AVATAR_MAX_SIZE_BYTES),
-            ImageDimensionValidator(
-                settings.BASE64_AVATAR_MAX_WIDTH,
-                settings.BASE64_AVATAR_MAX_HEIGHT,
-            ),
-            ImageContentTypeValidator(settings.ALLOWED_B64ENCODED_IMAGE_FORMATS),
-        ),
+    avatar = ValidatedBase64ImageField(
+        max_size_bytes=settings.BASE64_AVATAR_MAX_SIZE_BYTES,
+        max_width=settings.BASE64_AVATAR_MAX_WIDTH,
+        max_height=settings.BASE64_AVATAR_MAX_HEIGHT,
+        allowed_types=settings.ALLOWED_B64ENCODED_IMAGE_FORMATS,
     )
+    avatar_renditions = ImageRenditionsField('avatar')
 
     class Meta:
         model = User
@@ -70,9 +81,19 @@ class UserSimpleSerializer(DjoserUserSerializer):
             'last_name',
             'role',
             'avatar',
+            'avatar_renditions',
         ]
 
 
+class UserListSerializer(ListSerializer):
+    """Список пользователей: статистика всех пользователей берётся одним вызовом."""
+
+    def to_representation(self, data):
+        users = list(data.all() if hasattr(data, 'all') else data)
+        self.child.users_stats = get_users_stats([user.pk for user in users])
+        return super().to_representation(users)
+
+
 class UserSerializer(UserSimpleSerializer):
     """Полный сериализатор модели User."""
 
@@ -88,12 +109,35 @@ class UserSerializer(UserSimpleSerializer):
             'subscribed',
         ]
         read_only_fields = ('subscribed', 'email', 'role')
+        list_serializer_class = UserListSerializer
 
     def get_rating(self, user) -> int:
-        return user.rating
+        return self._get_stats(user)['rating']
 
     def get_publications_amount(self, user) -> int:
-        return user.publications_amount
+        return self._get_stats(user)['publications_amount']
+
+    def _get_stats(self, user):
+        users_stats = getattr(self, 'users_stats', {})
+        if user.pk in users_stats:
+            return users_stats[user.pk]
+        return get_user_stats(user.pk)
+
+
+class UserAvatarSerializer(ModelSerializer):
+    """Загрузка аватара в multipart/form-data."""
+
+    avatar = StreamedImageField(
+        max_size_bytes=settings.BASE64_AVATAR_MAX_SIZE_BYTES,
+        max_width=settings.BASE64_AVATAR_MAX_WIDTH,
+        max_height=settings.BASE64_AVATAR_MAX_HEIGHT,
+        allowed_types=settings.ALLOWED_B64ENCODED_IMAGE_FORMATS,
+    )
+    avatar_renditions = ImageRenditionsField('avatar')
+
+    class Meta:
+        model = User
+        fields = ('avatar', 'avatar_renditions')
 
 
 class TagSimpleSerializer(ModelSerializer):
@@ -152,6 +196,7 @@ class ArticleSerializer(ModelSerializer):
     rating = SerializerMethodField()
     views_count = SerializerMethodField()
     image = Base64ImageField()
+    image_renditions = ImageRenditionsField('image')
     is_favorited = BooleanField(read_only=True)
     author = UserSimpleSerializer(read_only=True)
     tags = TagSimpleSerializer(many=True, read_only=True)
@@ -167,6 +212,7 @@ class ArticleSerializer(ModelSerializer):
             'total_dislikes',
             'rating',
             'image',
+            'image_renditions',
             'is_favorited',
             'created_at',
             'updated_at',
@@ -202,6 +248,100 @@ class ArticleSerializer(ModelSerializer):
         return obj.views_count
 
 
+class ArticleSearchSerializer(ArticleSerializer):
+    """Статья в результатах поиска с выдержкой вокруг найденных слов."""
+
+    highlight = CharField(read_only=True)
+
+    class Meta(ArticleSerializer.Meta):
+        fields = ArticleSerializer.Meta.fields + ('highlight',)
+
+
+class ArticleBatchQuerySerializer(Serializer):
+    """Параметры пакетного получения статей: id через запятую."""
+
+    ids = ListField(child=UUIDField(), allow_empty=False)
+
+    def to_internal_value(self, data):
+        ids = data.get('ids', '')
+        return super().to_internal_value(
+            {'ids': [article_id.strip() for article_id in ids.split(',') if article_id]},
+        )
+
+    def validate_ids(self, ids):
+        if len(ids) > settings.ARTICLE_BATCH_MAX_IDS:
+            raise ValidationError(
+                _('Ensure this field has no more than {max_length} elements.').format(
+                    max_length=settings.ARTICLE_BATCH_MAX_IDS,
+                ),
+            )
+        # повторы убираются, порядок сохраняется
+        return list(dict.fromkeys(ids))
+
+
+class ArticleBatchSerializer(Serializer):
+    """Статьи в порядке запрошенных id и id, которых нет среди опубликованных."""
+
+    results = ArticleSerializer(many=True, read_only=True)
+    missing = ListField(child=UUIDField(), read_only=True)
+
+
+class ArticleChangesQuerySerializer(Serializer):
+    """Параметры ленты изменений: отметка since из предыдущего ответа."""
+
+    since = CharField(required=False)
+
+    def validate_since(self, since):
+        try:
+            return decode_watermark(since)
+        except ValueError:
+            raise ValidationError(_('Invalid watermark.'))
+
+
+class ArticleChangeSerializer(Serializer):
+    """Изменение статьи: опубликованная статья или отметка о её снятии и удалении."""
+
+    id = UUIDField(source='article_id', read_only=True)
+    changed_at = DateTimeField(read_only=True)
+    status = ChoiceField(
+        choices=(ARTICLE_PUBLISHED, ARTICLE_UNPUBLISHED, ARTICLE_DELETED),
+        read_only=True,
+    )
+    article = ArticleSerializer(read_only=True, allow_null=True)
+
+
+class ArticleChangesSerializer(Serializer):
+    """Страница ленты изменений и отметка для запроса следующей."""
+
+    results = ArticleChangeSerializer(many=True, read_only=True)
+    watermark = CharField(read_only=True, allow_null=True)
+    has_more = BooleanField(read_only=True)
+
+
+class ArticleExportQuerySerializer(Serializer):
+    """Параметры выгрузки: только изменённое начиная с updated_since."""
+
+    updated_since = DateTimeField(required=False)
+
+
+class ArticleSuggestSerializer(ModelSerializer):
+    """Заголовок статьи в подсказках поиска."""
+
+    class Meta:
+        model = Article
+        fields = (
+            'id',
+            'title',
+        )
+
+
+class SuggestSerializer(Serializer):
+    """Подсказки для строки поиска."""
+
+    articles = ArticleSuggestSerializer(many=True, read_only=True)
+    tags = TagSimpleSerializer(many=True, read_only=True)
+
+
 class ValidationSerializer(Serializer):
     """HTTP_400."""
 
@@ -232,12 +372,30 @@ class DummySerializer(Serializer):
     pass
 
 
+class ArticleImageSerializer(ModelSerializer):
+    """Загрузка изображения статьи в multipart/form-data."""
+
+    image = StreamedImageField(
+        max_size_bytes=settings.BASE64_IMAGE_MAX_SIZE_BYTES,
+        allowed_types=settings.ALLOWED_B64ENCODED_IMAGE_FORMATS,
+    )
+    image_renditions = ImageRenditionsField('image')
+
+    class Meta:
+        model = Article
+        fields = ('image', 'image_renditions')
+
+
 class ArticleCreateSerializer(ModelSerializer):
-    image = Base64ImageField(
-        validators=(
-            ImageBytesSizeValidator(settings.BASE64_IMAGE_MAX_SIZE_BYTES),
-            ImageContentTypeValidator(settings.ALLOWED_B64ENCODED_IMAGE_FORMATS),
-        ),
+    image = ValidatedBase64ImageField(
+        max_size_bytes=settings.BASE64_IMAGE_MAX_SIZE_BYTES,
+        allowed_types=settings.ALLOWED_B64ENCODED_IMAGE_FORMATS,
+        required=False,
+    )
+    image_upload = CharField(
+        write_only=True,
+        required=False,
+        help_text='Токен завершённой загрузки изображения вместо image.',
     )
     author = HiddenField(default=CurrentUserDefault())
 
@@ -251,8 +409,34 @@ class ArticleCreateSerializer(ModelSerializer):
             'source_name',
             'source_link',
             'image',
+            'image_upload',
         )
 
+    def validate_image_upload(self, token):
+        upload_session = UploadSession.objects.filter(
+            token=token,
+            user=self.context['request'].user,
+        ).first()
+        if upload_session is None:
+            raise ValidationError(_('Upload not found.'))
+        return upload_session
+
+    def validate(self, attrs):
+        if (attrs.get('image') is None) == (attrs.get('image_upload') is None):
+            raise ValidationError(_('Either image or image_upload is required.'))
+        return attrs
+
+    def create(self, validated_data):
+        upload_session = validated_data.pop('image_upload', None)
+        if upload_session is None:
+            return super().create(validated_data)
+
+        with open_upload(upload_session) as image:
+            validated_data['image'] = image
+            article = super().create(validated_data)
+        delete_upload_session(upload_session)
+        return article
+
     def to_representation(self, instance):
         """Предполагается, после создания статья имеет начальные значения атрибутов."""
         instance.is_fan = False
@@ -262,3 +446,51 @@ class ArticleCreateSerializer(ModelSerializer):
         instance.rating = 0
         instance.views_count = 0
         return ArticleSerializer().to_representation(instance)
+
+
+class UploadSessionSerializer(ModelSerializer):
+    """Сессия загрузки изображения статьи по частям."""
+
+    user = HiddenField(default=CurrentUserDefault())
+
+    class Meta:
+        model = UploadSession
+        fields = ('id', 'user', 'size', 'offset', 'token')
+        read_only_fields = ('offset', 'token')
+
+    def validate_size(self, size):
+        if not 0 < size <= settings.BASE64_IMAGE_MAX_SIZE_BYTES:
+            raise ValidationError(
+                _('File size must not exceed {max_size}.').format(
+                    max_size=settings.BASE64_IMAGE_MAX_SIZE_BYTES,
+                ),
+            )
+        return size
+
+
+class UploadSessionFinalizeSerializer(UploadSessionSerializer):
+    """Проверяет загруженное изображение и выдаёт токен для создания статьи."""
+
+    class Meta(UploadSessionSerializer.Meta):
+        read_only_fields = ('size', 'offset', 'token')
+
+    def validate(self, attrs):
+        upload_session = self.instance
+        if upload_session.token:
+            return attrs
+        if upload_session.offset < upload_session.size:
+            raise ValidationError({'offset': [_('Upload is incomplete.')]})
+
+        image_field = ArticleCreateSerializer().fields['image']
+        with open_upload(upload_session) as upload:
+            try:
+                image = image_field.open_image(upload)
+            except ValidationError as exc:
+                raise ValidationError({'image': exc.detail})
+        attrs['name'] = get_image_file_name(image)
+        return attrs
+
+    def update(self, instance, validated_data):
+        if not instance.token:
+            finalize_upload(instance, validated_data['name'])
+        return instance
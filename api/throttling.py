@@ -0,0 +1,74 @@
+import redis
+from rest_framework.settings import api_settings
+from rest_framework.throttling import SimpleRateThrottle
+
+from core import metrics
+from core.ratelimit import get_token_bucket
+from core.utils import get_client_ip
+
+
+class TokenBucketThrottle(SimpleRateThrottle):
+    """Ограничение частоты запросов к действиям view по областям (scope).
+
+    Область действия ViewSet задаётся словарём throttle_scopes view,
+    области view без действий — атрибутом throttle_scope; запросы без области
+    не ограничиваются. Лимит 'N/период' из DEFAULT_THROTTLE_RATES — корзина
+    на N жетонов, которая равномерно пополняется за период (core.ratelimit).
+    Запросы считаются по пользователю, анонимные — по IP.
+    """
+
+    def __init__(self):
+        # настройки читаются при создании throttle (на каждый запрос), а не при
+        # импорте класса; лимиты всех областей разбираются один раз
+        self.THROTTLE_RATES = api_settings.DEFAULT_THROTTLE_RATES
+        self.rates = {
+            scope: self.parse_rate(rate) for scope, rate in self.THROTTLE_RATES.items()
+        }
+        self.wait_seconds = None
+        super().__init__()
+
+    def allow_request(self, request, view):
+        self.scope = self.get_scope(view)
+        if self.scope is None:
+            return True
+        self.rate = self.get_rate()
+        if self.rate is None:
+            return True
+        self.num_requests, self.duration = self.rates[self.scope]
+        try:
+            allowed, self.wait_seconds = get_token_bucket().consume(
+                self.get_cache_key(request, view),
+                self.num_requests / self.duration,
+                self.num_requests,
+            )
+        except redis.RedisError:
+            # без Redis запросы не ограничиваются, а не отклоняются
+            metrics.THROTTLE_ERRORS.labels(self.scope).inc()
+            return True
+        if not allowed:
+            metrics.THROTTLE_REJECTIONS.labels(self.scope).inc()
+        return allowed
+
+    def get_scope(self, view):
+        scopes = getattr(view, 'throttle_scopes', {})
+        return scopes.get(getattr(view, 'action', None)) or getattr(
+            view,
+            'throttle_scope',
+            None,
+        )
+
+    def get_rate(self):
+        # при создании throttle область ещё неизвестна: её задаёт allow_request
+        if self.scope is None:
+            return None
+        return super().get_rate()
+
+    def get_cache_key(self, request, view):
+        if request.user and request.user.is_authenticated:
+            ident = f'user:{request.user.pk}'
+        else:
+            ident = f'ip:{get_client_ip(request)}'
+        return self.cache_format % {'scope': self.scope, 'ident': ident}
+
+    def wait(self):
+        return self.wait_seconds
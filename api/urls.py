@@ -1,17 +1,16 @@
 from django.urls import include, path
-from drf_spectacular.views import (
-    SpectacularAPIView,
-    SpectacularRedocView,
-    SpectacularSwaggerView,
-)
+from drf_spectacular.views import SpectacularRedocView, SpectacularSwaggerView
 from rest_framework import routers
 
 from api.views import (
+    ArticleExportView,
     ArticleViewSet,
     CommentViewSet,
+    SchemaView,
     TagViewSet,
     TokenCreateView,
     TokenDestroyView,
+    UploadSessionViewSet,
     UserViewSet,
 )
 
@@ -22,6 +21,7 @@ router_v1 = routers.DefaultRouter()
 router_v1.register(r'users', UserViewSet, basename='users')
 router_v1.register(r'articles', ArticleViewSet, basename='articles')
 router_v1.register(r'tags', TagViewSet, basename='tags')
+router_v1.register(r'uploads', UploadSessionViewSet, basename='uploads')
 router_v1.register(
     'articles/'
     '(?P<article_id>[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12})/'
@@ -34,7 +34,12 @@ urlpatterns = [
     path('v1/', include(router_v1.urls)),
     path('v1/auth/login/', TokenCreateView.as_view(), name='login'),
     path('v1/auth/logout/', TokenDestroyView.as_view(), name='logout'),
-    path('v1/schema/', SpectacularAPIView.as_view(), name='openapi-schema'),
+    path(
+        'v1/export/articles/',
+        ArticleExportView.as_view(),
+        name='articles-export',
+    ),
+    path('v1/schema/', SchemaView.as_view(), name='openapi-schema'),
     path(
         'v1/schema/swagger-ui/',
         SpectacularSwaggerView.as_view(url_name='api:openapi-schema'),
@@ -1,45 +1,107 @@
+import re
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
 from django.contrib.auth import get_user_model
-from django.contrib.postgres.search import SearchQuery, SearchRank
-from django.db.models import Count, Exists, F, OuterRef, Q, Sum, Value
+from django.core.handlers.asgi import ASGIRequest
+from django.db.models import Count, Exists, Max, OuterRef, Prefetch, Q, Sum, Value
 from django.db.models.functions import Coalesce
-from django.db.models.query import QuerySet
+from django.http import HttpResponse, StreamingHttpResponse
 from django.shortcuts import get_object_or_404
+from django.utils import timezone
+from django.utils.cache import get_conditional_response, patch_vary_headers
 from django.utils.translation import gettext_lazy as _
 from django_filters.rest_framework import DjangoFilterBackend
 from djoser.views import TokenCreateView as DjoserTokenCreateView
 from djoser.views import TokenDestroyView as DjoserTokenDestroyView
 from djoser.views import UserViewSet as DjoserUserViewSet
 from drf_spectacular.utils import extend_schema, extend_schema_view
+from drf_spectacular.views import SCHEMA_KWARGS, SpectacularAPIView
 from rest_framework import status
 from rest_framework.decorators import action
-from rest_framework.mixins import CreateModelMixin
+from rest_framework.mixins import CreateModelMixin, RetrieveModelMixin
 from rest_framework.permissions import IsAuthenticated, IsAuthenticatedOrReadOnly
 from rest_framework.response import Response
-from rest_framework.viewsets import ModelViewSet, ReadOnlyModelViewSet
+from rest_framework.views import APIView
+from rest_framework.viewsets import GenericViewSet, ModelViewSet, ReadOnlyModelViewSet
 
 from api import schema
+from api.conditional import aconditional_get, conditional_get, make_etag
 from api.filters import ArticleFilter
-from api.mixins import CountViewerMixin, LikedMixin
-from api.paginations import CursorPagination
+from api.mixins import (
+    AsyncViewSetMixin,
+    ConditionalGetMixin,
+    CountViewerMixin,
+    IdempotentCreateMixin,
+    LikedMixin,
+    ReplicaReadMixin,
+)
+from api.openapi import load_schema_artefacts
+from api.paginations import CursorPagination, SearchPagination
+from api.parsers import ImageMultiPartParser
 from api.permissions import ArticleOwnerPermission, IsAdmin, IsAuthor, ReadOnly
 from api.serializers import (
+    ArticleBatchQuerySerializer,
+    ArticleBatchSerializer,
+    ArticleChangesQuerySerializer,
+    ArticleChangesSerializer,
     ArticleCreateSerializer,
+    ArticleExportQuerySerializer,
+    ArticleImageSerializer,
+    ArticleSearchSerializer,
     ArticleSerializer,
     CommentSerializer,
     DummySerializer,
+    SuggestSerializer,
     TagRootsSerializer,
     TagSerializer,
+    UploadSessionFinalizeSerializer,
+    UploadSessionSerializer,
+    UserAvatarSerializer,
 )
-from articles.models import Article, FavoriteArticle, Tag
+from articles.changes import (
+    ARTICLE_PUBLISHED,
+    ARTICLE_UNPUBLISHED,
+    TAG_TREE_NAMESPACE,
+    ExpiredWatermark,
+    aget_engaged_at,
+    encode_watermark,
+    get_article_changed_at,
+    get_article_changes,
+    get_engaged_at,
+)
+from articles.export import (
+    EXPORT_CONTENT_TYPE,
+    aiter_chunks,
+    iter_export_records,
+    iter_gzip,
+    iter_ndjson,
+)
+from articles.models import Article, Comment, FavoriteArticle, Tag, UploadSession
+from articles.search import (
+    SEARCH_FACETS,
+    build_search_query,
+    count_facets,
+    get_headlines,
+    get_search_cache,
+    get_suggestions,
+    make_search_cache_key,
+    match_articles,
+    rank_article_ids,
+)
+from articles.uploads import UploadOffsetMismatch, append_chunk
+from core.cache import get_project_cache
+from core.utils import accepts_encoding
 from likes.models import Vote, VoteTypes
-from likes.utils import annotate_user_queryset
 
 User = get_user_model()
 
+CONTENT_RANGE_PATTERN = re.compile(r'^bytes (\d+)-(\d+)/(\d+)$')
+
 
 @extend_schema_view(**schema.TOKEN_CREATE_VIEW_SCHEMA)
 class TokenCreateView(DjoserTokenCreateView):
-    pass
+    throttle_scope = 'login'
 
 
 @extend_schema_view(**schema.TOKEN_DESTROY_VIEW_SCHEMA)
@@ -85,9 +147,10 @@ class UserViewSet(DjoserUserViewSet):
     def destroy(self, request, *args, **kwargs):
         pass
 
-    def get_queryset(self) -> QuerySet:
-        queryset = super().get_queryset()
-        return annotate_user_queryset(queryset)
+    def get_serializer_class(self):
+        if self.action == 'avatar':
+            return UserAvatarSerializer
+        return super().get_serializer_class()
 
     def get_instance(self):
         return self.get_queryset().get(pk=self.request.user.pk)
@@ -120,11 +183,28 @@ class UserViewSet(DjoserUserViewSet):
             status=status.HTTP_204_NO_CONTENT,
         )
 
+    @action(
+        methods=['put'],
+        detail=False,
+        url_path='me/avatar',
+        permission_classes=(IsAuthenticated,),
+        parser_classes=(ImageMultiPartParser,),
+    )
+    def avatar(self, request) -> Response:
+        serializer = self.get_serializer(request.user, data=request.data)
+        serializer.is_valid(raise_exception=True)
+        serializer.save()
+        return Response(serializer.data)
+
 
 @extend_schema_view(**schema.ARTICLE_VIEW_SET_SCHEMA)
 class ArticleViewSet(
+    AsyncViewSetMixin,
+    ReplicaReadMixin,
     CountViewerMixin,
+    ConditionalGetMixin,
     LikedMixin,
+    IdempotentCreateMixin,
     ReadOnlyModelViewSet,
     CreateModelMixin,
 ):
@@ -133,12 +213,26 @@ class ArticleViewSet(
     permission_classes = (IsAuthenticatedOrReadOnly & ArticleOwnerPermission,)
     filter_backends = (DjangoFilterBackend,)
     filterset_class = ArticleFilter
+    throttle_scopes = {
+        'retrieve': 'article_view',
+        'batch': 'article_view',
+        'search': 'search',
+        'suggest': 'search',
+        'add_vote': 'vote',
+        'unvote': 'vote',
+    }
+    # реплика может отставать больше, чем лента изменений ждёт коммита изменений
+    primary_read_actions = ('changes',)
 
     def get_queryset(self):
         qs = (
             Article.objects.filter(is_published=True)
             .select_related('author')
-            .prefetch_related('tags', 'votes')
+            .prefetch_related(
+                'tags',
+                'votes',
+                Prefetch('comments', Comment.objects.select_related('author')),
+            )
             .annotate(views_count=Coalesce(Count('viewers'), 0))
             .annotate(rating=Coalesce(Sum('votes__vote'), 0))
             .annotate(
@@ -156,14 +250,7 @@ class ArticleViewSet(
         if user.is_authenticated:
             user_votes = Vote.objects.filter(user=user, object_id=OuterRef('pk'))
             qs = (
-                qs.annotate(
-                    is_favorited=Exists(
-                        FavoriteArticle.objects.filter(
-                            article=OuterRef('pk'),
-                            user=user,
-                        ),
-                    ),
-                )
+                qs.annotate(is_favorited=self._get_is_favorited(user))
                 .annotate(is_fan=Exists(user_votes.filter(vote=VoteTypes.LIKE)))
                 .annotate(is_hater=Exists(user_votes.filter(vote=VoteTypes.DISLIKE)))
             )
@@ -178,8 +265,50 @@ class ArticleViewSet(
     def get_serializer_class(self):
         if self.action == 'create':
             return ArticleCreateSerializer
+        if self.action == 'search':
+            return ArticleSearchSerializer
+        if self.action == 'image':
+            return ArticleImageSerializer
         return ArticleSerializer
 
+    def get_viewed_queryset(self):
+        return Article.objects.filter(is_published=True)
+
+    def get_conditional_validators(self, request, *args, **kwargs):
+        """ETag и Last-Modified по версиям статей, без агрегатов и сериализации.
+
+        Версия — позднейшая из отметок changed_at статьи и её ArticleEngagement;
+        для списка это два простых агрегата: по статьям и по ArticleEngagement.
+        В ответе есть отметки пользователя (избранное, голос), поэтому он входит
+        в ETag; их изменение сдвигает отметку ArticleEngagement. Для списка
+        Last-Modified не выдаётся: удаление статьи не сдвигает максимальную версию.
+        """
+        if self.action == 'retrieve':
+            changed_at = get_article_changed_at(kwargs['pk'])
+            return self._make_retrieve_validators(request, kwargs['pk'], changed_at)
+
+        queryset = self.filter_queryset(self._get_search_queryset())
+        state = queryset.aggregate(
+            changed_at=Max('changed_at'),
+            count=Count('pk'),
+        )
+        state['engaged_at'] = get_engaged_at(queryset)
+        return self._make_list_validators(request, state)
+
+    async def aget_conditional_validators(self, request, *args, **kwargs):
+        if self.action == 'retrieve':
+            changed_at = await sync_to_async(get_article_changed_at)(kwargs['pk'])
+            return self._make_retrieve_validators(request, kwargs['pk'], changed_at)
+
+        # фильтр по тегам проверяет значения запросами к базе
+        queryset = await sync_to_async(self.filter_queryset)(self._get_search_queryset())
+        state = await queryset.aaggregate(
+            changed_at=Max('changed_at'),
+            count=Count('pk'),
+        )
+        state['engaged_at'] = await aget_engaged_at(queryset)
+        return self._make_list_validators(request, state)
+
     @action(
         methods=['post', 'delete'],
         detail=True,
@@ -192,6 +321,21 @@ class ArticleViewSet(
         if request.method == 'DELETE':
             return self._delete_favorite(request, pk)
 
+    @action(
+        methods=['put'],
+        detail=True,
+        permission_classes=(IsAuthenticated & ArticleOwnerPermission,),
+        parser_classes=(ImageMultiPartParser,),
+    )
+    def image(self, request, pk) -> Response:
+        # права проверяются до чтения тела запроса; статья может быть не опубликована
+        article = get_object_or_404(Article, pk=pk)
+        self.check_object_permissions(request, article)
+        serializer = self.get_serializer(article, data=request.data)
+        serializer.is_valid(raise_exception=True)
+        serializer.save()
+        return Response(serializer.data)
+
     @action(detail=False)
     def the_most_popular(self, request):
         instance = self.get_queryset().order_by('-views_count', '-created_at').first()
@@ -206,27 +350,295 @@ class ArticleViewSet(
     @action(
         methods=['get'],
         detail=False,
+        pagination_class=SearchPagination,
     )
     def search(self, request) -> Response:
-        query = self.request.query_params.get('query')
-        if not query:
+        error_response = self._check_search_params()
+        if error_response is not None:
+            return error_response
+
+        query = self.request.query_params['query']
+        facets = self._get_requested_facets()
+        search_query = build_search_query(query)
+        search_result = self._get_search_result(query, search_query, facets)
+        return self._get_search_response(search_result, search_query, facets)
+
+    async def asearch(self, request) -> Response:
+        error_response = self._check_search_params()
+        if error_response is not None:
+            return error_response
+
+        query = self.request.query_params['query']
+        facets = self._get_requested_facets()
+        search_query = build_search_query(query)
+        search_cache = get_search_cache()
+        cache_key = make_search_cache_key(query, self._get_search_filter_params())
+        search_result, is_changed = await sync_to_async(self._complete_search_result)(
+            await search_cache.aget(cache_key),
+            search_query,
+            facets,
+        )
+        if is_changed:
+            await search_cache.aset(
+                cache_key,
+                search_result,
+                settings.SEARCH_RESULTS_CACHE_TIMEOUT,
+            )
+        return await sync_to_async(self._get_search_response)(
+            search_result,
+            search_query,
+            facets,
+        )
+
+    def _check_search_params(self):
+        """Ответ с ошибкой, если не передан запрос или запрошены неизвестные фасеты."""
+        if not self.request.query_params.get('query'):
             return Response(
                 {'Fail': _('You need to pass a parameter "query" with a search query!')},
                 status=status.HTTP_422_UNPROCESSABLE_ENTITY,
             )
 
-        query = SearchQuery(query)
-        rank = SearchRank(F('search_vector'), query)
-        qs = (
-            self.get_queryset()
-            .annotate(rank=rank)
-            .filter(search_vector=query)
-            .order_by('-rank')
+        facets = self._get_requested_facets()
+        unknown_facets = ', '.join(sorted(set(facets) - set(SEARCH_FACETS)))
+        if unknown_facets:
+            return Response(
+                {'facets': [_('Unknown facets: %s.') % unknown_facets]},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        return None
+
+    def _get_search_response(self, search_result, search_query, facets):
+        """Страница найденных статей с выдержками и запрошенными фасетами."""
+        page_ids = self.paginate_queryset(search_result['ids'])
+        page = self._get_articles_in_order(page_ids)
+        headlines = get_headlines(
+            [article.pk for article in page],
+            search_query,
+            **self._get_headline_options(),
+        )
+        for article in page:
+            article.highlight = headlines.get(article.pk, '')
+        serializer = self.get_serializer(page, many=True)
+        response = self.get_paginated_response(serializer.data)
+        if facets:
+            response.data['facets'] = {
+                facet: search_result['facets'][facet] for facet in facets
+            }
+        return response
+
+    @action(detail=False)
+    def batch(self, request) -> Response:
+        """Статьи по списку id одним запросом, без учёта просмотров."""
+        query_serializer = ArticleBatchQuerySerializer(data=request.query_params)
+        query_serializer.is_valid(raise_exception=True)
+        article_ids = query_serializer.validated_data['ids']
+        articles = self._get_articles_in_order(article_ids)
+        found_ids = {article.pk for article in articles}
+        missing_ids = [
+            article_id for article_id in article_ids if article_id not in found_ids
+        ]
+        serializer = ArticleBatchSerializer(
+            {'results': articles, 'missing': missing_ids},
+            context=self.get_serializer_context(),
+        )
+        return Response(serializer.data, status=status.HTTP_200_OK)
+
+    @action(detail=False)
+    def changes(self, request) -> Response:
+        """Изменения статей после отметки since в порядке (changed_at, id)."""
+        query_serializer = ArticleChangesQuerySerializer(data=request.query_params)
+        query_serializer.is_valid(raise_exception=True)
+        since = query_serializer.validated_data.get('since')
+        try:
+            changes, has_more = get_article_changes(
+                since,
+                settings.ARTICLE_CHANGES_PAGE_SIZE,
+            )
+        except ExpiredWatermark:
+            return Response(
+                {'since': [_('The watermark has expired, a full sync is required.')]},
+                status=status.HTTP_410_GONE,
+            )
+        articles = {
+            article.pk: article
+            for article in self._get_articles_in_order(
+                change.article_id
+                for change in changes
+                if change.status == ARTICLE_PUBLISHED
+            )
+        }
+        results = []
+        for change in changes:
+            article = articles.get(change.article_id)
+            if change.status == ARTICLE_PUBLISHED and article is None:
+                # снята с публикации после выборки изменений
+                change = change._replace(status=ARTICLE_UNPUBLISHED)
+            results.append({**change._asdict(), 'article': article})
+        if changes:
+            watermark = encode_watermark(changes[-1].changed_at, changes[-1].article_id)
+        else:
+            watermark = request.query_params.get('since')
+        serializer = ArticleChangesSerializer(
+            {'results': results, 'watermark': watermark, 'has_more': has_more},
+            context=self.get_serializer_context(),
+        )
+        return Response(serializer.data, status=status.HTTP_200_OK)
+
+    @action(detail=True)
+    def related(self, request, pk) -> Response:
+        article = get_object_or_404(Article.objects.filter(is_published=True), pk=pk)
+        related_ids = article.related_articles.values_list('related_id', flat=True)
+        articles = self._get_articles_in_order(
+            related_ids[: settings.RELATED_ARTICLES_COUNT],
         )
-        qs = self.filter_queryset(qs)
-        qs = self.paginate_queryset(qs)
-        serializer = self.get_serializer(qs, many=True)
-        return self.get_paginated_response(serializer.data)
+        serializer = self.get_serializer(articles, many=True)
+        return Response(serializer.data, status=status.HTTP_200_OK)
+
+    @action(
+        methods=['get'],
+        detail=False,
+        url_path='search/suggest',
+    )
+    def suggest(self, request) -> Response:
+        query = self.request.query_params.get('q')
+        if query is None:
+            return Response(
+                {'Fail': _('You need to pass a parameter "q" with a search query!')},
+                status=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            )
+        serializer = SuggestSerializer(get_suggestions(query))
+        return Response(serializer.data, status=status.HTTP_200_OK)
+
+    def _get_articles_in_order(self, article_ids):
+        """Загружает статьи с агрегатами в порядке переданных id.
+
+        Отсутствующие и снятые с публикации статьи пропускаются.
+        """
+        article_ids = list(article_ids)
+        articles = self.get_queryset().in_bulk(article_ids)
+        return [
+            articles[article_id] for article_id in article_ids if article_id in articles
+        ]
+
+    @staticmethod
+    def _get_is_favorited(user):
+        return Exists(
+            FavoriteArticle.objects.filter(
+                article=OuterRef('pk'),
+                user=user,
+            ),
+        )
+
+    def _get_search_queryset(self):
+        """Опубликованные статьи без агрегатов для первой фазы поиска."""
+        qs = Article.objects.filter(is_published=True)
+        user = self.request.user
+        if user.is_authenticated:
+            return qs.annotate(is_favorited=self._get_is_favorited(user))
+        return qs.annotate(is_favorited=Value(False))
+
+    def _get_requested_facets(self):
+        facets = self.request.query_params.get('facets', '')
+        return list(dict.fromkeys(facet for facet in facets.split(',') if facet))
+
+    @staticmethod
+    def _make_retrieve_validators(request, pk, changed_at):
+        if changed_at is None:
+            return None
+        user_id = request.user.pk if request.user.is_authenticated else None
+        return make_etag(pk, changed_at.isoformat(), user_id), changed_at
+
+    @staticmethod
+    def _make_list_validators(request, state):
+        user_id = request.user.pk if request.user.is_authenticated else None
+        versions = [state['changed_at'], state['engaged_at']]
+        changed_at = max(filter(None, versions), default=None)
+        etag = make_etag(
+            request.get_full_path(),
+            changed_at and changed_at.isoformat(),
+            state['count'],
+            user_id,
+        )
+        return etag, None
+
+    def _get_search_result(self, query, search_query, facets):
+        """Ранжированный список id найденных статей и фасеты по всем найденным.
+
+        Результат кешируется целиком; недостающие фасеты досчитываются
+        отдельным запросом и сохраняются вместе со списком id.
+        """
+        search_cache = get_search_cache()
+        cache_key = make_search_cache_key(query, self._get_search_filter_params())
+        search_result, is_changed = self._complete_search_result(
+            search_cache.get(cache_key),
+            search_query,
+            facets,
+        )
+        if is_changed:
+            search_cache.set(
+                cache_key,
+                search_result,
+                settings.SEARCH_RESULTS_CACHE_TIMEOUT,
+            )
+        return search_result
+
+    def _complete_search_result(self, search_result, search_query, facets):
+        """Ранжирует статьи, если результата нет в кеше, и досчитывает фасеты.
+
+        Возвращает результат и признак того, что его нужно сохранить в кеш.
+        """
+        queryset = self.filter_queryset(self._get_search_queryset())
+        is_changed = search_result is None
+        if is_changed:
+            ranked_ids = rank_article_ids(queryset, search_query)
+            search_result = {'ids': ranked_ids, 'facets': {}}
+
+        missing_facets = [
+            facet for facet in facets if facet not in search_result['facets']
+        ]
+        if missing_facets:
+            search_result['facets'].update(
+                count_facets(match_articles(queryset, search_query), missing_facets),
+            )
+            is_changed = True
+        return search_result, is_changed
+
+    def _get_search_filter_params(self):
+        """Параметры фильтров, влияющие на список найденных статей."""
+        params = [
+            (name, value)
+            for name in self.filterset_class.base_filters
+            for value in self.request.query_params.getlist(name)
+        ]
+        if 'is_favorited' in self.request.query_params:
+            # избранное у каждого пользователя своё
+            params.append(('user', self.request.user.pk))
+        return params
+
+    def _get_headline_options(self):
+        """Длина выдержки (в словах) и число фрагментов из параметров запроса."""
+        options = {
+            'max_words': (
+                'headline_words',
+                settings.SEARCH_HEADLINE_MAX_WORDS,
+                2,
+                settings.SEARCH_HEADLINE_WORDS_LIMIT,
+            ),
+            'max_fragments': (
+                'headline_fragments',
+                settings.SEARCH_HEADLINE_MAX_FRAGMENTS,
+                0,
+                settings.SEARCH_HEADLINE_FRAGMENTS_LIMIT,
+            ),
+        }
+        headline_options = {}
+        for option, (param, default, min_value, max_value) in options.items():
+            try:
+                value = int(self.request.query_params.get(param, default))
+            except ValueError:
+                value = default
+            headline_options[option] = max(min_value, min(value, max_value))
+        return headline_options
 
     def _create_favorite(self, request, pk):
         # проверяем, что статья опубликована
@@ -259,10 +671,26 @@ class ArticleViewSet(
 
 
 @extend_schema_view(**schema.TAG_VIEW_SET_SCHEMA)
-class TagViewSet(ReadOnlyModelViewSet):
+class TagViewSet(
+    AsyncViewSetMixin,
+    ReplicaReadMixin,
+    ConditionalGetMixin,
+    ReadOnlyModelViewSet,
+):
     queryset = Tag.objects.select_related('parent').prefetch_related('children')
     serializer_class = TagSerializer
 
+    SUBTREE_QUERY = """
+        WITH RECURSIVE tag_subtree(id, name, parent_id) AS (
+            SELECT id, name, parent_id FROM articles_tag WHERE id = %s
+          UNION ALL
+            SELECT t.id, t.name, t.parent_id
+            FROM articles_tag AS t, tag_subtree AS ts
+            WHERE t.parent_id = ts.id
+            )
+        SELECT * FROM tag_subtree
+    """
+
     @staticmethod
     def finding_parent_for_child(parent, desired_child):
         """Проверка, является ли desired_child одним из детей parent.
@@ -287,34 +715,76 @@ class TagViewSet(ReadOnlyModelViewSet):
                 TagViewSet.finding_parent_for_child(possible_parent, child)
         return serializer_data
 
+    def get_conditional_validators(self, request, *args, **kwargs):
+        """ETag по версии дерева тегов: последнему изменению и числу тегов."""
+        state = Tag.objects.aggregate(updated_at=Max('updated_at'), count=Count('pk'))
+        return self._make_validators(request, state)
+
+    async def aget_conditional_validators(self, request, *args, **kwargs):
+        state = await Tag.objects.aaggregate(
+            updated_at=Max('updated_at'),
+            count=Count('pk'),
+        )
+        return self._make_validators(request, state)
+
+    @staticmethod
+    def _make_validators(request, state):
+        updated_at = state['updated_at'] and state['updated_at'].isoformat()
+        return make_etag(request.get_full_path(), updated_at, state['count']), None
+
     @action(detail=False)
+    @conditional_get
     def roots(self, request) -> Response:
-        all_roots = self.get_queryset().filter(parent__isnull=True)
-        serializer = TagRootsSerializer(all_roots, many=True)
-        return Response(data=serializer.data, status=status.HTTP_200_OK)
+        data = get_project_cache().get_or_set(
+            TAG_TREE_NAMESPACE,
+            'roots',
+            self._get_roots_data,
+            settings.TAG_CACHE_TIMEOUT,
+        )
+        return Response(data=data, status=status.HTTP_200_OK)
+
+    @aconditional_get
+    async def aroots(self, request) -> Response:
+        data = await get_project_cache().aget_or_set(
+            TAG_TREE_NAMESPACE,
+            'roots',
+            self._get_roots_data,
+            settings.TAG_CACHE_TIMEOUT,
+        )
+        return Response(data=data, status=status.HTTP_200_OK)
 
     @action(detail=True)
+    @conditional_get
     def subtree(self, request, pk) -> Response:
-        query = """
-            WITH RECURSIVE tag_subtree(id, name, parent_id) AS (
-                SELECT id, name, parent_id FROM articles_tag WHERE id = %s
-              UNION ALL
-                SELECT t.id, t.name, t.parent_id
-                FROM articles_tag AS t, tag_subtree AS ts
-                WHERE t.parent_id = ts.id
-                )
-            SELECT * FROM tag_subtree
-        """
-        tags = self.get_queryset().raw(query, [pk])
-        serializer = TagRootsSerializer(tags, many=True)
-        return Response(
-            data=self.building_tree(serializer.data),
-            status=status.HTTP_200_OK,
+        data = get_project_cache().get_or_set(
+            TAG_TREE_NAMESPACE,
+            f'subtree:{pk}',
+            lambda: self._get_subtree_data(pk),
+            settings.TAG_CACHE_TIMEOUT,
         )
+        return Response(data=data, status=status.HTTP_200_OK)
+
+    @aconditional_get
+    async def asubtree(self, request, pk) -> Response:
+        data = await get_project_cache().aget_or_set(
+            TAG_TREE_NAMESPACE,
+            f'subtree:{pk}',
+            lambda: self._get_subtree_data(pk),
+            settings.TAG_CACHE_TIMEOUT,
+        )
+        return Response(data=data, status=status.HTTP_200_OK)
+
+    def _get_roots_data(self):
+        all_roots = self.get_queryset().filter(parent__isnull=True)
+        return TagRootsSerializer(all_roots, many=True).data
+
+    def _get_subtree_data(self, pk):
+        tags = self.get_queryset().raw(self.SUBTREE_QUERY, [pk])
+        return self.building_tree(TagRootsSerializer(tags, many=True).data)
 
 
 @extend_schema_view(**schema.COMMENT_VIEW_SET_SCHEMA)
-class CommentViewSet(ModelViewSet):  # feature. LikedMixin
+class CommentViewSet(ReplicaReadMixin, ModelViewSet):  # feature. LikedMixin
     serializer_class = CommentSerializer
     permission_classes = (IsAdmin | IsAuthor | ReadOnly,)
 
@@ -336,3 +806,133 @@ class CommentViewSet(ModelViewSet):  # feature. LikedMixin
         serialized_comment_data = serializer.data
         self.perform_destroy(instance)
         return Response(serialized_comment_data, status=status.HTTP_200_OK)
+
+
+@extend_schema_view(**schema.UPLOAD_SESSION_VIEW_SET_SCHEMA)
+class UploadSessionViewSet(CreateModelMixin, RetrieveModelMixin, GenericViewSet):
+    """Загрузка изображения статьи по частям с возможностью продолжения."""
+
+    serializer_class = UploadSessionSerializer
+    permission_classes = (IsAuthenticated,)
+
+    def get_queryset(self):
+        return UploadSession.objects.filter(user=self.request.user)
+
+    def get_serializer_class(self):
+        if self.action == 'finalize':
+            return UploadSessionFinalizeSerializer
+        return UploadSessionSerializer
+
+    def update(self, request, pk) -> Response:
+        """Принимает часть файла, её положение задаёт заголовок Content-Range."""
+        upload_session = self.get_object()
+        if upload_session.token:
+            return Response(
+                {'detail': _('Upload is finalized already.')},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        content_range = CONTENT_RANGE_PATTERN.match(
+            request.headers.get('Content-Range', ''),
+        )
+        content_length = int(request.META.get('CONTENT_LENGTH') or 0)
+        if content_range is None:
+            return Response(
+                {'Content-Range': [_('Expected "bytes <start>-<end>/<size>".')]},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        start, end, size = (int(value) for value in content_range.groups())
+        if size != upload_session.size or not start <= end < size:
+            return Response(
+                {'Content-Range': [_('Range does not match the upload size.')]},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        if content_length != end - start + 1:
+            return Response(
+                {'Content-Range': [_('Range does not match Content-Length.')]},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        try:
+            append_chunk(upload_session, start, request.stream, content_length)
+        except UploadOffsetMismatch as exc:
+            return Response({'offset': exc.offset}, status=status.HTTP_409_CONFLICT)
+        return Response(self.get_serializer(upload_session).data)
+
+    @action(methods=['post'], detail=True)
+    def finalize(self, request, pk) -> Response:
+        serializer = self.get_serializer(self.get_object(), data={})
+        serializer.is_valid(raise_exception=True)
+        serializer.save()
+        return Response(serializer.data)
+
+
+@extend_schema_view(**schema.ARTICLE_EXPORT_VIEW_SCHEMA)
+class ArticleExportView(APIView):
+    """Потоковая выгрузка статей, тегов, голосов и просмотров в NDJSON.
+
+    Записи читаются из базы пачками и отдаются клиенту по мере сериализации,
+    ответ не собирается в памяти ни целиком, ни при сжатии gzip.
+    """
+
+    permission_classes = (IsAdmin,)
+
+    def get(self, request):
+        query_serializer = ArticleExportQuerySerializer(data=request.query_params)
+        query_serializer.is_valid(raise_exception=True)
+        chunks = iter_ndjson(
+            iter_export_records(
+                query_serializer.validated_data.get('updated_since'),
+                chunk_size=settings.ARTICLE_EXPORT_CHUNK_SIZE,
+            ),
+        )
+        filename = f'articles-{timezone.now():%Y%m%d%H%M%S}.ndjson'
+        is_gzip = accepts_encoding(request, 'gzip')
+        if is_gzip:
+            chunks = iter_gzip(chunks)
+        if isinstance(request._request, ASGIRequest):  # noqa: WPS437
+            chunks = aiter_chunks(chunks)
+        response = StreamingHttpResponse(chunks, content_type=EXPORT_CONTENT_TYPE)
+        if is_gzip:
+            response['Content-Encoding'] = 'gzip'
+        response['Content-Disposition'] = f'attachment; filename="{filename}"'
+        patch_vary_headers(response, ('Accept-Encoding',))
+        return response
+
+
+class SchemaView(SpectacularAPIView):
+    """Схема OpenAPI из артефакта, сгенерированного заранее (generate_openapi_schema).
+
+    Схема отдаётся из памяти, сжатой gzip, если клиент это поддерживает, с ETag.
+    В режиме DEBUG и для параметров lang, version, indent схема генерируется
+    на каждый запрос, как в SpectacularAPIView.
+    """
+
+    @extend_schema(**SCHEMA_KWARGS)
+    def get(self, request, *args, **kwargs):
+        is_live = (
+            settings.DEBUG
+            or 'lang' in request.GET
+            or 'version' in request.GET
+            or 'indent' in request.accepted_media_type
+        )
+        if is_live:
+            return super().get(request, *args, **kwargs)
+
+        renderer = request.accepted_renderer
+        artefact = load_schema_artefacts()[renderer.format]
+        response = get_conditional_response(request, etag=artefact.etag)
+        if response is None:
+            content_type = renderer.media_type
+            if renderer.charset:
+                content_type = f'{content_type}; charset={renderer.charset}'
+            if accepts_encoding(request, 'gzip'):
+                response = HttpResponse(artefact.compressed, content_type=content_type)
+                response['Content-Encoding'] = 'gzip'
+            else:
+                response = HttpResponse(artefact.content, content_type=content_type)
+            filename = self._get_filename(request, None)
+            response['Content-Disposition'] = f'inline; filename="{filename}"'
+        response['ETag'] = artefact.etag
+        patch_vary_headers(response, ('Accept', 'Accept-Encoding'))
+        return response
@@ -13,7 +13,14 @@ from django.utils.translation import gettext_lazy as _
 from mdeditor.widgets import MDEditorWidget
 from mptt.admin import DraggableMPTTAdmin, TreeRelatedFieldListFilter
 
-from articles.models import Article, Comment, FavoriteArticle, Tag, Viewer
+from articles.models import (
+    Article,
+    Comment,
+    FavoriteArticle,
+    RelatedArticle,
+    Tag,
+    Viewer,
+)
 
 
 class ArticleForm(ModelForm):
@@ -152,3 +159,10 @@ class CommentAdmin(admin.ModelAdmin):
     list_select_related = ('author',)
     list_filter = ('article', 'author')
     search_fields = ('text',)
+
+
+@admin.register(RelatedArticle)
+class RelatedArticleAdmin(admin.ModelAdmin):
+    list_display = ('article', 'related', 'score')
+    list_select_related = ('article', 'related')
+    search_fields = ('article__title',)
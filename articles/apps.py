@@ -6,3 +6,6 @@ class ArticlesConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'articles'
     verbose_name = _('articles')
+
+    def ready(self):
+        import articles.signals  # noqa: F401
@@ -0,0 +1,244 @@
+import base64
+import uuid
+from datetime import datetime
+from typing import NamedTuple
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Max, OuterRef, Q, QuerySet, Subquery
+from django.db.models.functions import Greatest
+from django.utils import timezone
+
+from articles.models import Article, ArticleEngagement, ArticleTombstone
+from core.cache import get_project_cache
+
+ARTICLE_CHANGED_AT_NAMESPACE = 'article_changed_at'
+TAG_TREE_NAMESPACE = 'tag_tree'
+
+ARTICLE_PUBLISHED = 'published'
+ARTICLE_UNPUBLISHED = 'unpublished'
+ARTICLE_DELETED = 'deleted'
+
+# поля пользователя, которые выводятся в статьях (автор статьи и комментариев)
+ARTICLE_USER_FIELDS = frozenset(
+    ('first_name', 'last_name', 'role', 'avatar', 'avatar_renditions'),
+)
+
+
+def touch_articles(article_ids):
+    """Сдвигает changed_at статей: у их ответов API меняются ETag и Last-Modified.
+
+    article_ids — список id или подзапрос (values('pk')). Для изменений
+    содержимого статьи; активность читателей отмечает touch_article_engagement.
+    """
+    if isinstance(article_ids, QuerySet):
+        article_ids = list(article_ids.values_list('pk', flat=True))
+    Article.objects.filter(pk__in=article_ids).update(changed_at=timezone.now())
+    forget_articles_changed_at(article_ids)
+
+
+def touch_article_engagement(article_ids):
+    """Сдвигает отметку просмотров, голосов, избранного и комментариев статей.
+
+    Строки статей не обновляются: отметка хранится в узкой таблице
+    ArticleEngagement и учитывается в ETag и Last-Modified через
+    get_article_version.
+    """
+    article_ids = list(article_ids)
+    # голоса удаляемой статьи могут удаляться каскадом уже после неё
+    existing_ids = Article.objects.filter(pk__in=article_ids).values_list(
+        'pk',
+        flat=True,
+    )
+    changed_at = timezone.now()
+    ArticleEngagement.objects.bulk_create(
+        [
+            ArticleEngagement(article_id=article_id, changed_at=changed_at)
+            for article_id in existing_ids
+        ],
+        update_conflicts=True,
+        unique_fields=['article_id'],
+        update_fields=['changed_at'],
+    )
+    forget_articles_changed_at(article_ids)
+
+
+def touch_user_articles(user):
+    """Сдвигает changed_at статей, в которых выводится пользователь."""
+    touch_articles(
+        Article.objects.filter(Q(author=user) | Q(comments__author=user)).values('pk'),
+    )
+
+
+def get_article_version():
+    """Выражение: позднейшая из отметок changed_at статьи и ArticleEngagement.
+
+    GREATEST в PostgreSQL пропускает NULL, поэтому статья без активности
+    получает свой changed_at.
+    """
+    return Greatest(
+        'changed_at',
+        Subquery(
+            ArticleEngagement.objects.filter(article_id=OuterRef('pk')).values(
+                'changed_at',
+            ),
+        ),
+    )
+
+
+def get_engaged_at(articles):
+    """Позднейшая отметка ArticleEngagement статей queryset articles (или None).
+
+    Один агрегат по узкой таблице, без подзапроса на каждую статью.
+    """
+    state = _get_engagements(articles).aggregate(changed_at=Max('changed_at'))
+    return state['changed_at']
+
+
+async def aget_engaged_at(articles):
+    state = await _get_engagements(articles).aaggregate(changed_at=Max('changed_at'))
+    return state['changed_at']
+
+
+def _get_engagements(articles):
+    return ArticleEngagement.objects.filter(
+        article_id__in=articles.order_by().values('pk'),
+    )
+
+
+def get_article_changed_at(article_id):
+    """Версия опубликованной статьи (None — статьи нет) из кеша проекта."""
+    return get_project_cache().get_or_set(
+        ARTICLE_CHANGED_AT_NAMESPACE,
+        article_id,
+        lambda: (
+            Article.objects.filter(pk=article_id, is_published=True)
+            .values_list(get_article_version(), flat=True)
+            .first()
+        ),
+        settings.ARTICLE_CACHE_TIMEOUT,
+    )
+
+
+def forget_articles_changed_at(article_ids):
+    """Удаляет changed_at статей из кеша сразу и после коммита транзакции.
+
+    Повторное удаление после коммита убирает значение, которое параллельный
+    запрос успел прочитать из базы и закешировать до коммита.
+    """
+    article_ids = [str(article_id) for article_id in article_ids]
+    if not article_ids:
+        return
+    project_cache = get_project_cache()
+    project_cache.delete_many(ARTICLE_CHANGED_AT_NAMESPACE, article_ids)
+    transaction.on_commit(
+        lambda: project_cache.delete_many(ARTICLE_CHANGED_AT_NAMESPACE, article_ids),
+    )
+
+
+def forget_tag_tree():
+    """Сбрасывает закешированное дерево тегов сразу и после коммита транзакции."""
+    project_cache = get_project_cache()
+    project_cache.invalidate_namespace(TAG_TREE_NAMESPACE)
+    transaction.on_commit(
+        lambda: project_cache.invalidate_namespace(TAG_TREE_NAMESPACE),
+    )
+
+
+class ArticleChange(NamedTuple):
+    changed_at: datetime
+    article_id: uuid.UUID
+    status: str
+
+
+class ExpiredWatermark(Exception):
+    """Отметки об удалении старше отметки клиента уже удалены."""
+
+
+def encode_watermark(changed_at, article_id) -> str:
+    watermark = f'{changed_at.isoformat()}|{article_id}'
+    return base64.urlsafe_b64encode(watermark.encode()).decode()
+
+
+def decode_watermark(token) -> tuple[datetime, uuid.UUID]:
+    """(changed_at, id) из отметки; ValueError — отметка испорчена."""
+    try:
+        changed_at, article_id = base64.urlsafe_b64decode(token).decode().split('|')
+        changed_at = datetime.fromisoformat(changed_at)
+    except (TypeError, UnicodeDecodeError) as error:
+        raise ValueError(str(error)) from error
+    if timezone.is_naive(changed_at):
+        raise ValueError('Watermark without time zone.')
+    return changed_at, uuid.UUID(article_id)
+
+
+def get_article_changes(since=None, limit=100) -> tuple[list[ArticleChange], bool]:
+    """Изменения статей после отметки since в порядке (changed_at, id) и есть ли ещё.
+
+    changed_at сдвигают только изменения содержимого статьи, а не просмотры,
+    голоса и комментарии (они отмечаются в ArticleEngagement). Черновики, ни
+    разу не опубликованные (без published_at), не выдаются. Статьи,
+    изменённые за последние ARTICLE_CHANGES_SETTLE_TIME, не выдаются:
+    changed_at назначается до коммита, и более поздняя отметка не должна
+    обогнать ещё не закоммиченное изменение. Удалённые статьи выдаются
+    по отметкам ArticleTombstone, которые хранятся ARTICLE_TOMBSTONE_LIFETIME.
+    """
+    now = timezone.now()
+    if since is not None and since[0] < now - settings.ARTICLE_TOMBSTONE_LIFETIME:
+        raise ExpiredWatermark
+    settled_at = now - settings.ARTICLE_CHANGES_SETTLE_TIME
+
+    articles = Article.objects.filter(
+        changed_at__lt=settled_at,
+        published_at__isnull=False,
+    )
+    tombstones = ArticleTombstone.objects.filter(deleted_at__lt=settled_at)
+    if since is not None:
+        since_at, since_id = since
+        articles = articles.filter(
+            Q(changed_at__gt=since_at) | Q(changed_at=since_at, pk__gt=since_id),
+        )
+        tombstones = tombstones.filter(
+            Q(deleted_at__gt=since_at) | Q(deleted_at=since_at, article_id__gt=since_id),
+        )
+    changes = [
+        ArticleChange(
+            changed_at,
+            article_id,
+            ARTICLE_PUBLISHED if is_published else ARTICLE_UNPUBLISHED,
+        )
+        for changed_at, article_id, is_published in articles.order_by(
+            'changed_at',
+            'pk',
+        ).values_list('changed_at', 'pk', 'is_published')[: limit + 1]
+    ]
+    changes += [
+        ArticleChange(deleted_at, article_id, ARTICLE_DELETED)
+        for deleted_at, article_id in tombstones.order_by(
+            'deleted_at',
+            'article_id',
+        ).values_list('deleted_at', 'article_id')[: limit + 1]
+    ]
+    # первые limit изменений объединения есть среди первых limit каждого потока
+    changes.sort(key=lambda change: (change.changed_at, change.article_id))
+    return changes[:limit], len(changes) > limit
+
+
+def record_article_deletion(article_id):
+    ArticleTombstone.objects.update_or_create(
+        article_id=article_id,
+        defaults={'deleted_at': timezone.now()},
+    )
+
+
+def delete_article_engagement(article_id):
+    # отметка могла появиться при каскадном удалении голосов и комментариев
+    ArticleEngagement.objects.filter(article_id=article_id).delete()
+
+
+def delete_expired_article_tombstones() -> int:
+    expired_at = timezone.now() - settings.ARTICLE_TOMBSTONE_LIFETIME
+    deleted_count, _ = ArticleTombstone.objects.filter(
+        deleted_at__lt=expired_at,
+    ).delete()
+    return deleted_count
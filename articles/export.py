@@ -0,0 +1,131 @@
+"""Выгрузка статей, тегов, голосов и просмотров в NDJSON.
+
+Записи читаются серверными курсорами (QuerySet.iterator) пачками по
+chunk_size строк и сразу сериализуются, поэтому память не растёт с объёмом
+данных. Каждая строка — JSON-объект с полем type: tag, article, vote, view.
+Счётчики статей не считаются агрегатами: их дают записи vote и view.
+
+С updated_since выгружаются статьи с changed_at не раньше этого момента,
+голоса и просмотры статей с такими changed_at или отметкой ArticleEngagement
+и теги с updated_at не раньше него.
+"""
+import json
+import zlib
+
+from asgiref.sync import sync_to_async
+from django.contrib.contenttypes.models import ContentType
+from django.contrib.postgres.aggregates import ArrayAgg
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import F, Q
+
+from articles.models import Article, ArticleEngagement, Tag
+from likes.models import Vote
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+EXPORT_CONTENT_TYPE = 'application/x-ndjson'
+# строки копятся в буфере и отдаются частями не меньше этого размера
+EXPORT_BUFFER_SIZE = 64 * 1024
+
+ARTICLE_EXPORT_FIELDS = (
+    'id',
+    'image',
+    'title',
+    'annotation',
+    'text',
+    'source_name',
+    'source_link',
+    'is_published',
+    'author_id',
+    'created_at',
+    'updated_at',
+    'changed_at',
+)
+
+
+def iter_export_records(updated_since=None, chunk_size=2000):
+    """Записи выгрузки: сначала теги, затем статьи, голоса и просмотры."""
+    tags = Tag.objects.values('id', 'name', 'parent_id', 'updated_at')
+    articles = Article.objects.values(*ARTICLE_EXPORT_FIELDS).annotate(
+        tag_ids=ArrayAgg('tags', filter=Q(tags__isnull=False), default=[]),
+    )
+    votes = Vote.objects.filter(
+        content_type=ContentType.objects.get_for_model(Article),
+    ).values('id', 'user_id', 'vote', article_id=F('object_id'))
+    views = Article.viewers.through.objects.values(
+        'article_id',
+        'viewer_id',
+        user_id=F('viewer__user_id'),
+        created_at=F('viewer__created_at'),
+    )
+    if updated_since is not None:
+        changed_ids = Article.objects.filter(changed_at__gte=updated_since).values('pk')
+        engaged_ids = ArticleEngagement.objects.filter(
+            changed_at__gte=updated_since,
+        ).values('article_id')
+        tags = tags.filter(updated_at__gte=updated_since)
+        articles = articles.filter(changed_at__gte=updated_since)
+        # повторный просмотр не создаёт Viewer, но сдвигает ArticleEngagement
+        votes = votes.filter(
+            Q(object_id__in=changed_ids) | Q(object_id__in=engaged_ids),
+        )
+        views = views.filter(
+            Q(article_id__in=changed_ids) | Q(article_id__in=engaged_ids),
+        )
+
+    for record_type, queryset in (
+        ('tag', tags),
+        ('article', articles),
+        ('vote', votes),
+        ('view', views),
+    ):
+        # без сортировки: порядок записей в выгрузке не важен
+        for record in queryset.order_by().iterator(chunk_size=chunk_size):
+            yield {'type': record_type, **record}
+
+
+def iter_ndjson(records, buffer_size=EXPORT_BUFFER_SIZE):
+    """Записи в строках NDJSON, частями не меньше buffer_size байт."""
+    buffer = bytearray()
+    for record in records:
+        buffer += dumps(record)
+        buffer += b'\n'
+        if len(buffer) >= buffer_size:
+            yield bytes(buffer)
+            buffer.clear()
+    if buffer:
+        yield bytes(buffer)
+
+
+def iter_gzip(chunks):
+    """Сжимает части потока в формат gzip по мере их поступления."""
+    compressor = zlib.compressobj(wbits=zlib.MAX_WBITS | 16)
+    for chunk in chunks:
+        compressed = compressor.compress(chunk)
+        if compressed:
+            yield compressed
+    yield compressor.flush()
+
+
+async def aiter_chunks(chunks):
+    """Асинхронный поток частей для ASGI.
+
+    Синхронный поток ASGI-обработчик Django собрал бы в память целиком;
+    здесь части читаются по одной в потоке, где выполняются запросы к базе.
+    """
+    chunks = iter(chunks)
+    get_next_chunk = sync_to_async(next, thread_sensitive=True)
+    while True:
+        chunk = await get_next_chunk(chunks, None)
+        if chunk is None:
+            return
+        yield chunk
+
+
+def dumps(record) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(record, option=orjson.OPT_UTC_Z)
+    return json.dumps(record, cls=DjangoJSONEncoder, ensure_ascii=False).encode()
@@ -0,0 +1,545 @@
+"""Массовый импорт статей из NDJSON и CSV (команда import_articles).
+
+Строки файла читаются пачками. Каждая пачка загружается через COPY во
+временные таблицы и переносится в статьи и их теги несколькими запросами
+над всей пачкой (INSERT ... ON CONFLICT), а не запросом на статью.
+Повторный импорт тех же строк не создаёт дублей и не меняет статьи, данные
+которых не изменились, поэтому прерванный импорт можно повторить или
+продолжить после последней импортированной строки.
+
+Поля строки: id (UUID или идентификатор из старого архива, из которого
+получается UUID), title, annotation, text, source_name, source_link,
+is_published, created_at, author (email) или author_id, tags (пути тегов
+вида «Терапия/Кардиология»; в CSV — через «;») или tag_ids (id существующих
+тегов, как в выгрузке export_articles) и image (путь к файлу относительно
+каталога изображений или имя файла в хранилище, как в выгрузке). Теги
+статьи заменяются тегами строки, недостающие теги по путям создаются;
+строка без полей tags и tag_ids теги статьи не меняет.
+
+Файлы изображений сохраняются в хранилище пулом потоков параллельно с
+загрузкой пачки в базу; search_vector пересчитывается одним запросом для
+статей пачки, у которых изменились теги (для остальных его считает
+триггер при вставке).
+"""
+import csv
+import io
+import json
+import os
+import uuid
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from typing import NamedTuple
+
+from django.contrib.auth import get_user_model
+from django.core.exceptions import SuspiciousFileOperation
+from django.core.files import File
+from django.db import connection, transaction
+from django.db.models import Q
+from django.db.models.functions import Lower
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from articles.changes import forget_articles_changed_at
+from articles.models import Article, Tag
+from articles.signals import schedule_related_update
+from articles.tasks import create_article_image_renditions_task
+from users.services import forget_user_stats
+
+User = get_user_model()
+
+IMPORT_FORMATS = ('ndjson', 'csv')
+TAG_PATH_SEPARATOR = '/'
+CSV_TAGS_SEPARATOR = ';'
+# из идентификаторов старого архива, не являющихся UUID, получаются uuid5
+IMPORT_ID_NAMESPACE = uuid.UUID('3f1c8a52-7d5e-4f0b-9a36-2c1d8e6b4a17')
+
+# колонки временной таблицы в порядке COPY
+STAGE_COLUMNS = (
+    'id',
+    'title',
+    'annotation',
+    'text',
+    'source_name',
+    'source_link',
+    'is_published',
+    'created_at',
+    'author_id',
+    'replace_tags',
+)
+REQUIRED_FIELDS = ('title', 'annotation', 'text')
+MAX_LENGTHS = {
+    field: Article._meta.get_field(field).max_length
+    for field in ('title', 'annotation', 'source_name', 'source_link')
+}
+TAG_NAME_MAX_LENGTH = Tag._meta.get_field('name').max_length
+TRUE_VALUES = frozenset(('1', 'true', 't', 'yes', 'y'))
+
+CREATE_STAGE_SQL = """
+    CREATE TEMPORARY TABLE import_article (
+        id uuid PRIMARY KEY,
+        title text NOT NULL,
+        annotation text NOT NULL,
+        text text NOT NULL,
+        source_name text,
+        source_link text,
+        is_published boolean NOT NULL,
+        created_at timestamptz,
+        author_id uuid NOT NULL,
+        replace_tags boolean NOT NULL
+    );
+    CREATE TEMPORARY TABLE import_article_tag (
+        article_id uuid NOT NULL,
+        tag_id uuid NOT NULL
+    );
+"""
+# удаляются явно: транзакция пачки может быть вложенной (savepoint)
+DROP_STAGE_SQL = 'DROP TABLE import_article, import_article_tag'
+
+# статьи с теми же данными не обновляются: их changed_at и search_vector
+# не меняются при повторном импорте
+UPSERT_ARTICLES_SQL = """
+    INSERT INTO articles_article AS a (
+        id, title, annotation, text, source_name, source_link, is_published,
+        author_id, image, image_renditions, created_at, updated_at, changed_at,
+        published_at
+    )
+    SELECT
+        s.id, s.title, s.annotation, s.text, s.source_name, s.source_link,
+        s.is_published, s.author_id, '', '{}'::jsonb,
+        coalesce(s.created_at, now()), now(), now(),
+        CASE WHEN s.is_published THEN now() END
+    FROM import_article AS s
+    ON CONFLICT (id) DO UPDATE SET
+        title = EXCLUDED.title,
+        annotation = EXCLUDED.annotation,
+        text = EXCLUDED.text,
+        source_name = EXCLUDED.source_name,
+        source_link = EXCLUDED.source_link,
+        is_published = EXCLUDED.is_published,
+        author_id = EXCLUDED.author_id,
+        updated_at = now(),
+        changed_at = now(),
+        published_at = coalesce(a.published_at, EXCLUDED.published_at)
+    WHERE (
+        a.title, a.annotation, a.text, a.source_name, a.source_link,
+        a.is_published, a.author_id
+    ) IS DISTINCT FROM (
+        EXCLUDED.title, EXCLUDED.annotation, EXCLUDED.text, EXCLUDED.source_name,
+        EXCLUDED.source_link, EXCLUDED.is_published, EXCLUDED.author_id
+    )
+    RETURNING a.id, a.xmax = 0
+"""
+
+DELETE_TAGS_SQL = """
+    DELETE FROM articles_article_tags AS at
+    USING import_article AS s
+    WHERE at.article_id = s.id
+    AND s.replace_tags
+    AND NOT EXISTS (
+        SELECT 1
+        FROM import_article_tag AS st
+        WHERE st.article_id = at.article_id AND st.tag_id = at.tag_id
+    )
+    RETURNING at.article_id
+"""
+
+INSERT_TAGS_SQL = """
+    INSERT INTO articles_article_tags (article_id, tag_id)
+    SELECT article_id, tag_id
+    FROM import_article_tag
+    ON CONFLICT (article_id, tag_id) DO NOTHING
+    RETURNING article_id
+"""
+
+UPDATE_IMAGES_SQL = """
+    UPDATE articles_article AS a
+    SET image = i.image, image_renditions = '{}'::jsonb, changed_at = now()
+    FROM unnest(%s::uuid[], %s::text[]) AS i (id, image)
+    WHERE a.id = i.id AND a.image IS DISTINCT FROM i.image
+    RETURNING a.id
+"""
+
+
+class ImportRowError(ValueError):
+    """Строка файла импорта не может быть импортирована."""
+
+
+class ImportBatch(NamedTuple):
+    """Итог пачки: счётчики, номер последней строки и ошибки по строкам."""
+
+    stats: Counter
+    last_line: int
+    errors: list
+
+
+def get_import_format(path: str) -> str:
+    return 'csv' if path.lower().endswith('.csv') else 'ndjson'
+
+
+def read_rows(input_file, file_format):
+    """Строки файла импорта: (номер строки, словарь полей)."""
+    if file_format == 'csv':
+        reader = csv.DictReader(input_file)
+        for row in reader:
+            # без колонки тегов теги статей не меняются
+            for field in ('tags', 'tag_ids'):
+                if field in row:
+                    row[field] = [
+                        value
+                        for value in (row[field] or '').split(CSV_TAGS_SEPARATOR)
+                        if value
+                    ]
+            yield reader.line_num, row
+        return
+
+    for line_number, line in enumerate(input_file, start=1):
+        if not line.strip():
+            continue
+        try:
+            row = json.loads(line)
+        except ValueError:
+            row = None
+        if isinstance(row, dict) and row.get('type', 'article') != 'article':
+            # остальные записи выгрузки export_articles (теги, голоса, просмотры)
+            continue
+        yield line_number, row
+
+
+def get_article_id(raw_id) -> uuid.UUID:
+    """UUID статьи; идентификатор старого архива превращается в uuid5."""
+    raw_id = str(raw_id).strip()
+    if not raw_id:
+        raise ImportRowError('id is required.')
+    try:
+        return uuid.UUID(raw_id)
+    except ValueError:
+        return uuid.uuid5(IMPORT_ID_NAMESPACE, raw_id)
+
+
+def parse_row(row) -> dict:
+    """Проверяет строку импорта и приводит её поля к типам колонок статьи."""
+    if not isinstance(row, dict):
+        raise ImportRowError('Invalid JSON object.')
+    article = {'id': get_article_id(row.get('id') or '')}
+    for field in REQUIRED_FIELDS:
+        article[field] = str(row.get(field) or '').strip()
+        if not article[field]:
+            raise ImportRowError(f'{field} is required.')
+    for field in ('source_name', 'source_link'):
+        article[field] = str(row.get(field) or '').strip() or None
+    for field, max_length in MAX_LENGTHS.items():
+        if article[field] and len(article[field]) > max_length:
+            raise ImportRowError(f'{field} is longer than {max_length} characters.')
+
+    is_published = row.get('is_published', False)
+    if isinstance(is_published, str):
+        is_published = is_published.strip().lower() in TRUE_VALUES
+    article['is_published'] = bool(is_published)
+
+    created_at = row.get('created_at') or None
+    if created_at is not None:
+        created_at = parse_datetime(str(created_at))
+        if created_at is None:
+            raise ImportRowError('Invalid created_at.')
+        if timezone.is_naive(created_at):
+            created_at = timezone.make_aware(created_at)
+    article['created_at'] = created_at
+
+    # email или id автора
+    article['author'] = str(row.get('author') or row.get('author_id') or '')
+    article['author'] = article['author'].strip().lower()
+    if not article['author']:
+        raise ImportRowError('author is required.')
+
+    article['replace_tags'] = 'tags' in row or 'tag_ids' in row
+    article['tag_ids'] = []
+    for tag_id in _as_list(row.get('tag_ids')):
+        try:
+            article['tag_ids'].append(uuid.UUID(str(tag_id)))
+        except ValueError:
+            raise ImportRowError(f'Invalid tag id {tag_id!r}.')
+    article['tags'] = []
+    for path in _as_list(row.get('tags')):
+        names = tuple(
+            name.strip() for name in str(path).split(TAG_PATH_SEPARATOR) if name.strip()
+        )
+        if any(len(name) > TAG_NAME_MAX_LENGTH for name in names):
+            raise ImportRowError(f'Tag name in {path!r} is too long.')
+        if names:
+            article['tags'].append(names)
+    article['image'] = str(row.get('image') or '').strip() or None
+    return article
+
+
+def _as_list(value) -> list:
+    if not value:
+        return []
+    if isinstance(value, str):
+        return [value]
+    return list(value)
+
+
+def _copy_value(value) -> str:
+    """Значение в текстовом формате COPY."""
+    if value is None:
+        return '\\N'
+    if isinstance(value, bool):
+        return 't' if value else 'f'
+    if not isinstance(value, str):
+        value = value.isoformat() if hasattr(value, 'isoformat') else str(value)
+    return (
+        value.replace('\\', '\\\\')
+        .replace('\t', '\\t')
+        .replace('\n', '\\n')
+        .replace('\r', '\\r')
+    )
+
+
+def copy_rows(cursor, table, columns, rows):
+    """Загружает строки во временную таблицу одной командой COPY."""
+    buffer = io.StringIO()
+    for row in rows:
+        buffer.write('\t'.join(_copy_value(value) for value in row))
+        buffer.write('\n')
+    buffer.seek(0)
+    cursor.copy_expert(
+        f'COPY {table} ({", ".join(columns)}) FROM STDIN',
+        buffer,
+    )
+
+
+def save_image(path) -> str:
+    """Сохраняет файл изображения в хранилище поля Article.image, возвращает имя."""
+    field = Article._meta.get_field('image')
+    name = field.generate_filename(None, os.path.basename(path))
+    with open(path, 'rb') as image_file:
+        return field.storage.save(name, File(image_file), max_length=field.max_length)
+
+
+def resolve_image(images_dir, image) -> str:
+    """Имя изображения в хранилище: файл из images_dir сохраняется в хранилище.
+
+    Имя из выгрузки export_articles, которого нет в images_dir, берётся
+    из хранилища как есть.
+    """
+    path = os.path.join(images_dir, image)
+    if os.path.isfile(path):
+        return save_image(path)
+    storage = Article._meta.get_field('image').storage
+    try:
+        if storage.exists(image):
+            return image
+    except SuspiciousFileOperation:
+        pass
+    raise FileNotFoundError(f'No such file: {path!r}')
+
+
+class ArticleImporter:
+    """Импортирует статьи пачками; изображения сохраняет пул из workers потоков."""
+
+    def __init__(self, images_dir, workers=4):
+        self.images_dir = images_dir
+        self.workers = workers
+        self._tag_ids = {}
+        self._author_ids = {}
+
+    def run(self, rows, batch_size, start_after=0):
+        """Генератор итогов пачек (ImportBatch); строки до start_after пропускаются."""
+        with ThreadPoolExecutor(max_workers=self.workers) as image_pool:
+            batch = []
+            for line_number, row in rows:
+                if line_number <= start_after:
+                    continue
+                batch.append((line_number, row))
+                if len(batch) >= batch_size:
+                    yield self.import_batch(batch, image_pool)
+                    batch = []
+            if batch:
+                yield self.import_batch(batch, image_pool)
+
+    def import_batch(self, batch, image_pool) -> ImportBatch:
+        stats = Counter()
+        errors = []
+        articles = {}
+        for line_number, row in batch:
+            try:
+                article = parse_row(row)
+            except ImportRowError as error:
+                errors.append((line_number, str(error)))
+                stats['invalid'] += 1
+                continue
+            article['line'] = line_number
+            # повтор id в пачке: остаётся последняя строка
+            articles[article['id']] = article
+
+        self._resolve_authors(articles.values())
+        for article in list(articles.values()):
+            if article['author_id'] is None:
+                errors.append((article['line'], f'Unknown author {article["author"]}.'))
+                stats['unknown_author'] += 1
+                del articles[article['id']]
+
+        self._check_tag_ids(articles, errors, stats)
+        # теги создаются вне транзакции пачки, чтобы их id в self._tag_ids
+        # не пропали при её откате
+        tag_links = set()
+        for article_id, article in list(articles.items()):
+            try:
+                tag_links.update(
+                    (article_id, self._get_tag_id(path)) for path in article['tags']
+                )
+            except ImportRowError as error:
+                errors.append((article['line'], str(error)))
+                stats['invalid'] += 1
+                del articles[article_id]
+
+        # файлы сохраняются, пока пачка загружается в базу
+        image_futures = {
+            article_id: image_pool.submit(
+                resolve_image,
+                self.images_dir,
+                article['image'],
+            )
+            for article_id, article in articles.items()
+            if article['image']
+        }
+        tag_links.update(
+            (article_id, tag_id)
+            for article_id, article in articles.items()
+            for tag_id in article['tag_ids']
+        )
+        with transaction.atomic():
+            previous_authors = set(
+                Article.objects.filter(pk__in=articles).values_list(
+                    'author_id',
+                    flat=True,
+                ),
+            )
+            with connection.cursor() as cursor:
+                cursor.execute(CREATE_STAGE_SQL)
+                copy_rows(
+                    cursor,
+                    'import_article',
+                    STAGE_COLUMNS,
+                    (
+                        [article[column] for column in STAGE_COLUMNS]
+                        for article in articles.values()
+                    ),
+                )
+                copy_rows(
+                    cursor,
+                    'import_article_tag',
+                    ('article_id', 'tag_id'),
+                    tag_links,
+                )
+                cursor.execute(UPSERT_ARTICLES_SQL)
+                upserted = dict(cursor.fetchall())
+                cursor.execute(DELETE_TAGS_SQL)
+                retagged_ids = {row[0] for row in cursor.fetchall()}
+                cursor.execute(INSERT_TAGS_SQL)
+                retagged_ids.update(row[0] for row in cursor.fetchall())
+                cursor.execute(DROP_STAGE_SQL)
+
+            # триггер пересчитывает search_vector по тегам, уже записанным в базу
+            Article.objects.filter(pk__in=retagged_ids).update(
+                search_vector=None,
+                changed_at=timezone.now(),
+            )
+            imaged_ids = self._attach_images(image_futures, articles, errors, stats)
+
+            stats['inserted'] = sum(upserted.values())
+            stats['updated'] = len(upserted) - stats['inserted']
+            stats['unchanged'] = len(articles) - len(upserted)
+            stats['retagged'] = len(retagged_ids)
+            forget_articles_changed_at(upserted.keys() | retagged_ids | imaged_ids)
+            # изображение не входит в признаки похожих статей
+            schedule_related_update(upserted.keys() | retagged_ids)
+            authors = {article['author_id'] for article in articles.values()}
+            for author_id in previous_authors | authors:
+                forget_user_stats(author_id)
+        return ImportBatch(stats, batch[-1][0], errors)
+
+    def _resolve_authors(self, articles):
+        """Заполняет author_id по email или id авторов одним запросом на пачку."""
+        unknown = {article['author'] for article in articles} - self._author_ids.keys()
+        if unknown:
+            author_ids = []
+            for author in unknown:
+                try:
+                    author_ids.append(uuid.UUID(author))
+                except ValueError:
+                    continue
+            users = User.objects.annotate(email_lower=Lower('email')).filter(
+                Q(email_lower__in=unknown) | Q(pk__in=author_ids),
+            )
+            for pk, email in users.values_list('pk', 'email_lower'):
+                self._author_ids[email] = pk
+                self._author_ids[str(pk)] = pk
+        for article in articles:
+            article['author_id'] = self._author_ids.get(article['author'])
+
+    def _check_tag_ids(self, articles, errors, stats):
+        """Убирает из пачки строки с id несуществующих тегов."""
+        tag_ids = {
+            tag_id for article in articles.values() for tag_id in article['tag_ids']
+        }
+        if not tag_ids:
+            return
+        existing = set(Tag.objects.filter(pk__in=tag_ids).values_list('pk', flat=True))
+        for article in list(articles.values()):
+            unknown = [tag_id for tag_id in article['tag_ids'] if tag_id not in existing]
+            if unknown:
+                errors.append(
+                    (
+                        article['line'],
+                        f'Unknown tag ids {", ".join(map(str, unknown))}.',
+                    ),
+                )
+                stats['unknown_tags'] += 1
+                del articles[article['id']]
+
+    def _get_tag_id(self, path):
+        """Id последнего тега пути; недостающие теги пути создаются.
+
+        Имена тегов уникальны, поэтому тег из одного имени ищется только
+        по имени; существующий тег пути с другим родителем — ошибка строки.
+        """
+        if path not in self._tag_ids:
+            parent_id = self._get_tag_id(path[:-1]) if len(path) > 1 else None
+            tag = Tag.objects.filter(name=path[-1]).first()
+            if tag is None:
+                tag = Tag.objects.create(name=path[-1], parent_id=parent_id)
+            elif len(path) > 1 and tag.parent_id != parent_id:
+                raise ImportRowError(
+                    f'Tag {path[-1]!r} exists outside of '
+                    f'{TAG_PATH_SEPARATOR.join(path[:-1])!r}.',
+                )
+            self._tag_ids[path] = tag.pk
+        return self._tag_ids[path]
+
+    def _attach_images(self, image_futures, articles, errors, stats) -> set:
+        """Записывает сохранённые изображения в статьи пачки.
+
+        Для статей со сменившимся изображением после коммита ставится в
+        очередь создание вариантов. Возвращает id этих статей.
+        """
+        images = {}
+        for article_id, future in image_futures.items():
+            try:
+                images[article_id] = future.result()
+            except OSError as error:
+                errors.append((articles[article_id]['line'], f'Image: {error}'))
+                stats['missing_images'] += 1
+        if not images:
+            return set()
+        with connection.cursor() as cursor:
+            cursor.execute(UPDATE_IMAGES_SQL, [list(images), list(images.values())])
+            imaged_ids = {row[0] for row in cursor.fetchall()}
+        stats['images'] = len(imaged_ids)
+        for article_id in imaged_ids:
+            transaction.on_commit(
+                lambda article_id=article_id: (
+                    create_article_image_renditions_task.delay(str(article_id))
+                ),
+            )
+        return imaged_ids
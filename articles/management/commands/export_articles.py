@@ -0,0 +1,72 @@
+import time
+from collections import Counter
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from articles.export import iter_export_records, iter_gzip, iter_ndjson
+
+
+class Command(BaseCommand):
+    help = 'Выгружает статьи, теги, голоса и просмотры в файл NDJSON.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--output',
+            required=True,
+            help='Путь к файлу выгрузки.',
+        )
+        parser.add_argument(
+            '--updated-since',
+            default=None,
+            help='Выгрузить только изменённое начиная с этого момента (ISO 8601).',
+        )
+        parser.add_argument(
+            '--gzip',
+            action='store_true',
+            help='Сжать выгрузку gzip.',
+        )
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=settings.ARTICLE_EXPORT_CHUNK_SIZE,
+            help='Количество строк в одной выборке из базы.',
+        )
+
+    def handle(self, *args, **options):
+        updated_since = None
+        if options['updated_since']:
+            updated_since = parse_datetime(options['updated_since'])
+            if updated_since is None:
+                raise CommandError('Invalid --updated-since datetime.')
+            if timezone.is_naive(updated_since):
+                updated_since = timezone.make_aware(updated_since)
+
+        counts = Counter()
+
+        def count_records(records):
+            for record in records:
+                counts[record['type']] += 1
+                yield record
+
+        chunks = iter_ndjson(
+            count_records(
+                iter_export_records(updated_since, chunk_size=options['chunk_size']),
+            ),
+        )
+        if options['gzip']:
+            chunks = iter_gzip(chunks)
+        self.stdout.write('Articles export commenced...')
+        started_at = time.monotonic()
+        with open(options['output'], 'wb') as output:
+            for chunk in chunks:
+                output.write(chunk)
+        elapsed = time.monotonic() - started_at
+        exported = ', '.join(
+            f'{record_type}: {count}' for record_type, count in sorted(counts.items())
+        )
+        self.stdout.write(
+            f'Successfully exported articles in {elapsed:.1f}s ({exported or "empty"})',
+        )
@@ -0,0 +1,83 @@
+import os
+import time
+from collections import Counter
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from articles.imports import (
+    IMPORT_FORMATS,
+    ArticleImporter,
+    get_import_format,
+    read_rows,
+)
+
+
+class Command(BaseCommand):
+    help = (
+        'Импортирует статьи из файла NDJSON или CSV пачками через COPY '
+        '(можно повторить или продолжить с места).'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='Путь к файлу импорта.')
+        parser.add_argument(
+            '--format',
+            choices=IMPORT_FORMATS,
+            default=None,
+            help='Формат файла (по умолчанию по расширению: .csv или NDJSON).',
+        )
+        parser.add_argument(
+            '--images-dir',
+            default=None,
+            help='Каталог файлов изображений (по умолчанию каталог файла импорта).',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=settings.ARTICLE_IMPORT_BATCH_SIZE,
+            help='Количество строк в одной транзакции.',
+        )
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=settings.ARTICLE_IMPORT_WORKERS,
+            help='Количество потоков сохранения изображений.',
+        )
+        parser.add_argument(
+            '--start-after',
+            type=int,
+            default=0,
+            help='Продолжить после строки файла с указанным номером.',
+        )
+
+    def handle(self, *args, **options):
+        path = options['path']
+        file_format = options['format'] or get_import_format(path)
+        images_dir = options['images_dir'] or os.path.dirname(os.path.abspath(path))
+        importer = ArticleImporter(images_dir, workers=options['workers'])
+        totals = Counter()
+        self.stdout.write('Articles import commenced...')
+        started_at = time.monotonic()
+        with open(path, encoding='utf-8', newline='') as input_file:
+            for batch in importer.run(
+                read_rows(input_file, file_format),
+                options['batch_size'],
+                start_after=options['start_after'],
+            ):
+                for line_number, error in batch.errors:
+                    self.stderr.write(f'Line {line_number}: {error}')
+                totals.update(batch.stats)
+                processed = sum(
+                    totals[key] for key in ('inserted', 'updated', 'unchanged')
+                )
+                elapsed = max(time.monotonic() - started_at, 0.001)
+                self.stdout.write(
+                    f'Imported {processed} ({processed / elapsed:.0f} articles/s, '
+                    f'last line: {batch.last_line})',
+                )
+        elapsed = time.monotonic() - started_at
+        summary = ', '.join(f'{key}: {count}' for key, count in sorted(totals.items()))
+        self.stdout.write(
+            f'Successfully imported articles in {elapsed:.1f}s ({summary or "empty"})',
+        )
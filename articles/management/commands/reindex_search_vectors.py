@@ -0,0 +1,48 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from articles.search import install_search_function, reindex_search_vectors
+
+
+class Command(BaseCommand):
+    help = 'Пересчитывает search_vector статей пачками (можно продолжить с места).'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=settings.SEARCH_REINDEX_BATCH_SIZE,
+            help='Количество статей в одной транзакции.',
+        )
+        parser.add_argument(
+            '--start-after',
+            default=None,
+            help='Продолжить после статьи с указанным id.',
+        )
+        parser.add_argument(
+            '--pause',
+            type=float,
+            default=0.0,
+            help='Пауза между пачками, секунды.',
+        )
+        parser.add_argument(
+            '--skip-function',
+            action='store_true',
+            help='Не пересоздавать функцию триггера по текущим настройкам.',
+        )
+
+    def handle(self, *args, **options):
+        if not options['skip_function']:
+            install_search_function()
+        self.stdout.write('Search vectors reindex commenced...')
+        total_reindexed = 0
+        for batch_count, last_id in reindex_search_vectors(
+            options['batch_size'],
+            start_after=options['start_after'],
+            pause=options['pause'],
+        ):
+            total_reindexed += batch_count
+            self.stdout.write(f'Reindexed {total_reindexed} (last id: {last_id})')
+        self.stdout.write(
+            f'Successfully reindexed search vectors (total: {total_reindexed})',
+        )
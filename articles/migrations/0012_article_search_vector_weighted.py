@@ -0,0 +1,103 @@
+import re
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.db import migrations
+
+# замороженная копия articles.search на момент миграции: миграция не должна
+# зависеть от текущих моделей и кода поиска
+SEARCH_FUNCTION_SQL = """
+    CREATE OR REPLACE FUNCTION update_article_search_vector()
+    RETURNS TRIGGER
+    LANGUAGE plpgsql AS $$
+    DECLARE
+        tag_names text;
+    BEGIN
+    SELECT string_agg(t.name, ' ')
+    INTO tag_names
+    FROM articles_tag AS t
+    JOIN articles_article_tags AS at ON at.tag_id = t.id
+    WHERE at.article_id = NEW.id;
+    NEW.search_vector := {vector};
+    RETURN NEW;
+    END;
+    $$;
+"""
+SEARCH_SOURCES = {
+    'title': 'NEW.title',
+    'annotation': 'NEW.annotation',
+    'text': 'NEW.text',
+    'tags': 'tag_names',
+}
+
+
+def build_vector_sql():
+    configs = [settings.SEARCH_CONFIG]
+    fallback = settings.SEARCH_FALLBACK_CONFIG
+    if fallback and fallback != settings.SEARCH_CONFIG:
+        configs.append(fallback)
+    for config in configs:
+        if not re.match(r'^[a-z_]+$', config):
+            raise ImproperlyConfigured(f'Invalid text search config name: {config!r}.')
+    weights = settings.SEARCH_WEIGHTS
+    for source, weight in weights.items():
+        if weight not in {'A', 'B', 'C', 'D'}:
+            raise ImproperlyConfigured(f'Invalid search weight {weight!r}.')
+    return ' || '.join(
+        f"setweight(to_tsvector('{config}'::regconfig, "
+        f"coalesce({SEARCH_SOURCES[source]}, '')), '{weight}')"
+        for config in configs
+        for source, weight in weights.items()
+    )
+
+
+def create_search_function(apps, schema_editor):
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute(SEARCH_FUNCTION_SQL.format(vector=build_vector_sql()))
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ('articles', '0011_article_search_vector_and_more'),
+    ]
+
+    operations = [
+        migrations.RunSQL(
+            sql='DROP TRIGGER IF EXISTS article_update_trigger ON articles_article;',
+            reverse_sql="""
+                CREATE TRIGGER article_update_trigger
+                BEFORE INSERT OR UPDATE OF title, text, search_vector
+                ON articles_article
+                FOR EACH ROW
+                EXECUTE PROCEDURE update_article_search_vector();
+                """,
+        ),
+        migrations.RunPython(
+            create_search_function,
+            reverse_code=migrations.RunPython.noop,
+        ),
+        migrations.RunSQL(
+            sql="""
+                CREATE TRIGGER article_update_trigger
+                BEFORE INSERT OR UPDATE OF title, annotation, text, search_vector
+                ON articles_article
+                FOR EACH ROW
+                EXECUTE PROCEDURE update_article_search_vector();
+                """,
+            reverse_sql="""
+                DROP TRIGGER IF EXISTS article_update_trigger ON articles_article;
+
+                CREATE OR REPLACE FUNCTION update_article_search_vector()
+                RETURNS TRIGGER
+                LANGUAGE plpgsql AS $$
+                BEGIN
+                SELECT
+                setweight(to_tsvector(coalesce(NEW.title, '')), 'A') ||
+                setweight(to_tsvector(coalesce(NEW.text, '')), 'B')
+                INTO NEW.search_vector;
+                RETURN NEW;
+                END;
+                $$;
+                """,
+        ),
+    ]
@@ -0,0 +1,29 @@
+import django.contrib.postgres.indexes
+from django.contrib.postgres.operations import TrigramExtension
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ('articles', '0012_article_search_vector_weighted'),
+    ]
+
+    operations = [
+        TrigramExtension(),
+        migrations.AddIndex(
+            model_name='article',
+            index=django.contrib.postgres.indexes.GinIndex(
+                fields=['title'],
+                name='article_title_trgm_idx',
+                opclasses=['gin_trgm_ops'],
+            ),
+        ),
+        migrations.AddIndex(
+            model_name='tag',
+            index=django.contrib.postgres.indexes.GinIndex(
+                fields=['name'],
+                name='tag_name_trgm_idx',
+                opclasses=['gin_trgm_ops'],
+            ),
+        ),
+    ]
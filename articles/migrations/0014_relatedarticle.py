@@ -0,0 +1,58 @@
+# Generated by Django 4.2 on 2026-10-19 16:20
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ('articles', '0013_trigram_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RelatedArticle',
+            fields=[
+                (
+                    'id',
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name='ID',
+                    ),
+                ),
+                ('score', models.FloatField(verbose_name='score')),
+                (
+                    'article',
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name='related_articles',
+                        to='articles.article',
+                        verbose_name='article',
+                    ),
+                ),
+                (
+                    'related',
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name='+',
+                        to='articles.article',
+                        verbose_name='related article',
+                    ),
+                ),
+            ],
+            options={
+                'verbose_name': 'related article',
+                'verbose_name_plural': 'related articles',
+                'ordering': ['-score'],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='relatedarticle',
+            constraint=models.UniqueConstraint(
+                fields=('article', 'related'),
+                name='articles_relatedarticle_unique_related',
+            ),
+        ),
+    ]
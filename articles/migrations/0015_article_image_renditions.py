@@ -0,0 +1,19 @@
+# Generated by Django 4.2 on 2026-10-19 16:24
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ('articles', '0014_relatedarticle'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='article',
+            name='image_renditions',
+            field=models.JSONField(
+                blank=True, default=dict, editable=False, verbose_name='image renditions'
+            ),
+        ),
+    ]
@@ -0,0 +1,134 @@
+# Generated by Django 4.2 on 2026-10-19 16:38
+
+from django.conf import settings
+import django.core.serializers.json
+from django.db import migrations, models
+import django.db.models.deletion
+import uuid
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('articles', '0015_article_image_renditions'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='UploadSession',
+            fields=[
+                (
+                    'created_at',
+                    models.DateTimeField(auto_now_add=True, verbose_name='created_at'),
+                ),
+                (
+                    'updated_at',
+                    models.DateTimeField(auto_now=True, verbose_name='updated_at'),
+                ),
+                (
+                    'id',
+                    models.UUIDField(
+                        default=uuid.uuid4,
+                        editable=False,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name='id',
+                    ),
+                ),
+                ('size', models.PositiveIntegerField(verbose_name='size')),
+                (
+                    'offset',
+                    models.PositiveIntegerField(default=0, verbose_name='offset'),
+                ),
+                (
+                    'token',
+                    models.CharField(
+                        blank=True,
+                        editable=False,
+                        max_length=64,
+                        null=True,
+                        unique=True,
+                        verbose_name='token',
+                    ),
+                ),
+                (
+                    'name',
+                    models.CharField(
+                        blank=True, editable=False, max_length=100, verbose_name='name'
+                    ),
+                ),
+                (
+                    'user',
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name='upload_sessions',
+                        to=settings.AUTH_USER_MODEL,
+                        verbose_name='user',
+                    ),
+                ),
+            ],
+            options={
+                'verbose_name': 'upload session',
+                'verbose_name_plural': 'upload sessions',
+                'ordering': ['-created_at'],
+            },
+        ),
+        migrations.CreateModel(
+            name='IdempotencyKey',
+            fields=[
+                (
+                    'created_at',
+                    models.DateTimeField(auto_now_add=True, verbose_name='created_at'),
+                ),
+                (
+                    'updated_at',
+                    models.DateTimeField(auto_now=True, verbose_name='updated_at'),
+                ),
+                (
+                    'id',
+                    models.UUIDField(
+                        default=uuid.uuid4,
+                        editable=False,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name='id',
+                    ),
+                ),
+                ('key', models.CharField(max_length=255, verbose_name='key')),
+                (
+                    'request_hash',
+                    models.CharField(max_length=64, verbose_name='request hash'),
+                ),
+                (
+                    'status_code',
+                    models.PositiveSmallIntegerField(verbose_name='status code'),
+                ),
+                (
+                    'response',
+                    models.JSONField(
+                        encoder=django.core.serializers.json.DjangoJSONEncoder,
+                        verbose_name='response',
+                    ),
+                ),
+                (
+                    'user',
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name='idempotency_keys',
+                        to=settings.AUTH_USER_MODEL,
+                        verbose_name='user',
+                    ),
+                ),
+            ],
+            options={
+                'verbose_name': 'idempotency key',
+                'verbose_name_plural': 'idempotency keys',
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='idempotencykey',
+            constraint=models.UniqueConstraint(
+                fields=('user', 'key'), name='articles_idempotencykey_unique_user_key'
+            ),
+        ),
+    ]
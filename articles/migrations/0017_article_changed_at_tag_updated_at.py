@@ -0,0 +1,34 @@
+# Generated by Django 4.2 on 2026-10-19 18:05
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ('articles', '0016_uploadsession_idempotencykey'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='article',
+            name='changed_at',
+            field=models.DateTimeField(
+                auto_now=True,
+                db_index=True,
+                default=django.utils.timezone.now,
+                verbose_name='changed at',
+            ),
+            preserve_default=False,
+        ),
+        migrations.AddField(
+            model_name='tag',
+            name='updated_at',
+            field=models.DateTimeField(
+                auto_now=True,
+                default=django.utils.timezone.now,
+                verbose_name='updated_at',
+            ),
+            preserve_default=False,
+        ),
+    ]
@@ -0,0 +1,35 @@
+# Generated by Django 4.2 on 2026-10-19 17:59
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ('articles', '0017_article_changed_at_tag_updated_at'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ArticleTombstone',
+            fields=[
+                (
+                    'id',
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name='ID',
+                    ),
+                ),
+                ('article_id', models.UUIDField(unique=True, verbose_name='article id')),
+                (
+                    'deleted_at',
+                    models.DateTimeField(db_index=True, verbose_name='deleted at'),
+                ),
+            ],
+            options={
+                'verbose_name': 'article tombstone',
+                'verbose_name_plural': 'article tombstones',
+            },
+        ),
+    ]
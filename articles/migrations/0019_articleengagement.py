@@ -0,0 +1,28 @@
+# Generated by Django 4.2 on 2026-10-19 18:32
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ('articles', '0018_articletombstone'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ArticleEngagement',
+            fields=[
+                (
+                    'article_id',
+                    models.UUIDField(
+                        primary_key=True, serialize=False, verbose_name='article id'
+                    ),
+                ),
+                ('changed_at', models.DateTimeField(verbose_name='changed at')),
+            ],
+            options={
+                'verbose_name': 'article engagement',
+                'verbose_name_plural': 'article engagements',
+            },
+        ),
+    ]
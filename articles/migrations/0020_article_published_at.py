@@ -0,0 +1,37 @@
+# Generated by Django 4.2 on 2026-10-19 18:41
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ('articles', '0019_articleengagement'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='article',
+            name='published_at',
+            field=models.DateTimeField(
+                blank=True,
+                editable=False,
+                null=True,
+                verbose_name='published at',
+            ),
+        ),
+        # момент первой публикации неизвестен; снятая статья с просмотрами
+        # была опубликована: просматриваются только опубликованные статьи
+        migrations.RunSQL(
+            sql="""
+                UPDATE articles_article AS a
+                SET published_at = a.created_at
+                WHERE a.is_published
+                OR EXISTS (
+                    SELECT 1
+                    FROM articles_article_viewers AS v
+                    WHERE v.article_id = a.id
+                );
+                """,
+            reverse_sql=migrations.RunSQL.noop,
+        ),
+    ]
@@ -0,0 +1,40 @@
+# Generated by Django 4.2 on 2026-10-19 18:59
+
+import django.contrib.postgres.indexes
+import django.db.models.functions.text
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ('articles', '0020_article_published_at'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='article',
+            name='article_title_trgm_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='tag',
+            name='tag_name_trgm_idx',
+        ),
+        migrations.AddIndex(
+            model_name='article',
+            index=django.contrib.postgres.indexes.GinIndex(
+                django.contrib.postgres.indexes.OpClass(
+                    django.db.models.functions.text.Lower('title'), name='gin_trgm_ops'
+                ),
+                name='article_title_lower_trgm_idx',
+            ),
+        ),
+        migrations.AddIndex(
+            model_name='tag',
+            index=django.contrib.postgres.indexes.GinIndex(
+                django.contrib.postgres.indexes.OpClass(
+                    django.db.models.functions.text.Lower('name'), name='gin_trgm_ops'
+                ),
+                name='tag_name_lower_trgm_idx',
+            ),
+        ),
+    ]
@@ -1,8 +1,10 @@
 from django.contrib.auth import get_user_model
 from django.contrib.contenttypes.fields import GenericRelation
-from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.indexes import GinIndex, OpClass
 from django.contrib.postgres.search import SearchVectorField
+from django.core.serializers.json import DjangoJSONEncoder
 from django.db import models
+from django.db.models.functions import Lower
 from django.urls import reverse
 from django.utils.translation import gettext_lazy as _
 from mptt.models import MPTTModel, TreeForeignKey, TreeManyToManyField
@@ -33,6 +35,12 @@ class Viewer(UUIDMixin):
 
 class Article(UUIDMixin, TimeStampedMixin):
     image = models.ImageField(upload_to='images/')
+    image_renditions = models.JSONField(
+        _('image renditions'),
+        default=dict,
+        blank=True,
+        editable=False,
+    )
     title = models.CharField(_('title'), max_length=255)
     annotation = models.CharField(
         _('annotation'),
@@ -52,6 +60,14 @@ class Article(UUIDMixin, TimeStampedMixin):
         blank=True,
     )
     is_published = models.BooleanField(_('is published'), default=False)
+    # момент первой публикации; лента изменений не выдаёт неопубликованные
+    # черновики (articles.changes)
+    published_at = models.DateTimeField(
+        _('published at'),
+        null=True,
+        blank=True,
+        editable=False,
+    )
     author = models.ForeignKey(
         User,
         on_delete=models.CASCADE,
@@ -67,12 +83,23 @@ class Article(UUIDMixin, TimeStampedMixin):
     votes = GenericRelation(Vote, related_query_name='articles')
     viewers = models.ManyToManyField(Viewer, related_name='articles')
     search_vector = SearchVectorField(null=True)
+    # сдвигается при изменении содержимого ответа API о статье, в том числе тегов
+    # и автора (см. articles.signals); счётчики и комментарии сдвигают
+    # ArticleEngagement, чтобы чтение статьи не переписывало её строку и индексы
+    changed_at = models.DateTimeField(_('changed at'), auto_now=True, db_index=True)
 
     class Meta:
         ordering = ['-created_at']
         verbose_name = _('article')
         verbose_name_plural = _('articles')
-        indexes = [GinIndex(fields=['search_vector'])]
+        indexes = [
+            GinIndex(fields=['search_vector']),
+            # подсказки ищут подстроку в LOWER(title)
+            GinIndex(
+                OpClass(Lower('title'), name='gin_trgm_ops'),
+                name='article_title_lower_trgm_idx',
+            ),
+        ]
 
     def __str__(self):
         return self.title
@@ -95,10 +122,17 @@ class Tag(UUIDMixin, MPTTModel):
         null=True,
         db_index=True,
     )
+    updated_at = models.DateTimeField(_('updated_at'), auto_now=True)
 
     class Meta:
         verbose_name_plural = _('Tags')
         verbose_name = _('Tag')
+        indexes = [
+            GinIndex(
+                OpClass(Lower('name'), name='gin_trgm_ops'),
+                name='tag_name_lower_trgm_idx',
+            ),
+        ]
 
     class MPTTMeta:
         order_insertion_by = ['name']
@@ -165,3 +199,130 @@ class Comment(UUIDMixin, TimeStampedMixin):
 
     def __str__(self):
         return self.text[:25]
+
+
+class RelatedArticle(models.Model):
+    """Похожая статья (предрассчитанный ближайший сосед статьи)."""
+
+    article = models.ForeignKey(
+        Article,
+        related_name='related_articles',
+        on_delete=models.CASCADE,
+        verbose_name=_('article'),
+    )
+    related = models.ForeignKey(
+        Article,
+        related_name='+',
+        on_delete=models.CASCADE,
+        verbose_name=_('related article'),
+    )
+    score = models.FloatField(_('score'))
+
+    class Meta:
+        ordering = ['-score']
+        constraints = [
+            models.UniqueConstraint(
+                name='%(app_label)s_%(class)s_unique_related',
+                fields=['article', 'related'],
+            ),
+        ]
+        verbose_name = _('related article')
+        verbose_name_plural = _('related articles')
+
+    def __str__(self) -> str:
+        return f'{self.article} -> {self.related} ({self.score:.3f})'
+
+
+class UploadSession(UUIDMixin, TimeStampedMixin):
+    """Сессия загрузки изображения статьи по частям.
+
+    Полученные части дописываются в файл сессии (см. articles.uploads),
+    offset хранит количество принятых байт. После завершения загрузки
+    выдаётся token, который принимает сериализатор создания статьи.
+    """
+
+    user = models.ForeignKey(
+        User,
+        related_name='upload_sessions',
+        on_delete=models.CASCADE,
+        verbose_name=_('user'),
+    )
+    size = models.PositiveIntegerField(_('size'))
+    offset = models.PositiveIntegerField(_('offset'), default=0)
+    token = models.CharField(
+        _('token'),
+        max_length=64,
+        unique=True,
+        null=True,
+        blank=True,
+        editable=False,
+    )
+    name = models.CharField(_('name'), max_length=100, blank=True, editable=False)
+
+    class Meta:
+        ordering = ['-created_at']
+        verbose_name = _('upload session')
+        verbose_name_plural = _('upload sessions')
+
+    def __str__(self) -> str:
+        return f'{self.user} {self.offset}/{self.size}'
+
+
+class IdempotencyKey(UUIDMixin, TimeStampedMixin):
+    """Сохранённый ответ на запрос с заголовком Idempotency-Key."""
+
+    user = models.ForeignKey(
+        User,
+        related_name='idempotency_keys',
+        on_delete=models.CASCADE,
+        verbose_name=_('user'),
+    )
+    key = models.CharField(_('key'), max_length=255)
+    request_hash = models.CharField(_('request hash'), max_length=64)
+    status_code = models.PositiveSmallIntegerField(_('status code'))
+    response = models.JSONField(_('response'), encoder=DjangoJSONEncoder)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                name='%(app_label)s_%(class)s_unique_user_key',
+                fields=['user', 'key'],
+            ),
+        ]
+        verbose_name = _('idempotency key')
+        verbose_name_plural = _('idempotency keys')
+
+    def __str__(self) -> str:
+        return f'{self.user} {self.key}'
+
+
+class ArticleTombstone(models.Model):
+    """Отметка об удалении статьи для ленты изменений (articles.changes)."""
+
+    article_id = models.UUIDField(_('article id'), unique=True)
+    deleted_at = models.DateTimeField(_('deleted at'), db_index=True)
+
+    class Meta:
+        verbose_name = _('article tombstone')
+        verbose_name_plural = _('article tombstones')
+
+    def __str__(self) -> str:
+        return str(self.article_id)
+
+
+class ArticleEngagement(models.Model):
+    """Отметка изменения просмотров, голосов, избранного и комментариев статьи.
+
+    Узкая таблица без внешнего ключа: частые обновления не затрагивают строку
+    и индексы статьи. Вместе с Article.changed_at даёт ETag и Last-Modified.
+    """
+
+    article_id = models.UUIDField(_('article id'), primary_key=True)
+    changed_at = models.DateTimeField(_('changed at'))
+
+    class Meta:
+        verbose_name = _('article engagement')
+        verbose_name_plural = _('article engagements')
+
+    def __str__(self) -> str:
+        return str(self.article_id)
@@ -0,0 +1,351 @@
+import numpy as np
+from django.conf import settings
+from django.db import connection, transaction
+from scipy import sparse
+
+from articles.models import Article, RelatedArticle, Tag
+from core.cache import get_project_cache
+
+RELATED_NAMESPACE = 'related'
+CORPUS_STATISTICS_KEY = 'corpus_statistics'
+
+ARTICLE_LEXEMES_SQL = """
+    SELECT a.id, lexeme.lexeme, coalesce(array_length(lexeme.positions, 1), 1)
+    FROM articles_article AS a
+    CROSS JOIN LATERAL unnest(a.search_vector) AS lexeme
+    WHERE a.is_published
+"""
+
+# число опубликованных статей с каждой лексемой — для IDF при обновлении
+# соседей одной статьи
+DOCUMENT_FREQUENCY_SQL = """
+    SELECT word, ndoc
+    FROM ts_stat('SELECT search_vector FROM articles_article WHERE is_published')
+"""
+
+TEXT_CANDIDATES_SQL = """
+    SELECT id
+    FROM articles_article
+    WHERE is_published AND id <> %(article_id)s AND search_vector @@ %(query)s::tsquery
+    ORDER BY ts_rank(search_vector, %(query)s::tsquery) DESC
+    LIMIT %(limit)s
+"""
+
+
+def _normalize_rows(matrix):
+    norms = np.sqrt(np.asarray(matrix.multiply(matrix).sum(axis=1)).ravel())
+    norms[norms == 0] = 1
+    return sparse.diags(1 / norms) @ matrix
+
+
+def _build_tags_matrix(index):
+    """Матрица статья x тег: тег статьи и его предки с убывающим весом (MPTT)."""
+    parents = dict(Tag.objects.values_list('pk', 'parent_id'))
+    tag_index = {tag_id: column for column, tag_id in enumerate(parents)}
+    article_tags = Article.tags.through.objects.filter(
+        article_id__in=index,
+    ).values_list('article_id', 'tag_id')
+
+    weights = {}
+    for article_id, tag_id in article_tags:
+        weight = 1.0
+        while tag_id is not None:
+            cell = (index[article_id], tag_index[tag_id])
+            weights[cell] = max(weights.get(cell, 0), weight)
+            weight *= settings.RELATED_ARTICLES_ANCESTOR_DECAY
+            tag_id = parents[tag_id]
+
+    rows, columns = zip(*weights) if weights else ((), ())
+    return sparse.csr_matrix(
+        (list(weights.values()), (rows, columns)),
+        shape=(len(index), len(tag_index)),
+    )
+
+
+def _get_lexemes(article_ids=None) -> list:
+    """Лексемы search_vector опубликованных статей: (id, лексема, вхождения)."""
+    with connection.cursor() as cursor:
+        if article_ids is None:
+            cursor.execute(ARTICLE_LEXEMES_SQL)
+        else:
+            cursor.execute(
+                f'{ARTICLE_LEXEMES_SQL} AND a.id = ANY(%s::uuid[])',
+                [[str(article_id) for article_id in article_ids]],
+            )
+        return cursor.fetchall()
+
+
+def _get_idf(document_count, document_frequency):
+    return np.log((1 + document_count) / (1 + document_frequency)) + 1
+
+
+def _build_text_matrix(index, statistics=None):
+    """Матрица статья x лексема с весами TF-IDF по лексемам search_vector.
+
+    Без statistics строки — все опубликованные статьи, и частоты лексем
+    считаются по ним. Для части статей передаётся statistics: число
+    опубликованных статей и частоты лексем по всем статьям.
+    """
+    lexemes = _get_lexemes(None if statistics is None else list(index))
+
+    lexeme_index = {}
+    rows = np.fromiter((index[row[0]] for row in lexemes), dtype=np.int64)
+    columns = np.fromiter(
+        (lexeme_index.setdefault(row[1], len(lexeme_index)) for row in lexemes),
+        dtype=np.int64,
+    )
+    counts = np.fromiter((row[2] for row in lexemes), dtype=np.float64)
+    term_frequency = sparse.csr_matrix(
+        (1 + np.log(counts), (rows, columns)),
+        shape=(len(index), len(lexeme_index)),
+    )
+    if statistics is None:
+        document_count = len(index)
+        document_frequency = np.bincount(columns, minlength=len(lexeme_index))
+    else:
+        document_count, frequencies = statistics
+        document_frequency = np.fromiter(
+            (frequencies.get(lexeme, 0) for lexeme in lexeme_index),
+            dtype=np.float64,
+            count=len(lexeme_index),
+        )
+    idf = _get_idf(document_count, document_frequency)
+    return term_frequency @ sparse.diags(idf)
+
+
+def _combine_features(tags_matrix, text_matrix):
+    """Объединяет признаки тегов и текста в одну матрицу.
+
+    Нормированные признаки умножаются на корень из своего веса, поэтому
+    произведение строк матрицы равно взвешенной сумме двух косинусов.
+    """
+    return sparse.hstack(
+        [
+            np.sqrt(settings.RELATED_ARTICLES_TAGS_WEIGHT)
+            * _normalize_rows(tags_matrix),
+            np.sqrt(settings.RELATED_ARTICLES_TEXT_WEIGHT)
+            * _normalize_rows(text_matrix),
+        ],
+        format='csr',
+    )
+
+
+def build_feature_matrix(article_ids=None, statistics=None):
+    """Строит признаки статей для косинусной похожести.
+
+    По умолчанию — все опубликованные статьи; article_ids ограничивает
+    строки матрицы, тогда IDF берётся из statistics.
+    """
+    if article_ids is None:
+        article_ids = list(
+            Article.objects.filter(is_published=True)
+            .order_by('pk')
+            .values_list('pk', flat=True),
+        )
+    index = {article_id: row for row, article_id in enumerate(article_ids)}
+    matrix = _combine_features(
+        _build_tags_matrix(index),
+        _build_text_matrix(index, statistics),
+    )
+    return matrix, article_ids
+
+
+def get_corpus_statistics():
+    """Число опубликованных статей и частоты лексем (кешируются до пересчёта)."""
+
+    def compute():
+        with connection.cursor() as cursor:
+            cursor.execute(DOCUMENT_FREQUENCY_SQL)
+            frequencies = dict(cursor.fetchall())
+        return Article.objects.filter(is_published=True).count(), frequencies
+
+    return get_project_cache().get_or_set(
+        RELATED_NAMESPACE,
+        CORPUS_STATISTICS_KEY,
+        compute,
+        settings.RELATED_ARTICLES_REBUILD_PERIOD.total_seconds(),
+    )
+
+
+def _top_neighbours(matrix, rows):
+    """Возвращает для строк матрицы K ближайших соседей: (строка, сосед, похожесть).
+
+    Строки обрабатываются частями по RELATED_ARTICLES_CHUNK_SIZE: в памяти
+    одновременно только похожести одной части со всеми статьями.
+    """
+    count = settings.RELATED_ARTICLES_COUNT
+    chunk_size = settings.RELATED_ARTICLES_CHUNK_SIZE
+    rows = list(rows)
+    matrix_transposed = matrix.T.tocsc()
+    for chunk_start in range(0, len(rows), chunk_size):
+        chunk_end = chunk_start + chunk_size
+        chunk = rows[chunk_start:chunk_end]
+        similarity = (matrix[chunk] @ matrix_transposed).tocsr()
+        for position, row in enumerate(chunk):
+            start, end = similarity.indptr[position], similarity.indptr[position + 1]
+            columns = similarity.indices[start:end]
+            scores = similarity.data[start:end]
+            mask = (columns != row) & (scores > 0)
+            columns, scores = columns[mask], scores[mask]
+            if len(scores) > count:
+                top = np.argpartition(-scores, count - 1)[:count]
+                columns, scores = columns[top], scores[top]
+            for neighbour, score in zip(columns, scores):
+                yield row, neighbour, float(score)
+
+
+def rebuild_related_articles():
+    """Полностью пересчитывает таблицу похожих статей."""
+    matrix, article_ids = build_feature_matrix()
+    stored_count = 0
+    with transaction.atomic():
+        RelatedArticle.objects.all().delete()
+        related_articles = []
+        for row, neighbour, score in _top_neighbours(matrix, range(len(article_ids))):
+            related_articles.append(
+                RelatedArticle(
+                    article_id=article_ids[row],
+                    related_id=article_ids[neighbour],
+                    score=score,
+                ),
+            )
+            if len(related_articles) >= settings.RELATED_ARTICLES_CHUNK_SIZE:
+                RelatedArticle.objects.bulk_create(related_articles)
+                stored_count += len(related_articles)
+                related_articles = []
+        RelatedArticle.objects.bulk_create(related_articles)
+        stored_count += len(related_articles)
+    get_project_cache().delete(RELATED_NAMESPACE, CORPUS_STATISTICS_KEY)
+    return stored_count
+
+
+def _make_tsquery(lexemes) -> str:
+    """Запрос tsquery «лексема1 | лексема2 | ...» из готовых лексем."""
+    escaped = (lexeme.replace('\\', '\\\\').replace("'", "''") for lexeme in lexemes)
+    return ' | '.join(f"'{lexeme}'" for lexeme in escaped)
+
+
+def _find_candidates(article_id, statistics) -> list:
+    """Статьи, похожие на статью хотя бы по одному признаку.
+
+    По тегам — статьи с тегами из деревьев тегов статьи; по тексту — статьи
+    с самыми значимыми (по TF-IDF) лексемами статьи, найденные по GIN-индексу
+    search_vector. Каждый список ограничен RELATED_ARTICLES_MAX_CANDIDATES.
+    """
+    limit = settings.RELATED_ARTICLES_MAX_CANDIDATES
+    tags = Tag.objects.filter(articles=article_id)
+    tag_trees = Tag.objects.get_queryset_descendants(
+        Tag.objects.get_queryset_ancestors(tags, include_self=True),
+        include_self=True,
+    )
+    candidates = set(
+        Article.objects.filter(is_published=True, tags__in=tag_trees)
+        .exclude(pk=article_id)
+        .values_list('pk', flat=True)
+        .distinct()[:limit],
+    )
+
+    document_count, frequencies = statistics
+    lexemes = sorted(
+        _get_lexemes([article_id]),
+        key=lambda row: (1 + np.log(row[2]))
+        * _get_idf(document_count, frequencies.get(row[1], 0)),
+        reverse=True,
+    )[: settings.RELATED_ARTICLES_QUERY_LEXEMES]
+    if lexemes:
+        with connection.cursor() as cursor:
+            cursor.execute(
+                TEXT_CANDIDATES_SQL,
+                {
+                    'article_id': str(article_id),
+                    'query': _make_tsquery(row[1] for row in lexemes),
+                    'limit': limit,
+                },
+            )
+            candidates.update(row[0] for row in cursor.fetchall())
+    return list(candidates)
+
+
+def _merge_neighbour(neighbours, article_id, score):
+    """Список соседей с обновлённой похожестью статьи article_id (K лучших)."""
+    neighbours = [
+        (related_id, related_score)
+        for related_id, related_score in neighbours
+        if related_id != article_id
+    ]
+    if score > 0:
+        neighbours.append((article_id, score))
+    neighbours.sort(key=lambda neighbour: neighbour[1], reverse=True)
+    return neighbours[: settings.RELATED_ARTICLES_COUNT]
+
+
+def update_related_articles(article_id):
+    """Обновляет похожие статьи после публикации, изменения или снятия статьи.
+
+    Признаки строятся только для статьи и статей-кандидатов (общие теги или
+    значимые лексемы) и тех, в чьих списках она уже есть. Соседи статьи
+    пересчитываются заново, а в списки остальных статья вставляется или
+    удаляется с новой похожестью. Если статья выпала из списка, он
+    дополняется при полном пересчёте (rebuild_related_articles).
+    Возвращает количество сохранённых записей.
+    """
+    affected_ids = set(
+        RelatedArticle.objects.filter(related_id=article_id).values_list(
+            'article_id',
+            flat=True,
+        ),
+    )
+    if not Article.objects.filter(pk=article_id, is_published=True).exists():
+        with transaction.atomic():
+            RelatedArticle.objects.filter(article_id=article_id).delete()
+            RelatedArticle.objects.filter(related_id=article_id).delete()
+        return 0
+
+    statistics = get_corpus_statistics()
+    candidate_ids = set(_find_candidates(article_id, statistics))
+    affected_ids = set(
+        Article.objects.filter(
+            pk__in=affected_ids - candidate_ids,
+            is_published=True,
+        ).values_list('pk', flat=True),
+    )
+    matrix, article_ids = build_feature_matrix(
+        [article_id, *candidate_ids, *affected_ids],
+        statistics,
+    )
+    scores = (matrix @ matrix[0].T).toarray().ravel()
+    scores = {pk: float(score) for pk, score in zip(article_ids[1:], scores[1:])}
+
+    neighbours = {
+        article_id: [
+            (pk, score)
+            for pk, score in scores.items()
+            if pk in candidate_ids and score > 0
+        ],
+    }
+    neighbours[article_id].sort(key=lambda neighbour: neighbour[1], reverse=True)
+    neighbours[article_id] = neighbours[article_id][: settings.RELATED_ARTICLES_COUNT]
+
+    stored = {}
+    for related in RelatedArticle.objects.filter(article_id__in=scores).order_by():
+        stored.setdefault(related.article_id, []).append(
+            (related.related_id, related.score),
+        )
+    for pk, score in scores.items():
+        current = stored.get(pk, [])
+        is_listed = any(related_id == article_id for related_id, _ in current)
+        fits = score > 0 and (
+            len(current) < settings.RELATED_ARTICLES_COUNT
+            or score > min(related_score for _, related_score in current)
+        )
+        if is_listed or fits:
+            neighbours[pk] = _merge_neighbour(current, article_id, score)
+
+    with transaction.atomic():
+        RelatedArticle.objects.filter(article_id__in=neighbours).delete()
+        related_articles = RelatedArticle.objects.bulk_create(
+            RelatedArticle(article_id=pk, related_id=related_id, score=score)
+            for pk, article_neighbours in neighbours.items()
+            for related_id, score in article_neighbours
+        )
+    return len(related_articles)
@@ -0,0 +1,299 @@
+import hashlib
+import re
+import time
+
+from django.conf import settings
+from django.contrib.postgres.search import (
+    SearchHeadline,
+    SearchQuery,
+    SearchRank,
+    TrigramSimilarity,
+)
+from django.core.cache import cache, caches
+from django.core.exceptions import ImproperlyConfigured
+from django.db import connection, transaction
+from django.db.models import Case, F, IntegerField, Value, When
+from django.db.models.functions import Lower
+
+from articles.models import Article, Tag
+
+TS_CONFIG_PATTERN = re.compile(r'^[a-z_]+$')
+SEARCH_WEIGHT_LABELS = ('A', 'B', 'C', 'D')
+
+# поля статьи, которые триггер берёт из NEW; теги собираются отдельным запросом
+ARTICLE_SEARCH_FIELDS = ('title', 'annotation', 'text')
+
+SEARCH_FUNCTION_SQL = """
+    CREATE OR REPLACE FUNCTION update_article_search_vector()
+    RETURNS TRIGGER
+    LANGUAGE plpgsql AS $$
+    DECLARE
+        tag_names text;
+    BEGIN
+    SELECT string_agg(t.name, ' ')
+    INTO tag_names
+    FROM articles_tag AS t
+    JOIN articles_article_tags AS at ON at.tag_id = t.id
+    WHERE at.article_id = NEW.id;
+    NEW.search_vector := {vector};
+    RETURN NEW;
+    END;
+    $$;
+"""
+
+SEARCH_FACETS = ('tags', 'author', 'month')
+
+# фасеты считаются по CTE matches со всеми найденными статьями
+FACETS_SQL = {
+    'tags': """
+        SELECT 'tags', t.id::text, t.name, count(*)
+        FROM articles_article_tags AS at
+        JOIN articles_tag AS t ON t.id = at.tag_id
+        WHERE at.article_id IN (SELECT id FROM matches)
+        GROUP BY t.id, t.name
+    """,
+    'author': """
+        SELECT 'author', u.id::text, concat_ws(' ', u.first_name, u.last_name), count(*)
+        FROM articles_article AS a
+        JOIN users_user AS u ON u.id = a.author_id
+        WHERE a.id IN (SELECT id FROM matches)
+        GROUP BY u.id
+    """,
+    'month': """
+        SELECT 'month', month, month, count(*)
+        FROM (
+            SELECT to_char(a.created_at AT TIME ZONE %s, 'YYYY-MM') AS month
+            FROM articles_article AS a
+            WHERE a.id IN (SELECT id FROM matches)
+        ) AS months
+        GROUP BY month
+    """,
+}
+
+
+def normalize_query(raw_query: str) -> str:
+    return ' '.join(raw_query.lower().split())
+
+
+def get_search_configs() -> tuple[str, ...]:
+    """Возвращает конфигурации полнотекстового поиска: основную и запасную."""
+    configs = [settings.SEARCH_CONFIG]
+    fallback = settings.SEARCH_FALLBACK_CONFIG
+    if fallback and fallback != settings.SEARCH_CONFIG:
+        configs.append(fallback)
+    for config in configs:
+        if not TS_CONFIG_PATTERN.match(config):
+            raise ImproperlyConfigured(f'Invalid text search config name: {config!r}.')
+    return tuple(configs)
+
+
+def get_search_weights() -> dict[str, str]:
+    weights = settings.SEARCH_WEIGHTS
+    for source, weight in weights.items():
+        if weight not in SEARCH_WEIGHT_LABELS:
+            raise ImproperlyConfigured(
+                f'Invalid search weight {weight!r} for {source!r}.',
+            )
+    return weights
+
+
+def build_search_query(raw_query: str) -> SearchQuery:
+    """Объединяет (OR) поисковые запросы по всем конфигурациям поиска."""
+    search_query = None
+    for config in get_search_configs():
+        config_query = SearchQuery(raw_query, config=config)
+        search_query = (
+            config_query if search_query is None else search_query | config_query
+        )
+    return search_query
+
+
+def _build_vector_sql() -> str:
+    weights = get_search_weights()
+    sources = {field: f'NEW.{field}' for field in ARTICLE_SEARCH_FIELDS}
+    sources['tags'] = 'tag_names'
+    parts = [
+        f"setweight(to_tsvector('{config}'::regconfig, "
+        f"coalesce({sources[source]}, '')), '{weight}')"
+        for config in get_search_configs()
+        for source, weight in weights.items()
+    ]
+    return ' || '.join(parts)
+
+
+def install_search_function(db_connection=connection):
+    """Пересоздаёт функцию триггера search_vector по текущим настройкам поиска.
+
+    CREATE OR REPLACE FUNCTION не блокирует таблицу статей,
+    сам триггер при этом не пересоздаётся.
+    """
+    with db_connection.cursor() as cursor:
+        cursor.execute(SEARCH_FUNCTION_SQL.format(vector=_build_vector_sql()))
+
+
+def reindex_articles(article_ids):
+    """Пересчитывает search_vector указанных статей (через триггер)."""
+    return Article.objects.filter(pk__in=article_ids).update(search_vector=None)
+
+
+def reindex_search_vectors(batch_size, start_after=None, pause=0.0):
+    """Пересчитывает search_vector всех статей пачками в порядке первичного ключа.
+
+    Каждая пачка обновляется в отдельной короткой транзакции. Генератор
+    возвращает количество обработанных строк и id последней статьи пачки,
+    по которому можно продолжить прерванную переиндексацию.
+    """
+    last_id = start_after
+    while True:
+        with transaction.atomic():
+            batch = Article.objects.order_by('pk')
+            if last_id is not None:
+                batch = batch.filter(pk__gt=last_id)
+            batch_ids = list(batch.values_list('pk', flat=True)[:batch_size])
+            if not batch_ids:
+                return
+            reindex_articles(batch_ids)
+        last_id = batch_ids[-1]
+        yield len(batch_ids), last_id
+        if pause:
+            time.sleep(pause)
+
+
+def get_search_cache():
+    return caches[settings.SEARCH_CACHE_ALIAS]
+
+
+def make_search_cache_key(raw_query: str, filter_params) -> str:
+    """Ключ кеша результатов: нормализованный запрос и отсортированные фильтры."""
+    key_source = '|'.join(
+        [normalize_query(raw_query)]
+        + [f'{name}={value}' for name, value in sorted(filter_params)],
+    )
+    key_hash = hashlib.md5(key_source.encode(), usedforsecurity=False).hexdigest()
+    return f'search_ids:{key_hash}'
+
+
+def match_articles(queryset, search_query: SearchQuery):
+    """Все статьи queryset, подходящие под поисковый запрос, без ранжирования."""
+    return queryset.filter(search_vector=search_query)
+
+
+def rank_article_ids(queryset, search_query: SearchQuery) -> list:
+    """Первая фаза поиска: id найденных статей по убыванию релевантности.
+
+    Запрос не содержит агрегатов статьи (счётчиков голосов и просмотров),
+    а длина списка ограничена SEARCH_RESULTS_MAX_IDS.
+    """
+    return list(
+        match_articles(queryset, search_query)
+        .annotate(rank=SearchRank(F('search_vector'), search_query))
+        .order_by('-rank', '-created_at')
+        .values_list('pk', flat=True)[: settings.SEARCH_RESULTS_MAX_IDS],
+    )
+
+
+def count_facets(matches, facets) -> dict[str, list]:
+    """Считает фасеты (теги, авторы, месяцы) по всем найденным статьям одним запросом.
+
+    matches — queryset найденных статей; в отличие от ранжированного списка id
+    он не ограничен SEARCH_RESULTS_MAX_IDS.
+    """
+    facets = list(dict.fromkeys(facets))
+    facet_counts = {facet: [] for facet in facets}
+    if not facets:
+        return facet_counts
+
+    matches_sql, params = matches.order_by().values('pk').query.sql_with_params()
+    params = list(params)
+    if 'month' in facets:
+        params.append(settings.TIME_ZONE)
+    query = 'WITH matches (id) AS ({matches}) {facets}'.format(
+        matches=matches_sql,
+        facets=' UNION ALL '.join(FACETS_SQL[facet] for facet in facets),
+    )
+    with connection.cursor() as cursor:
+        cursor.execute(query, params)
+        for facet, value, label, count in cursor.fetchall():
+            facet_counts[facet].append({'value': value, 'label': label, 'count': count})
+    for counts in facet_counts.values():
+        counts.sort(
+            key=lambda facet_count: (-facet_count['count'], facet_count['label'])
+        )
+    return facet_counts
+
+
+def get_headlines(
+    article_ids,
+    search_query: SearchQuery,
+    max_words: int,
+    max_fragments: int,
+) -> dict:
+    """Строит выдержки ts_headline вокруг найденных слов только для переданных статей.
+
+    ts_headline разбирает весь текст документа, поэтому его вызывают для
+    статей текущей страницы выдачи, а не для всех найденных.
+    """
+    headline = SearchHeadline(
+        'text',
+        search_query,
+        config=settings.SEARCH_CONFIG,
+        max_words=max_words,
+        min_words=min(settings.SEARCH_HEADLINE_MIN_WORDS, max_words - 1),
+        max_fragments=max_fragments,
+    )
+    return dict(
+        Article.objects.filter(pk__in=article_ids)
+        .annotate(highlight=headline)
+        .values_list('pk', 'highlight'),
+    )
+
+
+def _suggest_queryset(queryset, field, query, limit):
+    """Совпадения по префиксу выше остальных, затем по триграммному сходству.
+
+    Подстрока ищется в LOWER(field), чтобы запрос использовал триграммный индекс
+    по этому выражению; query уже приведён к нижнему регистру normalize_query.
+    """
+    return (
+        queryset.annotate(lowered=Lower(field))
+        .filter(lowered__contains=query)
+        .annotate(
+            is_prefix=Case(
+                When(lowered__startswith=query, then=Value(1)),
+                default=Value(0),
+                output_field=IntegerField(),
+            ),
+            similarity=TrigramSimilarity(field, query),
+        )
+        .order_by('-is_prefix', '-similarity', field)[:limit]
+    )
+
+
+def get_suggestions(raw_query: str, limit=None) -> dict[str, list]:
+    """Подсказки для строки поиска: заголовки опубликованных статей и имена тегов.
+
+    Результат для нормализованного запроса кешируется на короткое время,
+    поэтому популярные префиксы не доходят до базы данных.
+    """
+    query = normalize_query(raw_query)
+    limit = limit or settings.SEARCH_SUGGEST_LIMIT
+    if len(query) < settings.SEARCH_SUGGEST_MIN_LENGTH:
+        return {'articles': [], 'tags': []}
+
+    query_hash = hashlib.md5(query.encode(), usedforsecurity=False).hexdigest()
+    cache_key = f'search_suggest:{limit}:{query_hash}'
+    suggestions = cache.get(cache_key)
+    if suggestions is None:
+        articles = _suggest_queryset(
+            Article.objects.filter(is_published=True),
+            'title',
+            query,
+            limit,
+        )
+        tags = _suggest_queryset(Tag.objects.all(), 'name', query, limit)
+        suggestions = {
+            'articles': list(articles.values('id', 'title')),
+            'tags': list(tags.values('pk', 'name')),
+        }
+        cache.set(cache_key, suggestions, settings.SEARCH_SUGGEST_CACHE_TIMEOUT)
+    return suggestions
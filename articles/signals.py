@@ -0,0 +1,208 @@
+from django.contrib.auth import get_user_model
+from django.contrib.contenttypes.models import ContentType
+from django.db import transaction
+from django.db.models.signals import (
+    m2m_changed,
+    post_delete,
+    post_save,
+    pre_delete,
+    pre_save,
+)
+from django.dispatch import receiver
+from django.utils import timezone
+
+from articles.changes import (
+    ARTICLE_USER_FIELDS,
+    delete_article_engagement,
+    forget_articles_changed_at,
+    forget_tag_tree,
+    record_article_deletion,
+    touch_article_engagement,
+    touch_articles,
+    touch_user_articles,
+)
+from articles.models import Article, Comment, FavoriteArticle, Tag
+from articles.search import reindex_articles
+from articles.tasks import (
+    create_article_image_renditions_task,
+    update_related_articles_task,
+)
+from core.renditions import needs_renditions
+from likes.models import Vote
+
+User = get_user_model()
+
+# поля, из которых строятся признаки похожих статей (articles.related)
+RELATED_ARTICLE_FIELDS = ('title', 'annotation', 'text', 'is_published')
+
+
+def schedule_related_update(article_ids):
+    """После коммита ставит в очередь пересчёт похожих статей."""
+    for article_id in article_ids:
+        transaction.on_commit(
+            lambda article_id=article_id: update_related_articles_task.delay(
+                str(article_id),
+            ),
+        )
+
+
+@receiver(m2m_changed, sender=Article.tags.through)
+def reindex_article_tags(sender, instance, action, reverse, pk_set, **kwargs):
+    """Пересчитывает search_vector статей при изменении их тегов."""
+    if not reverse:
+        if action in {'post_add', 'post_remove', 'post_clear'}:
+            reindex_articles([instance.pk])
+            if instance.is_published:
+                schedule_related_update([instance.pk])
+        return
+
+    if action == 'pre_clear':
+        instance._search_reindex_ids = list(
+            instance.articles.values_list('pk', flat=True),
+        )
+    elif action == 'post_clear':
+        reindex_articles(getattr(instance, '_search_reindex_ids', []))
+    elif action in {'post_add', 'post_remove'}:
+        reindex_articles(pk_set)
+        schedule_related_update(
+            Article.objects.filter(pk__in=pk_set, is_published=True).values_list(
+                'pk',
+                flat=True,
+            ),
+        )
+
+
+@receiver(pre_save, sender=Article)
+def set_published_at(sender, instance, **kwargs):
+    """Отмечает первую публикацию: по ней лента изменений отличает черновики."""
+    if instance.is_published and instance.published_at is None:
+        instance.published_at = timezone.now()
+
+
+@receiver(pre_save, sender=Article)
+def remember_related_fields(sender, instance, **kwargs):
+    """Запоминает, изменились ли признаки похожести статьи или её публикация."""
+    previous = (
+        Article.objects.filter(pk=instance.pk).values(*RELATED_ARTICLE_FIELDS).first()
+    )
+    if previous is None:
+        instance._related_changed = instance.is_published
+        return
+    # изменения черновика не влияют на похожие статьи
+    is_visible = previous['is_published'] or instance.is_published
+    instance._related_changed = is_visible and any(
+        previous[field] != getattr(instance, field) for field in RELATED_ARTICLE_FIELDS
+    )
+
+
+@receiver(post_save, sender=Article)
+def update_related_on_save(sender, instance, **kwargs):
+    """Публикация, снятие и изменение текста статьи меняют её похожие статьи."""
+    if getattr(instance, '_related_changed', True):
+        schedule_related_update([instance.pk])
+
+
+@receiver(pre_save, sender=Tag)
+def remember_tag_name(sender, instance, **kwargs):
+    instance._search_name_changed = (
+        Tag.objects.filter(pk=instance.pk).exclude(name=instance.name).exists()
+    )
+
+
+@receiver(post_save, sender=Tag)
+def reindex_renamed_tag(sender, instance, created, **kwargs):
+    """Пересчитывает search_vector статей переименованного тега."""
+    if not created and getattr(instance, '_search_name_changed', False):
+        reindex_articles(instance.articles.values('pk'))
+
+
+@receiver(post_save, sender=Article)
+def schedule_image_renditions(sender, instance, **kwargs):
+    """После загрузки изображения ставит в очередь создание его вариантов."""
+    if needs_renditions(instance, 'image'):
+        transaction.on_commit(
+            lambda: create_article_image_renditions_task.delay(str(instance.pk)),
+        )
+
+
+@receiver(m2m_changed, sender=Article.tags.through)
+def touch_m2m_articles(sender, instance, action, reverse, pk_set, **kwargs):
+    """Теги статьи выводятся в её ответе API."""
+    if not reverse:
+        if action in {'post_add', 'post_remove', 'post_clear'}:
+            touch_articles([instance.pk])
+    elif action in {'post_add', 'post_remove'}:
+        touch_articles(pk_set)
+    elif action == 'pre_clear':
+        touch_articles(instance.articles.values('pk'))
+
+
+@receiver(m2m_changed, sender=Article.viewers.through)
+def touch_viewed_articles(sender, instance, action, reverse, pk_set, **kwargs):
+    """Просмотры меняют счётчик в ответе API, но не строку статьи."""
+    if not reverse:
+        if action in {'post_add', 'post_remove', 'post_clear'}:
+            touch_article_engagement([instance.pk])
+    elif action in {'post_add', 'post_remove'}:
+        touch_article_engagement(pk_set)
+    elif action == 'pre_clear':
+        touch_article_engagement(instance.articles.values_list('pk', flat=True))
+
+
+@receiver(post_save, sender=FavoriteArticle)
+@receiver(post_delete, sender=FavoriteArticle)
+@receiver(post_save, sender=Comment)
+@receiver(post_delete, sender=Comment)
+def touch_related_article(sender, instance, **kwargs):
+    touch_article_engagement([instance.article_id])
+
+
+@receiver(post_save, sender=Vote)
+@receiver(post_delete, sender=Vote)
+def touch_voted_article(sender, instance, **kwargs):
+    if instance.content_type_id == ContentType.objects.get_for_model(Article).pk:
+        touch_article_engagement([instance.object_id])
+
+
+@receiver(post_save, sender=Tag)
+def touch_renamed_tag_articles(sender, instance, created, **kwargs):
+    if not created and getattr(instance, '_search_name_changed', False):
+        touch_articles(instance.articles.values('pk'))
+
+
+@receiver(pre_delete, sender=Tag)
+def touch_deleted_tag_articles(sender, instance, **kwargs):
+    # связи с тегом удаляются каскадом, без сигнала m2m_changed
+    touch_articles(instance.articles.values('pk'))
+
+
+@receiver(post_save, sender=User)
+def touch_user_articles_on_save(sender, instance, created, update_fields, **kwargs):
+    """Имя, роль и аватар автора выводятся в его статьях и комментариях."""
+    if created or (update_fields and not ARTICLE_USER_FIELDS & set(update_fields)):
+        return
+    touch_user_articles(instance)
+
+
+@receiver(post_save, sender=Article)
+@receiver(post_delete, sender=Article)
+def forget_article_cache(sender, instance, **kwargs):
+    """Публикация, снятие и удаление статьи меняют её changed_at в кеше проекта."""
+    forget_articles_changed_at([instance.pk])
+
+
+@receiver(post_save, sender=Tag)
+@receiver(post_delete, sender=Tag)
+def forget_tag_tree_cache(sender, instance, **kwargs):
+    forget_tag_tree()
+
+
+@receiver(post_delete, sender=Article)
+def record_deleted_article(sender, instance, **kwargs):
+    """Удалённая статья попадает в ленту изменений отметкой об удалении.
+
+    Удаление черновика, который ни разу не публиковался, в ленту не попадает.
+    """
+    if instance.published_at is not None:
+        record_article_deletion(instance.pk)
+    delete_article_engagement(instance.pk)
@@ -0,0 +1,45 @@
+import uuid
+
+from celery import shared_task
+
+from articles.changes import delete_expired_article_tombstones, touch_articles
+from articles.models import Article
+from articles.related import rebuild_related_articles, update_related_articles
+from articles.uploads import (
+    delete_expired_idempotency_keys,
+    delete_expired_upload_sessions,
+)
+from core.renditions import update_renditions
+
+
+@shared_task
+def rebuild_related_articles_task():
+    rebuild_related_articles()
+
+
+@shared_task
+def update_related_articles_task(article_id):
+    update_related_articles(uuid.UUID(str(article_id)))
+
+
+@shared_task
+def create_article_image_renditions_task(article_id):
+    article = Article.objects.filter(pk=article_id).first()
+    if article:
+        update_renditions(article, 'image')
+        touch_articles([article.pk])
+
+
+@shared_task
+def delete_expired_upload_sessions_task():
+    delete_expired_upload_sessions()
+
+
+@shared_task
+def delete_expired_idempotency_keys_task():
+    delete_expired_idempotency_keys()
+
+
+@shared_task
+def delete_expired_article_tombstones_task():
+    delete_expired_article_tombstones()
@@ -0,0 +1,117 @@
+import os
+import secrets
+import shutil
+import tempfile
+from functools import partial
+from pathlib import Path
+
+from django.conf import settings
+from django.core.files import File
+from django.db import transaction
+from django.utils import timezone
+
+from articles.models import IdempotencyKey, UploadSession
+
+UPLOAD_CHUNK_READ_SIZE = 64 * 2**10
+
+
+class UploadOffsetMismatch(Exception):
+    """Часть загрузки начинается не с уже принятого количества байт."""
+
+    def __init__(self, offset):
+        super().__init__(offset)
+        self.offset = offset
+
+
+def get_upload_path(session: UploadSession) -> Path:
+    return Path(settings.UPLOAD_SESSIONS_ROOT) / str(session.pk)
+
+
+def append_chunk(session: UploadSession, start: int, stream, length: int) -> int:
+    """Дописывает часть загрузки в файл сессии и возвращает новый offset.
+
+    Тело запроса читается из stream порциями во временный файл, а в файл
+    сессии копируется под блокировкой строки сессии. Из одновременных
+    запросов с одинаковым start часть принимает только первый, остальные
+    получают UploadOffsetMismatch и файл не меняют.
+    """
+    if start != session.offset:
+        raise UploadOffsetMismatch(session.offset)
+
+    path = get_upload_path(session)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with tempfile.TemporaryFile(dir=path.parent) as chunk_file:
+        remaining = length
+        while remaining:
+            chunk = stream.read(min(remaining, UPLOAD_CHUNK_READ_SIZE))
+            if not chunk:
+                break
+            chunk_file.write(chunk)
+            remaining -= len(chunk)
+        end = start + length - remaining
+
+        with transaction.atomic():
+            locked = UploadSession.objects.select_for_update().get(pk=session.pk)
+            session.offset = locked.offset
+            if locked.offset != start:
+                raise UploadOffsetMismatch(locked.offset)
+            chunk_file.seek(0)
+            with open(path, 'r+b' if path.exists() else 'wb') as upload:
+                upload.seek(start)
+                shutil.copyfileobj(chunk_file, upload, UPLOAD_CHUNK_READ_SIZE)
+                upload.truncate(end)
+            locked.offset = end
+            locked.save(update_fields=('offset', 'updated_at'))
+    session.offset = end
+    return session.offset
+
+
+def finalize_upload(session: UploadSession, name: str) -> str:
+    """Завершает загрузку: сохраняет имя файла и выдаёт токен для создания статьи."""
+    # в файле не остаётся байт дальше принятого offset
+    os.truncate(get_upload_path(session), session.offset)
+    session.name = name
+    session.token = secrets.token_urlsafe(32)
+    session.save(update_fields=('name', 'token', 'updated_at'))
+    return session.token
+
+
+def open_upload(session: UploadSession) -> File:
+    return File(open(get_upload_path(session), 'rb'), name=session.name)
+
+
+def delete_upload_session(session: UploadSession):
+    path = get_upload_path(session)
+    session.delete()
+    # при откате транзакции сессия восстановится, поэтому файл удаляется после неё
+    transaction.on_commit(partial(path.unlink, missing_ok=True))
+
+
+def delete_expired_upload_sessions() -> int:
+    """Удаляет незавершённые и неиспользованные сессии загрузки вместе с файлами."""
+    expired_at = timezone.now() - settings.UPLOAD_SESSION_LIFETIME
+    expired_sessions = list(UploadSession.objects.filter(updated_at__lt=expired_at))
+    for session in expired_sessions:
+        delete_upload_session(session)
+
+    # файлы, оставшиеся от сессий, удалённых вместе с пользователями
+    upload_root = Path(settings.UPLOAD_SESSIONS_ROOT)
+    if upload_root.exists():
+        session_ids = {
+            str(session_id)
+            for session_id in UploadSession.objects.values_list('pk', flat=True)
+        }
+        for path in upload_root.iterdir():
+            is_stale = path.stat().st_mtime < expired_at.timestamp()
+            if is_stale and path.name not in session_ids:
+                path.unlink(missing_ok=True)
+    return len(expired_sessions)
+
+
+def delete_expired_idempotency_keys() -> int:
+    expired_at = timezone.now() - settings.IDEMPOTENCY_KEY_LIFETIME
+    with transaction.atomic():
+        deleted_count, _ = IdempotencyKey.objects.filter(
+            created_at__lt=expired_at,
+        ).delete()
+    return deleted_count
@@ -0,0 +1,349 @@
+"""Двухуровневый кеш проекта: LRU в памяти процесса перед общим кешем (Redis).
+
+Ключи разделены на пространства имён (namespace) с версией: увеличение версии
+(invalidate_namespace) сбрасывает сразу все ключи пространства. Удалённые
+ключи удаляются и из памяти остальных процессов через шину инвалидации
+(core.invalidation), а при её сбое значение в памяти процесса живёт не
+дольше LOCAL_TIMEOUT.
+
+Одновременное вычисление одного значения (cache stampede) предотвращается
+блокировкой в общем кеше: значение вычисляет один запрос, остальные ждут его.
+Незадолго до истечения значение пересчитывается заранее с вероятностью,
+растущей к моменту истечения (алгоритм XFetch), — пока один запрос
+пересчитывает значение, остальные получают текущее.
+
+Значения вычисляются по основной базе: реплика может отставать, и её данные
+вернули бы в общий кеш устаревшее значение после его удаления.
+"""
+import asyncio
+import math
+import random
+import threading
+import time
+from collections import OrderedDict
+from functools import lru_cache
+from typing import Any, NamedTuple
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import caches
+
+from core import invalidation, metrics
+from core.db.replicas import read_from_primary
+
+_MISSING = object()
+
+PROJECT_CACHE_NAME = 'project'
+
+
+class CacheEntry(NamedTuple):
+    value: Any
+    # время вычисления значения и момент его истечения, секунды
+    delta: float
+    expires_at: float
+
+
+class LocalLRUCache:
+    """Ограниченный по числу записей LRU-кеш процесса с временем жизни записей."""
+
+    def __init__(self, max_entries):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, default=_MISSING):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return default
+            value, expires_at = entry
+            if expires_at <= time.monotonic():
+                del self._entries[key]
+                return default
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key, value, timeout):
+        with self._lock:
+            self._entries[key] = (value, time.monotonic() + timeout)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def delete(self, key):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+
+class TwoTierCache:
+    """LocalLRUCache процесса перед кешем Django alias (см. описание модуля)."""
+
+    def __init__(  # noqa: WPS211
+        self,
+        alias,
+        local_max_entries=1000,
+        local_timeout=5,
+        lock_timeout=10,
+        lock_poll_interval=0.05,
+        early_expiration_beta=1.0,
+        invalidation_name=None,
+    ):
+        self.alias = alias
+        # имя кеша в шине инвалидации; None — не публиковать удаления
+        self.invalidation_name = invalidation_name
+        self.local = LocalLRUCache(local_max_entries)
+        self.local_timeout = local_timeout
+        self.lock_timeout = lock_timeout
+        self.lock_poll_interval = lock_poll_interval
+        self.early_expiration_beta = early_expiration_beta
+
+    @property
+    def remote(self):
+        return caches[self.alias]
+
+    def get_or_set(self, namespace, key, compute, timeout):
+        """Значение из кеша или вычисленное compute() и сохранённое на timeout секунд."""
+        started_at = time.perf_counter()
+        full_key = self.make_key(namespace, key)
+        found = self._get_or_compute(namespace, full_key, compute, timeout)
+        if found is None:
+            entry = self._wait_for_entry(full_key)
+            found = self._use_awaited_entry(namespace, full_key, compute, timeout, entry)
+        return self._record(namespace, *found, started_at)
+
+    async def aget_or_set(self, namespace, key, compute, timeout):
+        """Асинхронный get_or_set.
+
+        Значение, которое вычисляет другой запрос, ожидается через asyncio.sleep:
+        time.sleep в общем потоке thread-sensitive задач задержал бы все
+        асинхронные запросы воркера на время до lock_timeout.
+        """
+        started_at = time.perf_counter()
+        full_key = await sync_to_async(self.make_key)(namespace, key)
+        found = await sync_to_async(self._get_or_compute)(
+            namespace,
+            full_key,
+            compute,
+            timeout,
+        )
+        if found is None:
+            entry = await self._await_entry(full_key)
+            found = await sync_to_async(self._use_awaited_entry)(
+                namespace,
+                full_key,
+                compute,
+                timeout,
+                entry,
+            )
+        return self._record(namespace, *found, started_at)
+
+    def get_or_set_many(self, namespace, keys, compute_many, timeout):
+        """Словарь значений keys; недостающие вычисляются одним вызовом compute_many.
+
+        compute_many(missing_keys) возвращает словарь значений для всех переданных
+        ключей. Блокировки от одновременного вычисления нет: недостающие значения
+        вычисляет каждый запрос, который их не нашёл.
+        """
+        started_at = time.perf_counter()
+        full_keys = {key: self.make_key(namespace, key) for key in keys}
+        values = {}
+        for key, full_key in full_keys.items():
+            value = self.local.get(full_key)
+            if value is not _MISSING:
+                values[key] = value
+                metrics.CACHE_REQUESTS.labels(namespace, 'local_hit').inc()
+
+        remote_keys = [full_keys[key] for key in keys if key not in values]
+        entries = self.remote.get_many(remote_keys) if remote_keys else {}
+        for key in keys:
+            entry = entries.get(full_keys[key])
+            if key not in values and entry is not None:
+                self._set_local(full_keys[key], entry)
+                values[key] = entry.value
+                metrics.CACHE_REQUESTS.labels(namespace, 'remote_hit').inc()
+
+        missing_keys = [key for key in keys if key not in values]
+        if missing_keys:
+            values.update(
+                self._compute_many(
+                    namespace, full_keys, missing_keys, compute_many, timeout
+                ),
+            )
+        metrics.CACHE_GET_SECONDS.labels(namespace).observe(
+            time.perf_counter() - started_at,
+        )
+        return values
+
+    def delete(self, namespace, key):
+        self.delete_many(namespace, [key])
+
+    def delete_many(self, namespace, keys):
+        full_keys = [self.make_key(namespace, key) for key in keys]
+        self.evict_local(full_keys)
+        self.remote.delete_many(full_keys)
+        self._publish(full_keys)
+
+    def invalidate_namespace(self, namespace):
+        """Сбрасывает все ключи пространства имён увеличением его версии."""
+        version_key = self._get_version_key(namespace)
+        try:
+            version = self.remote.incr(version_key)
+        except ValueError:
+            self.remote.add(version_key, 1, None)
+            version = self.remote.incr(version_key)
+        self.local.set(version_key, version, self.local_timeout)
+        self._publish([version_key])
+
+    def evict_local(self, full_keys=None):
+        """Удаляет ключи (None — все) из памяти процесса."""
+        if full_keys is None:
+            self.local.clear()
+            return
+        for full_key in full_keys:
+            self.local.delete(full_key)
+
+    def clear(self):
+        self.local.clear()
+        self.remote.clear()
+
+    def make_key(self, namespace, key) -> str:
+        return f'{namespace}:{self._get_version(namespace)}:{key}'
+
+    def _get_version(self, namespace) -> int:
+        version_key = self._get_version_key(namespace)
+        version = self.local.get(version_key)
+        if version is _MISSING:
+            version = self.remote.get(version_key)
+            if version is None:
+                self.remote.add(version_key, 1, None)
+                version = self.remote.get(version_key, 1)
+            self.local.set(version_key, version, self.local_timeout)
+        return version
+
+    def _publish(self, full_keys):
+        if self.invalidation_name is not None:
+            invalidation.publish(self.invalidation_name, full_keys)
+
+    @staticmethod
+    def _get_version_key(namespace) -> str:
+        return f'version:{namespace}'
+
+    def _compute(self, namespace, full_key, compute, timeout):
+        started_at = time.perf_counter()
+        with read_from_primary():
+            value = compute()
+        delta = time.perf_counter() - started_at
+        metrics.CACHE_COMPUTE_SECONDS.labels(namespace).observe(delta)
+        entry = CacheEntry(value, delta, time.time() + timeout)
+        self.remote.set(full_key, entry, timeout)
+        self._set_local(full_key, entry)
+        return value
+
+    def _compute_many(self, namespace, full_keys, keys, compute_many, timeout):
+        started_at = time.perf_counter()
+        with read_from_primary():
+            values = compute_many(keys)
+        delta = time.perf_counter() - started_at
+        metrics.CACHE_COMPUTE_SECONDS.labels(namespace).observe(delta)
+        expires_at = time.time() + timeout
+        entries = {
+            full_keys[key]: CacheEntry(values[key], delta, expires_at) for key in keys
+        }
+        self.remote.set_many(entries, timeout)
+        for full_key, entry in entries.items():
+            self._set_local(full_key, entry)
+        metrics.CACHE_REQUESTS.labels(namespace, 'miss').inc(len(keys))
+        return values
+
+    def _expires_early(self, entry) -> bool:
+        """XFetch: пересчитывать ли значение до истечения (тем вероятнее, чем ближе)."""
+        log_random = math.log(1 - random.random())  # noqa: S311
+        early_by = -entry.delta * self.early_expiration_beta * log_random
+        return time.time() + early_by >= entry.expires_at
+
+    def _set_local(self, full_key, entry):
+        timeout = min(self.local_timeout, entry.expires_at - time.time())
+        if timeout > 0:
+            self.local.set(full_key, entry.value, timeout)
+
+    def _get_or_compute(self, namespace, full_key, compute, timeout):
+        """Результат запроса и значение из кеша или вычисленное под блокировкой.
+
+        None — значение вычисляет другой запрос, его нужно дождаться.
+        """
+        value = self.local.get(full_key)
+        if value is not _MISSING:
+            return 'local_hit', value
+
+        entry = self.remote.get(full_key)
+        if entry is not None and not self._expires_early(entry):
+            self._set_local(full_key, entry)
+            return 'remote_hit', entry.value
+
+        lock_key = f'lock:{full_key}'
+        if self.remote.add(lock_key, 1, self.lock_timeout):
+            try:
+                value = self._compute(namespace, full_key, compute, timeout)
+            finally:
+                self.remote.delete(lock_key)
+            return 'miss' if entry is None else 'early_recompute', value
+
+        if entry is not None:
+            # значение уже пересчитывает другой запрос
+            return 'remote_hit', entry.value
+        return None
+
+    def _use_awaited_entry(self, namespace, full_key, compute, timeout, entry):
+        if entry is not None:
+            self._set_local(full_key, entry)
+            return 'lock_wait', entry.value
+        # вычислявший значение запрос не успел или завершился с ошибкой
+        return 'miss', self._compute(namespace, full_key, compute, timeout)
+
+    def _wait_for_entry(self, full_key):
+        deadline = time.monotonic() + self.lock_timeout
+        while time.monotonic() < deadline:
+            time.sleep(self.lock_poll_interval)
+            entry = self.remote.get(full_key)
+            if entry is not None:
+                return entry
+        return None
+
+    async def _await_entry(self, full_key):
+        deadline = time.monotonic() + self.lock_timeout
+        while time.monotonic() < deadline:
+            await asyncio.sleep(self.lock_poll_interval)
+            entry = await self.remote.aget(full_key)
+            if entry is not None:
+                return entry
+        return None
+
+    @staticmethod
+    def _record(namespace, result, value, started_at):
+        metrics.CACHE_REQUESTS.labels(namespace, result).inc()
+        metrics.CACHE_GET_SECONDS.labels(namespace).observe(
+            time.perf_counter() - started_at,
+        )
+        return value
+
+
+@lru_cache(maxsize=None)
+def get_project_cache() -> TwoTierCache:
+    options = settings.PROJECT_CACHE
+    project_cache = TwoTierCache(
+        options['ALIAS'],
+        local_max_entries=options['LOCAL_MAX_ENTRIES'],
+        local_timeout=options['LOCAL_TIMEOUT'],
+        lock_timeout=options['LOCK_TIMEOUT'],
+        early_expiration_beta=options['EARLY_EXPIRATION_BETA'],
+        invalidation_name=PROJECT_CACHE_NAME,
+    )
+    invalidation.register_handler(PROJECT_CACHE_NAME, project_cache.evict_local)
+    return project_cache
@@ -0,0 +1,42 @@
+from functools import partial
+
+from django.db.backends.base.base import NO_DB_ALIAS
+from django.db.backends.postgresql import base
+
+from core.db.backends.postgresql.creation import DatabaseCreation
+from core.db.backends.postgresql.pool import get_pool
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    """PostgreSQL с пулом соединений процесса.
+
+    Параметры пула задаются в DATABASES[alias]['POOL'] (MIN_SIZE, MAX_SIZE,
+    TIMEOUT, MAX_LIFETIME, MAX_IDLE, CHECK_IDLE, см. ConnectionPool); без
+    POOL соединения открываются и закрываются как в стандартном бэкенде.
+    CONN_MAX_AGE с пулом должен быть 0: закрытие соединения в конце запроса
+    возвращает его в пул.
+    """
+
+    creation_class = DatabaseCreation
+
+    pool = None
+
+    def get_new_connection(self, conn_params):
+        options = self.settings_dict.get('POOL')
+        if not options or self.alias == NO_DB_ALIAS:
+            self.pool = None
+            return super().get_new_connection(conn_params)
+        self.pool = get_pool(
+            self.alias,
+            conn_params,
+            {name.lower(): value for name, value in options.items()},
+        )
+        return self.pool.getconn(partial(super().get_new_connection, conn_params))
+
+    def _close(self):
+        if self.connection is None or self.pool is None:
+            return super()._close()
+        with self.wrap_database_errors:
+            # соединение, закрытое внутри atomic, остаётся у обёртки до выхода
+            # из блока, поэтому в пул не возвращается
+            self.pool.putconn(self.connection, discard=self.in_atomic_block)
@@ -0,0 +1,19 @@
+from django.db.backends.postgresql import creation
+
+from core.db.backends.postgresql.pool import close_pools
+
+
+class DatabaseCreation(creation.DatabaseCreation):
+    """Перед удалением и копированием тестовой базы закрывает соединения пула.
+
+    PostgreSQL не удаляет базу и не использует её как шаблон, пока к ней
+    есть подключения.
+    """
+
+    def _clone_test_db(self, suffix, verbosity, keepdb=False):
+        close_pools(self.connection.alias)
+        super()._clone_test_db(suffix, verbosity, keepdb)
+
+    def _destroy_test_db(self, test_database_name, verbosity):
+        close_pools(self.connection.alias)
+        super()._destroy_test_db(test_database_name, verbosity)
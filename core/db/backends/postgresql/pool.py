@@ -0,0 +1,227 @@
+import os
+import threading
+import time
+from collections import deque
+
+from psycopg2 import OperationalError
+from psycopg2.extensions import (
+    TRANSACTION_STATUS_IDLE,
+    TRANSACTION_STATUS_UNKNOWN,
+)
+
+from core import metrics
+
+_pools = {}
+_pools_lock = threading.Lock()
+_pools_pid = os.getpid()
+
+
+class ConnectionPool:
+    """Пул соединений psycopg2 одного процесса.
+
+    Соединение выдаётся вместо нового подключения, когда Django открывает
+    соединение, и возвращается в пул, когда Django его закрывает (в конце
+    запроса или задачи celery). Выдаётся последнее возвращённое соединение.
+
+    Соединение закрывается, а не возвращается в пул, если оно сломано, не
+    откатывается незавершённая транзакция или прожито больше max_lifetime.
+    Соединение, простоявшее в пуле дольше check_idle, перед выдачей
+    проверяется запросом SELECT 1. Свободные соединения сверх min_size
+    закрываются после max_idle простоя. Если все max_size соединений заняты,
+    запрос ждёт не дольше timeout и получает OperationalError.
+    """
+
+    def __init__(  # noqa: WPS211
+        self,
+        alias,
+        min_size=1,
+        max_size=10,
+        timeout=30,
+        max_lifetime=3600,
+        max_idle=600,
+        check_idle=30,
+    ):
+        self.alias = alias
+        self.min_size = min_size
+        self.max_size = max_size
+        self.timeout = timeout
+        self.max_lifetime = max_lifetime
+        self.max_idle = max_idle
+        self.check_idle = check_idle
+        self.pid = os.getpid()
+        self.closed = False
+        # (соединение, время возврата в пул) в порядке возврата
+        self._idle = deque()
+        self._opened_at = {}
+        self._size = 0
+        self._condition = threading.Condition()
+
+    @property
+    def size(self) -> int:
+        return self._size
+
+    @property
+    def idle_size(self) -> int:
+        return len(self._idle)
+
+    def getconn(self, connect):
+        """Свободное соединение пула или новое, открытое функцией connect()."""
+        started_at = time.monotonic()
+        while True:
+            connection, returned_at = self._acquire(started_at + self.timeout)
+            if connection is None:
+                return self._open(connect, started_at)
+            if time.monotonic() - returned_at < self.check_idle:
+                break
+            if self._is_alive(connection):
+                break
+            self._discard(connection, 'health_check')
+        metrics.DB_POOL_WAIT_SECONDS.labels(self.alias).observe(
+            time.monotonic() - started_at,
+        )
+        return connection
+
+    def putconn(self, connection, discard=False):
+        """Возвращает соединение в пул или закрывает его."""
+        if self.pid != os.getpid():
+            # соединение родительского процесса: закрытие оборвало бы его и там
+            return
+        if discard or self.closed:
+            reason = 'closed'
+        else:
+            reason = self._get_discard_reason(connection)
+        if reason is not None:
+            self._discard(connection, reason)
+            return
+        with self._condition:
+            now = time.monotonic()
+            self._idle.append((connection, now))
+            expired = []
+            while (
+                self._size - len(expired) > self.min_size
+                and now - self._idle[0][1] > self.max_idle
+            ):
+                expired.append(self._idle.popleft()[0])
+            self._condition.notify()
+            self._update_gauges()
+        for expired_connection in expired:
+            self._discard(expired_connection, 'idle')
+
+    def close(self):
+        """Закрывает свободные соединения; выданные закроются при возврате."""
+        with self._condition:
+            self.closed = True
+            idle = [connection for connection, _ in self._idle]
+            self._idle.clear()
+        for connection in idle:
+            self._discard(connection, 'closed')
+
+    def _acquire(self, deadline):
+        with self._condition:
+            while True:
+                if self._idle:
+                    connection, returned_at = self._idle.pop()
+                    self._update_gauges()
+                    return connection, returned_at
+                if self._size < self.max_size:
+                    # соединение открывается вне блокировки
+                    self._size += 1
+                    return None, None
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    metrics.DB_POOL_TIMEOUTS.labels(self.alias).inc()
+                    raise OperationalError(
+                        f'Connection pool {self.alias!r} exhausted: '
+                        f'no connection available in {self.timeout} s.',
+                    )
+                self._condition.wait(remaining)
+
+    def _open(self, connect, started_at):
+        try:
+            connection = connect()
+        except Exception:
+            with self._condition:
+                self._size -= 1
+                self._condition.notify()
+            raise
+        with self._condition:
+            self._opened_at[connection] = time.monotonic()
+            self._update_gauges()
+        metrics.DB_POOL_OPENED.labels(self.alias).inc()
+        metrics.DB_POOL_WAIT_SECONDS.labels(self.alias).observe(
+            time.monotonic() - started_at,
+        )
+        return connection
+
+    def _discard(self, connection, reason):
+        try:
+            connection.close()
+        except Exception:  # noqa: S110
+            pass
+        with self._condition:
+            self._opened_at.pop(connection, None)
+            self._size -= 1
+            self._condition.notify()
+            self._update_gauges()
+        metrics.DB_POOL_DISCARDED.labels(self.alias, reason).inc()
+
+    def _get_discard_reason(self, connection):
+        if connection.closed:
+            return 'broken'
+        with self._condition:
+            opened_at = self._opened_at.get(connection, 0)
+        if time.monotonic() - opened_at > self.max_lifetime:
+            return 'lifetime'
+        status = connection.get_transaction_status()
+        if status == TRANSACTION_STATUS_UNKNOWN:
+            return 'broken'
+        if status != TRANSACTION_STATUS_IDLE:
+            try:
+                connection.rollback()
+            except Exception:
+                return 'broken'
+        return None
+
+    @staticmethod
+    def _is_alive(connection) -> bool:
+        try:
+            with connection.cursor() as cursor:
+                cursor.execute('SELECT 1')
+            if connection.get_transaction_status() != TRANSACTION_STATUS_IDLE:
+                connection.rollback()
+        except Exception:
+            return False
+        return True
+
+    def _update_gauges(self):
+        metrics.DB_POOL_CONNECTIONS.labels(self.alias, 'idle').set(len(self._idle))
+        metrics.DB_POOL_CONNECTIONS.labels(self.alias, 'used').set(
+            self._size - len(self._idle),
+        )
+
+
+def get_pool(alias, conn_params, options) -> ConnectionPool:
+    """Пул процесса для соединений с параметрами conn_params.
+
+    В дочернем процессе (gunicorn, celery prefork) пулы родителя не
+    используются и не закрываются — создаются новые.
+    """
+    global _pools_pid
+    key = (alias, repr(sorted(conn_params.items())))
+    with _pools_lock:
+        if _pools_pid != os.getpid():
+            _pools.clear()
+            _pools_pid = os.getpid()
+        pool = _pools.get(key)
+        if pool is None:
+            pool = ConnectionPool(alias, **options)
+            _pools[key] = pool
+        return pool
+
+
+def close_pools(alias=None):
+    with _pools_lock:
+        keys = [key for key in _pools if alias is None or key[0] == alias]
+        pools = [_pools.pop(key) for key in keys]
+    for pool in pools:
+        pool.close()
@@ -0,0 +1,56 @@
+import random
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.core.cache import caches
+
+from core.utils import get_client_ip
+
+# чтение из реплик включается только на время безопасного запроса к API
+_read_from_replicas = ContextVar('read_from_replicas', default=False)
+
+
+def set_read_from_replicas(value: bool):
+    _read_from_replicas.set(value)
+
+
+def get_read_replica():
+    """Алиас реплики для чтения или None, если читать нужно из основной базы."""
+    if not _read_from_replicas.get() or not settings.DATABASE_REPLICAS:
+        return None
+    return random.choice(settings.DATABASE_REPLICAS)  # noqa: S311
+
+
+@contextmanager
+def read_from_primary():
+    """Временно читает из основной базы, даже если запрос читает из реплик."""
+    token = _read_from_replicas.set(False)
+    try:
+        yield
+    finally:
+        _read_from_replicas.reset(token)
+
+
+def _get_pin_key(request) -> str:
+    user = getattr(request, 'user', None)
+    if user is not None and user.is_authenticated:
+        return f'primary_pin:user:{user.pk}'
+    return f'primary_pin:ip:{get_client_ip(request)}'
+
+
+def pin_to_primary(request):
+    """Закрепляет чтение автора запроса за основной базой на REPLICA_PIN_TIMEOUT.
+
+    Реплики отстают от основной базы, а пользователь должен сразу видеть
+    свои голоса, комментарии и другие изменения.
+    """
+    caches[settings.REPLICA_PIN_CACHE_ALIAS].set(
+        _get_pin_key(request),
+        True,
+        settings.REPLICA_PIN_TIMEOUT,
+    )
+
+
+def is_pinned_to_primary(request) -> bool:
+    return bool(caches[settings.REPLICA_PIN_CACHE_ALIAS].get(_get_pin_key(request)))
@@ -0,0 +1,25 @@
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS
+
+from core.db.replicas import get_read_replica
+
+
+class ReplicaRouter:
+    """Запись — в основную базу, чтение в безопасных запросах — из реплик.
+
+    Из реплик читают только запросы, для которых это включено
+    (api.mixins.ReplicaReadMixin), остальное чтение идёт в основную базу.
+    """
+
+    def db_for_read(self, model, **hints):
+        return get_read_replica()
+
+    def db_for_write(self, model, **hints):
+        # без явного ответа запись ушла бы в базу объекта, прочитанного из реплики
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        databases = {DEFAULT_DB_ALIAS, *settings.DATABASE_REPLICAS}
+        if obj1._state.db in databases and obj2._state.db in databases:
+            return True
+        return None
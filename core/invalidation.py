@@ -0,0 +1,150 @@
+"""Шина инвалидации кешей в памяти процессов.
+
+Кеши в памяти процесса (локальный уровень кеша проекта, пользователи токенов
+API) у остальных воркеров gunicorn и на других серверах устаревают, когда
+данные меняются. Изменение публикуется событием в канал Redis pub/sub, каждый
+процесс слушает канал в фоновом потоке и удаляет затронутые ключи своих
+кешей — обычно через миллисекунды после публикации.
+
+Пропущенные при обрыве связи с Redis события не восстанавливаются: после
+переподключения процесс очищает свои кеши целиком. Без Redis (разработка,
+тесты) используется LocalInvalidationBus, доставляющая события в пределах
+процесса. В любом случае записи кешей процессов живут ограниченное время.
+"""
+import json
+import logging
+import os
+import threading
+import time
+from functools import lru_cache
+
+import redis
+from django.conf import settings
+
+from core import metrics
+
+logger = logging.getLogger(__name__)
+
+# имя кеша -> функция удаления его ключей (None — всех)
+_handlers = {}
+
+
+def register_handler(cache_name, evict):
+    """Удаление ключей кеша cache_name функцией evict(keys) по событиям шины."""
+    _handlers[cache_name] = evict
+
+
+def publish(cache_name, keys=None):
+    """Публикует событие: все процессы удалят keys (None — все ключи) кеша."""
+    message = json.dumps(
+        {'cache': cache_name, 'keys': keys, 'sent_at': time.time()},
+    )
+    get_invalidation_bus().publish(message)
+
+
+def dispatch(message):
+    """Удаляет ключи по событию шины и учитывает задержку его доставки."""
+    event = json.loads(message)
+    metrics.INVALIDATION_LAG_SECONDS.labels(event['cache']).observe(
+        max(time.time() - event['sent_at'], 0),
+    )
+    evict = _handlers.get(event['cache'])
+    if evict is not None:
+        evict(event['keys'])
+
+
+def evict_all():
+    for evict in list(_handlers.values()):
+        evict(None)
+
+
+class LocalInvalidationBus:
+    """Доставка событий в пределах процесса — замена Redis для разработки и тестов."""
+
+    def publish(self, message):
+        dispatch(message)
+
+    def start(self):
+        """Подписка не нужна: события доставляются при публикации."""
+
+
+class RedisInvalidationBus:
+    """Доставка событий всем процессам через канал Redis pub/sub."""
+
+    def __init__(self, url, channel, reconnect_interval=1.0):
+        self.url = url
+        self.channel = channel
+        self.reconnect_interval = reconnect_interval
+        self._client = None
+        self._thread = None
+        self._pid = None
+        self._lock = threading.Lock()
+
+    @property
+    def client(self):
+        if self._client is None:
+            self._client = redis.Redis.from_url(self.url)
+        return self._client
+
+    def publish(self, message):
+        try:
+            self.client.publish(self.channel, message)
+        except redis.RedisError:
+            # изменение уже сохранено; кеши процессов устареют не дольше своего
+            # времени жизни
+            metrics.INVALIDATION_PUBLISH_ERRORS.inc()
+            logger.warning('Не удалось опубликовать событие инвалидации', exc_info=True)
+
+    def start(self):
+        """Запускает поток подписки, если он не запущен в текущем процессе.
+
+        Поток родительского процесса не переживает fork (gunicorn --preload,
+        celery prefork), поэтому проверяется pid.
+        """
+        with self._lock:
+            if (
+                self._pid == os.getpid()
+                and self._thread is not None
+                and self._thread.is_alive()
+            ):
+                return
+            self._pid = os.getpid()
+            self._thread = threading.Thread(
+                target=self._listen,
+                name='invalidation-bus',
+                daemon=True,
+            )
+            self._thread.start()
+
+    def _listen(self):
+        is_reconnect = False
+        while True:
+            try:
+                pubsub = self.client.pubsub(ignore_subscribe_messages=True)
+                pubsub.subscribe(self.channel)
+                if is_reconnect:
+                    evict_all()
+                for message in pubsub.listen():
+                    if message['type'] == 'message':
+                        self._dispatch(message['data'])
+            except redis.RedisError:
+                logger.warning('Потеряна подписка на шину инвалидации', exc_info=True)
+            is_reconnect = True
+            time.sleep(self.reconnect_interval)
+
+    @staticmethod
+    def _dispatch(message):
+        try:
+            dispatch(message)
+        except Exception:
+            logger.exception('Ошибка обработки события инвалидации')
+
+
+@lru_cache(maxsize=None)
+def get_invalidation_bus():
+    if settings.INVALIDATION_BUS_URL:
+        return RedisInvalidationBus(
+            settings.INVALIDATION_BUS_URL,
+            settings.INVALIDATION_BUS_CHANNEL,
+        )
+    return LocalInvalidationBus()
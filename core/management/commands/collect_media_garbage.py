@@ -0,0 +1,24 @@
+from django.core.management.base import BaseCommand
+
+from core.storage import collect_media_garbage
+
+
+class Command(BaseCommand):
+    help = 'Удаляет из media файлы, на которые не ссылается ни одна запись.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Только посчитать файлы, не удаляя их.',
+        )
+
+    def handle(self, *args, **options):
+        self.stdout.write('Media garbage collection commenced...')
+        deleted_count, deleted_size = collect_media_garbage(
+            dry_run=options['dry_run'],
+        )
+        self.stdout.write(
+            f'Successfully collected media garbage '
+            f'(files: {deleted_count}, bytes: {deleted_size})',
+        )
@@ -0,0 +1,97 @@
+"""Метрики процесса в формате Prometheus.
+
+При нескольких воркерах gunicorn (и процессах celery) значения собираются
+через каталог PROMETHEUS_MULTIPROC_DIR, см. prometheus_client.multiprocess.
+"""
+import os
+
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    REGISTRY,
+    CollectorRegistry,
+    Counter,
+    Gauge,
+    Histogram,
+    generate_latest,
+)
+from prometheus_client.multiprocess import MultiProcessCollector
+
+DB_POOL_WAIT_SECONDS = Histogram(
+    'db_pool_wait_seconds',
+    'Время ожидания соединения из пула.',
+    ('alias',),
+    buckets=(0.001, 0.005, 0.01, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10),
+)
+DB_POOL_TIMEOUTS = Counter(
+    'db_pool_timeouts',
+    'Запросы соединения, не дождавшиеся свободного соединения в пуле.',
+    ('alias',),
+)
+DB_POOL_CONNECTIONS = Gauge(
+    'db_pool_connections',
+    'Открытые соединения пула: state=idle — свободные, state=used — выданные.',
+    ('alias', 'state'),
+    multiprocess_mode='livesum',
+)
+DB_POOL_OPENED = Counter(
+    'db_pool_connections_opened',
+    'Открытые пулом соединения.',
+    ('alias',),
+)
+DB_POOL_DISCARDED = Counter(
+    'db_pool_connections_discarded',
+    'Закрытые пулом соединения по причинам: lifetime, idle, broken, '
+    'health_check, closed.',
+    ('alias', 'reason'),
+)
+
+CACHE_REQUESTS = Counter(
+    'project_cache_requests',
+    'Запросы к кешу проекта по результату: local_hit, remote_hit, lock_wait, '
+    'miss, early_recompute.',
+    ('namespace', 'result'),
+)
+CACHE_GET_SECONDS = Histogram(
+    'project_cache_get_seconds',
+    'Время получения значения из кеша проекта, включая вычисление при промахе.',
+    ('namespace',),
+)
+CACHE_COMPUTE_SECONDS = Histogram(
+    'project_cache_compute_seconds',
+    'Время вычисления значения при промахе кеша проекта.',
+    ('namespace',),
+)
+
+INVALIDATION_LAG_SECONDS = Histogram(
+    'cache_invalidation_lag_seconds',
+    'Задержка от публикации события инвалидации до удаления ключей в процессе.',
+    ('cache',),
+    buckets=(0.001, 0.005, 0.01, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5),
+)
+INVALIDATION_PUBLISH_ERRORS = Counter(
+    'cache_invalidation_publish_errors',
+    'События инвалидации, которые не удалось опубликовать.',
+)
+
+THROTTLE_REJECTIONS = Counter(
+    'api_throttle_rejections',
+    'Запросы к API, отклонённые ограничением частоты (429), по областям.',
+    ('scope',),
+)
+THROTTLE_ERRORS = Counter(
+    'api_throttle_errors',
+    'Проверки ограничения частоты, пропущенные из-за недоступности Redis.',
+    ('scope',),
+)
+
+
+def get_metrics_registry():
+    if 'PROMETHEUS_MULTIPROC_DIR' in os.environ:
+        registry = CollectorRegistry()
+        MultiProcessCollector(registry)
+        return registry
+    return REGISTRY
+
+
+def render_metrics() -> tuple[bytes, str]:
+    return generate_latest(get_metrics_registry()), CONTENT_TYPE_LATEST
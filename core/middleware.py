@@ -0,0 +1,41 @@
+from django.conf import settings
+from rest_framework.permissions import SAFE_METHODS
+
+from core.db.replicas import pin_to_primary
+from core.invalidation import get_invalidation_bus
+
+
+class PrimaryPinMiddleware:
+    """После успешного изменяющего запроса чтение пользователя идёт из основной базы.
+
+    Пользователь API определяется DRF во время обработки запроса, поэтому
+    проверяется после получения ответа.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        response = self.get_response(request)
+        if (
+            settings.DATABASE_REPLICAS
+            and request.method not in SAFE_METHODS
+            and response.status_code < 400
+        ):
+            pin_to_primary(request)
+        return response
+
+
+class InvalidationBusMiddleware:
+    """Подписывает процесс на шину инвалидации кешей при первом запросе.
+
+    Проверка выполняется на каждом запросе: подписка родительского процесса
+    не переживает fork воркера.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        get_invalidation_bus().start()
+        return self.get_response(request)
@@ -0,0 +1,89 @@
+"""Ограничение частоты запросов алгоритмом token bucket.
+
+У каждого ключа есть корзина на capacity жетонов, которая пополняется
+со скоростью rate жетонов в секунду; запрос забирает жетон или отклоняется.
+Корзины хранятся в Redis, и проверка — один вызов Lua-скрипта, атомарный для
+всех процессов. Без Redis (разработка, тесты) корзины хранятся в памяти
+процесса (LocalTokenBucket).
+"""
+import math
+import threading
+import time
+from functools import lru_cache
+
+import redis
+from django.conf import settings
+
+from core.cache import LocalLRUCache
+
+# время берётся у Redis, чтобы часы серверов приложения не влияли на лимит
+TOKEN_BUCKET_SCRIPT = """
+if redis.replicate_commands then
+    redis.replicate_commands()
+end
+local rate = tonumber(ARGV[1])
+local capacity = tonumber(ARGV[2])
+local time = redis.call('TIME')
+local now = tonumber(time[1]) + tonumber(time[2]) / 1000000
+local bucket = redis.call('HMGET', KEYS[1], 'tokens', 'updated_at')
+local tokens = tonumber(bucket[1]) or capacity
+local updated_at = tonumber(bucket[2]) or now
+tokens = math.min(capacity, tokens + math.max(now - updated_at, 0) * rate)
+local allowed = 0
+local wait = 0
+if tokens >= 1 then
+    tokens = tokens - 1
+    allowed = 1
+else
+    wait = (1 - tokens) / rate
+end
+redis.call('HSET', KEYS[1], 'tokens', tostring(tokens), 'updated_at', tostring(now))
+redis.call('EXPIRE', KEYS[1], math.ceil(capacity / rate) + 1)
+return {allowed, tostring(wait)}
+"""
+
+
+class RedisTokenBucket:
+    """Корзины в Redis, общие для всех процессов."""
+
+    def __init__(self, url, key_prefix='ratelimit'):
+        self.key_prefix = key_prefix
+        self._client = redis.Redis.from_url(url)
+        self._script = self._client.register_script(TOKEN_BUCKET_SCRIPT)
+
+    def consume(self, key, rate, capacity) -> tuple[bool, float]:
+        """Забирает жетон: (разрешён ли запрос, через сколько секунд появится жетон)."""
+        allowed, wait = self._script(
+            keys=[f'{self.key_prefix}:{key}'],
+            args=[rate, capacity],
+        )
+        return bool(allowed), float(wait)
+
+
+class LocalTokenBucket:
+    """Корзины в памяти процесса — замена Redis для разработки и тестов."""
+
+    def __init__(self, max_entries=100000):
+        self._buckets = LocalLRUCache(max_entries)
+        self._lock = threading.Lock()
+
+    def consume(self, key, rate, capacity) -> tuple[bool, float]:
+        with self._lock:
+            now = time.monotonic()
+            tokens, updated_at = self._buckets.get(key, (capacity, now))
+            tokens = min(capacity, tokens + (now - updated_at) * rate)
+            allowed = tokens >= 1
+            if allowed:
+                tokens -= 1
+            self._buckets.set(key, (tokens, now), math.ceil(capacity / rate) + 1)
+        return allowed, 0 if allowed else (1 - tokens) / rate
+
+    def clear(self):
+        self._buckets.clear()
+
+
+@lru_cache(maxsize=None)
+def get_token_bucket():
+    if settings.RATE_LIMIT_REDIS_URL:
+        return RedisTokenBucket(settings.RATE_LIMIT_REDIS_URL)
+    return LocalTokenBucket()
@@ -0,0 +1,95 @@
+import io
+import os
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from PIL import Image, ImageOps
+
+RENDITION_EXTENSIONS = {'webp': 'webp', 'jpeg': 'jpg'}
+
+
+def get_rendition_name(name: str, rendition: str, image_format: str) -> str:
+    """Имя файла варианта рядом с оригиналом: images/photo.300x300q80.thumb.webp.
+
+    Размеры и качество входят в имя, поэтому содержимое файла с этим именем
+    не меняется и вариант можно переиспользовать для одинаковых оригиналов.
+    """
+    root, _ = os.path.splitext(name)
+    width, height = settings.IMAGE_RENDITIONS[rendition]
+    params = f'{width}x{height}q{settings.IMAGE_RENDITION_QUALITY}'
+    return f'{root}.{params}.{rendition}.{RENDITION_EXTENSIONS[image_format]}'
+
+
+def _render(image, size, image_format) -> bytes:
+    rendition = image.copy()
+    rendition.thumbnail(size, Image.LANCZOS)
+    if rendition.mode not in {'RGB', 'L'}:
+        rendition = rendition.convert('RGB')
+    buffer = io.BytesIO()
+    rendition.save(
+        buffer,
+        format=image_format.upper(),
+        quality=settings.IMAGE_RENDITION_QUALITY,
+        optimize=True,
+    )
+    return buffer.getvalue()
+
+
+def create_renditions(field_file) -> dict:
+    """Создаёт варианты изображения фиксированных размеров во всех форматах.
+
+    Возвращает карту вариантов {'source': оригинал, 'thumb': {'webp': имя, ...}}.
+    Уже существующие варианты (того же оригинала) не пересоздаются.
+    """
+    storage = field_file.storage
+    image = None
+    renditions = {'source': field_file.name}
+    for rendition, size in settings.IMAGE_RENDITIONS.items():
+        renditions[rendition] = {}
+        for image_format in settings.IMAGE_RENDITION_FORMATS:
+            name = get_rendition_name(field_file.name, rendition, image_format)
+            if not storage.exists(name):
+                if image is None:
+                    with storage.open(field_file.name) as source:
+                        image = ImageOps.exif_transpose(Image.open(source))
+                        image.load()
+                name = storage.save(
+                    name,
+                    ContentFile(_render(image, size, image_format)),
+                )
+            renditions[rendition][image_format] = name
+    return renditions
+
+
+def get_rendition_names(renditions: dict) -> list:
+    """Имена файлов всех вариантов из карты вариантов (без оригинала)."""
+    return [
+        name
+        for rendition, names in renditions.items()
+        if rendition != 'source'
+        for name in names.values()
+    ]
+
+
+def update_renditions(instance, field_name: str):
+    """Пересоздаёт варианты изображения из поля модели и сохраняет их карту.
+
+    Карта сохраняется, только если изображение не сменилось, пока создавались
+    варианты. Файлы прежних и несохранённых вариантов остаются без ссылок
+    и удаляются сборщиком мусора media (core.storage.collect_media_garbage).
+    """
+    field_file = getattr(instance, field_name)
+    renditions_field = f'{field_name}_renditions'
+    renditions = create_renditions(field_file) if field_file else {}
+
+    type(instance).objects.filter(
+        pk=instance.pk,
+        **{field_name: field_file.name},
+    ).update(**{renditions_field: renditions})
+    return renditions
+
+
+def needs_renditions(instance, field_name: str) -> bool:
+    """Изображение загружено или сменилось после создания вариантов."""
+    renditions = getattr(instance, f'{field_name}_renditions')
+    return getattr(instance, field_name).name != renditions.get('source', '')
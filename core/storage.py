@@ -0,0 +1,121 @@
+import hashlib
+import os
+import re
+import time
+from collections import Counter
+
+from django.apps import apps
+from django.conf import settings
+from django.core.files import File
+from django.core.files.storage import FileSystemStorage, default_storage
+from django.db import models
+
+from core.renditions import get_rendition_names
+
+CONTENT_HASH_LENGTH = 32
+CONTENT_HASHED_NAME_PATTERN = re.compile(
+    rf'^[0-9a-f]{{{CONTENT_HASH_LENGTH}}}(?:[._]|$)',
+)
+
+
+def get_content_hash(content) -> str:
+    """sha256 содержимого файла (усечённый), файл читается по частям."""
+    content_hash = hashlib.sha256()
+    for chunk in content.chunks():
+        content_hash.update(chunk)
+    content.seek(0)
+    return content_hash.hexdigest()[:CONTENT_HASH_LENGTH]
+
+
+def is_content_hashed(name: str) -> bool:
+    """Имя получено из хеша содержимого (в том числе имена вариантов изображения)."""
+    return bool(CONTENT_HASHED_NAME_PATTERN.match(os.path.basename(name)))
+
+
+class ContentHashedStorage(FileSystemStorage):
+    """Файлы сохраняются под именами из хеша содержимого: images/<sha256>.jpg.
+
+    Содержимое файла с таким именем никогда не меняется, поэтому его можно
+    кешировать бессрочно (Cache-Control: immutable). Имена, уже начинающиеся
+    с хеша (варианты изображения images/<sha256>.thumb.webp), не меняются.
+
+    Одинаковое содержимое хранится один раз: повторное сохранение возвращает
+    имя уже записанного файла. Поэтому файл может принадлежать нескольким
+    записям, и delete() его не удаляет — файлы без ссылок из базы удаляет
+    collect_media_garbage().
+    """
+
+    def save(self, name, content, max_length=None):
+        if name is None:
+            name = content.name
+        if not hasattr(content, 'chunks'):
+            content = File(content, name)
+        if not is_content_hashed(name):
+            directory, file_name = os.path.split(name)
+            extension = os.path.splitext(file_name)[1].lower()
+            name = os.path.join(directory, get_content_hash(content) + extension)
+        if self.exists(name):
+            # файл мог устареть для сборщика мусора, пока на него не было ссылок
+            os.utime(self.path(name))
+            return name
+        return super().save(name, content, max_length)
+
+    def delete(self, name):
+        """Не удаляет файл: на него могут ссылаться другие записи."""
+
+
+def get_media_references() -> Counter:
+    """Количество ссылок из базы на каждый файл хранилища с адресацией по содержимому.
+
+    Учитываются значения всех файловых полей моделей и имена вариантов
+    изображений из соседних полей <поле>_renditions.
+    """
+    references = Counter()
+    for model in apps.get_models():
+        for field in model._meta.concrete_fields:
+            if not isinstance(field, models.FileField):
+                continue
+            if not isinstance(field.storage, ContentHashedStorage):
+                continue
+            queryset = model._base_manager.exclude(**{field.name: ''})
+            references.update(
+                queryset.values_list(field.name, flat=True).iterator(),
+            )
+            renditions_field = f'{field.name}_renditions'
+            if any(f.name == renditions_field for f in model._meta.concrete_fields):
+                for renditions in queryset.values_list(
+                    renditions_field,
+                    flat=True,
+                ).iterator():
+                    references.update(get_rendition_names(renditions or {}))
+    return references
+
+
+def collect_media_garbage(dry_run: bool = False) -> tuple[int, int]:
+    """Удаляет из media файлы без ссылок из базы. Возвращает (число файлов, байт).
+
+    Рассматриваются только файлы с именами из хеша содержимого: остальные
+    (например, загруженные через mdeditor) базе не известны. Файлы моложе
+    MEDIA_GC_GRACE_PERIOD не удаляются — ссылка на только что сохранённый
+    файл может быть ещё не записана в базу.
+    """
+    if not isinstance(default_storage, ContentHashedStorage):
+        return 0, 0
+
+    references = get_media_references()
+    expired_at = time.time() - settings.MEDIA_GC_GRACE_PERIOD.total_seconds()
+    deleted_count = deleted_size = 0
+    for root, _, file_names in os.walk(default_storage.location):
+        for file_name in file_names:
+            if not is_content_hashed(file_name):
+                continue
+            path = os.path.join(root, file_name)
+            name = os.path.relpath(path, default_storage.location).replace(os.sep, '/')
+            stat = os.stat(path)
+            if name in references or stat.st_mtime > expired_at:
+                continue
+            if not dry_run:
+                os.remove(path)
+            deleted_count += 1
+            deleted_size += stat.st_size
+    return deleted_count, deleted_size
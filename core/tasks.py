@@ -0,0 +1,8 @@
+from celery import shared_task
+
+from core.storage import collect_media_garbage
+
+
+@shared_task
+def collect_media_garbage_task():
+    collect_media_garbage()
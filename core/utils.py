@@ -10,3 +10,26 @@ def get_client_ip(request):
         if x_forwarded_for
         else request.META.get('REMOTE_ADDR')
     )
+
+
+def accepts_encoding(request, coding: str) -> bool:
+    """Принимает ли клиент кодирование coding по заголовку Accept-Encoding.
+
+    Учитываются веса q: кодирование с q=0 (явно или через *) не принимается.
+    """
+    weights = {}
+    for element in request.headers.get('Accept-Encoding', '').split(','):
+        name, _, params = element.partition(';')
+        name = name.strip().lower()
+        if not name:
+            continue
+        weight = 1.0
+        param_name, _, param_value = params.partition('=')
+        if param_name.strip().lower() == 'q':
+            try:
+                weight = float(param_value)
+            except ValueError:
+                weight = 0
+        weights[name] = weight
+    weight = weights.get(coding, weights.get('*', 0))
+    return weight > 0
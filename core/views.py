@@ -0,0 +1,109 @@
+import mimetypes
+import posixpath
+from pathlib import Path
+from urllib.parse import quote
+
+from django.conf import settings
+from django.core.exceptions import (
+    ImproperlyConfigured,
+    PermissionDenied,
+    SuspiciousFileOperation,
+)
+from django.http import FileResponse, Http404, HttpResponse
+from django.utils._os import safe_join
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date
+from django.utils.module_loading import import_string
+
+from core.metrics import render_metrics
+from core.storage import is_content_hashed
+from core.utils import get_client_ip
+
+MEDIA_SERVING_MODES = ('django', 'x-accel-redirect', 'x-sendfile')
+
+
+def get_media_etag(path: str, stat) -> str:
+    """Сильный ETag: для имён из хеша содержимого — сам хеш."""
+    if is_content_hashed(path):
+        return f'"{posixpath.basename(path)}"'
+    return f'"{stat.st_size:x}-{stat.st_mtime_ns:x}"'
+
+
+def get_media_cache_control(path: str) -> str:
+    if is_content_hashed(path):
+        return f'public, max-age={settings.MEDIA_IMMUTABLE_MAX_AGE}, immutable'
+    return f'public, max-age={settings.MEDIA_MAX_AGE}'
+
+
+def check_media_permission(request, path: str):
+    if settings.MEDIA_PERMISSION_CHECK:
+        has_permission = import_string(settings.MEDIA_PERMISSION_CHECK)
+        if not has_permission(request, path):
+            raise PermissionDenied
+
+
+def serve_media(request, path):
+    """Отдаёт файл из MEDIA_ROOT.
+
+    В режимах x-accel-redirect и x-sendfile передачу файла выполняет
+    фронтенд-сервер (nginx, Apache), а Python-процесс только проверяет
+    права и выставляет заголовки кеширования. Режим django — для разработки.
+    """
+    path = posixpath.normpath(path).lstrip('/')
+    try:
+        full_path = Path(safe_join(settings.MEDIA_ROOT, path))
+    except SuspiciousFileOperation:
+        raise Http404
+    # до проверки файла: ответ 404 не должен выдавать существование
+    # закрытого файла клиенту без доступа
+    check_media_permission(request, path)
+    if not full_path.is_file():
+        raise Http404
+
+    stat = full_path.stat()
+    etag = get_media_etag(path, stat)
+    headers = {
+        'ETag': etag,
+        'Last-Modified': http_date(stat.st_mtime),
+        'Cache-Control': get_media_cache_control(path),
+    }
+    unconditional_response = HttpResponse(headers=headers)
+    response = get_conditional_response(
+        request,
+        etag=etag,
+        last_modified=int(stat.st_mtime),
+        response=unconditional_response,
+    )
+    if response is not unconditional_response:
+        return response
+
+    if settings.MEDIA_SERVING not in MEDIA_SERVING_MODES:
+        raise ImproperlyConfigured(f'Unknown MEDIA_SERVING: {settings.MEDIA_SERVING!r}.')
+
+    content_type, encoding = mimetypes.guess_type(path)
+    content_type = content_type or 'application/octet-stream'
+    if settings.MEDIA_SERVING == 'x-accel-redirect':
+        response = HttpResponse(content_type=content_type, headers=headers)
+        response['X-Accel-Redirect'] = (
+            settings.MEDIA_ACCEL_REDIRECT_LOCATION.rstrip('/') + '/' + quote(path)
+        )
+    elif settings.MEDIA_SERVING == 'x-sendfile':
+        response = HttpResponse(content_type=content_type, headers=headers)
+        response['X-Sendfile'] = str(full_path)
+    else:
+        response = FileResponse(
+            full_path.open('rb'),
+            content_type=content_type,
+            headers=headers,
+        )
+        if encoding:
+            response['Content-Encoding'] = encoding
+    return response
+
+
+def metrics(request):
+    """Метрики Prometheus; доступны только с адресов METRICS_ALLOWED_IPS."""
+    if get_client_ip(request) not in settings.METRICS_ALLOWED_IPS:
+        raise PermissionDenied
+    content, content_type = render_metrics()
+    return HttpResponse(content, content_type=content_type)
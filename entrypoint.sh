@@ -6,7 +6,19 @@ python manage.py migrate --noinput
 
 python manage.py collectstatic --noinput
 
-gunicorn stethoscope.wsgi:application --bind 0:8000 \
+python manage.py generate_openapi_schema
+
+# метрики всех воркеров gunicorn и процессов celery (core.metrics)
+export PROMETHEUS_MULTIPROC_DIR="${PROMETHEUS_MULTIPROC_DIR:-/tmp/prometheus}"
+rm -rf "$PROMETHEUS_MULTIPROC_DIR" && mkdir -p "$PROMETHEUS_MULTIPROC_DIR"
+
+if [ "$SERVER_MODE" = "asgi" ]; then
+    SERVER_APP="stethoscope.asgi:application --worker-class uvicorn.workers.UvicornWorker"
+else
+    SERVER_APP="stethoscope.wsgi:application"
+fi
+
+gunicorn $SERVER_APP --bind 0:8000 --workers "${GUNICORN_WORKERS:-1}" \
     & celery -A stethoscope worker --loglevel=info \
     & celery -A stethoscope beat --loglevel=info \
     & celery -A stethoscope flower --loglevel=info
@@ -3,6 +3,7 @@ import os
 
 from celery import Celery
 from celery.schedules import crontab
+from celery.signals import beat_init, worker_init, worker_process_init
 from django.conf import settings
 
 logging.basicConfig(level=logging.INFO)
@@ -23,9 +24,43 @@ app.conf.beat_schedule = {
         'task': 'users.tasks.delete_non_activated_users_task',
         'schedule': settings.USER_NON_ACTIVATED_ACCOUNT_CLEANUP_PERIOD,
     },
+    'rebuild_related_articles': {
+        'task': 'articles.tasks.rebuild_related_articles_task',
+        'schedule': settings.RELATED_ARTICLES_REBUILD_PERIOD,
+    },
+    'cleanup_upload_sessions': {
+        'task': 'articles.tasks.delete_expired_upload_sessions_task',
+        'schedule': settings.UPLOADS_CLEANUP_PERIOD,
+    },
+    'cleanup_idempotency_keys': {
+        'task': 'articles.tasks.delete_expired_idempotency_keys_task',
+        'schedule': settings.UPLOADS_CLEANUP_PERIOD,
+    },
+    'cleanup_article_tombstones': {
+        'task': 'articles.tasks.delete_expired_article_tombstones_task',
+        'schedule': settings.ARTICLE_TOMBSTONES_CLEANUP_PERIOD,
+    },
+    'collect_media_garbage': {
+        'task': 'core.tasks.collect_media_garbage_task',
+        'schedule': settings.MEDIA_GC_PERIOD,
+    },
 }
 
 
+@worker_init.connect
+@worker_process_init.connect
+@beat_init.connect
+def start_invalidation_bus(**kwargs):
+    """Подписывает процессы celery на шину инвалидации кешей.
+
+    В веб-процессах подписку запускает InvalidationBusMiddleware; дочерние
+    процессы prefork подписываются сами, после fork.
+    """
+    from core.invalidation import get_invalidation_bus
+
+    get_invalidation_bus().start()
+
+
 @app.task(bind=True, ignore_result=True)
 def debug_task(self):
     logger.info(f'Request: {self.request!r}')
@@ -2,6 +2,7 @@ import os
 from datetime import timedelta
 from pathlib import Path
 
+from django.core.exceptions import ImproperlyConfigured
 from dotenv import load_dotenv
 
 load_dotenv()
@@ -14,6 +15,14 @@ DEBUG = os.getenv('DEBUG', default='False').lower() == 'true'
 
 ALLOWED_HOSTS = os.getenv('ALLOWED_HOSTS', default='*').split()
 
+# адреса, с которых доступны метрики Prometheus (/metrics/)
+METRICS_ALLOWED_IPS = os.getenv('METRICS_ALLOWED_IPS', default='127.0.0.1').split()
+
+# wsgi — синхронные воркеры gunicorn, asgi — воркеры uvicorn (см. entrypoint.sh)
+SERVER_MODE = os.getenv('SERVER_MODE', default='wsgi').lower()
+# асинхронные версии чтения статей и тегов (api.mixins.AsyncViewSetMixin)
+API_ASYNC_VIEWS = SERVER_MODE == 'asgi'
+
 # SSL
 CSRF_TRUSTED_ORIGINS = os.getenv('CSRF_TRUSTED_ORIGINS', default='').split()
 SECURE_PROXY_SSL_HEADER = ('HTTP_X_FORWARDED_PROTO', 'https')
@@ -25,6 +34,7 @@ INSTALLED_APPS = [
     'django.contrib.sessions',
     'django.contrib.messages',
     'django.contrib.staticfiles',
+    'django.contrib.postgres',
     'debug_toolbar',
     'django_filters',
     'drf_spectacular',
@@ -34,6 +44,7 @@ INSTALLED_APPS = [
     'djoser',
     'mptt',
     'mdeditor',
+    'core.apps.CoreConfig',
     'users.apps.UsersConfig',
     'api.apps.ApiConfig',
     'articles.apps.ArticlesConfig',
@@ -43,11 +54,13 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
+    'core.middleware.InvalidationBusMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'corsheaders.middleware.CorsMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'core.middleware.PrimaryPinMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
     'debug_toolbar.middleware.DebugToolbarMiddleware',
@@ -81,16 +94,133 @@ TEMPLATES = [
 
 WSGI_APPLICATION = 'stethoscope.wsgi.application'
 
+# пул соединений процесса (core.db.backends.postgresql), MAX_SIZE=0 отключает пул
+POSTGRES_POOL = {
+    'MIN_SIZE': int(os.getenv('POSTGRES_POOL_MIN_SIZE', default=1)),
+    'MAX_SIZE': int(os.getenv('POSTGRES_POOL_MAX_SIZE', default=10)),
+    'TIMEOUT': float(os.getenv('POSTGRES_POOL_TIMEOUT', default=30)),
+    'MAX_LIFETIME': int(os.getenv('POSTGRES_POOL_MAX_LIFETIME', default=3600)),
+    'MAX_IDLE': int(os.getenv('POSTGRES_POOL_MAX_IDLE', default=600)),
+    'CHECK_IDLE': int(os.getenv('POSTGRES_POOL_CHECK_IDLE', default=30)),
+}
+# за pgbouncer в режиме transaction: серверные курсоры живут дольше транзакции
+POSTGRES_TRANSACTION_POOLER = (
+    os.getenv('POSTGRES_TRANSACTION_POOLER', default='False').lower() == 'true'
+)
+
 DATABASES = {
     'default': {
-        'ENGINE': 'django.db.backends.postgresql',
+        'ENGINE': 'core.db.backends.postgresql',
         'NAME': os.environ.get('POSTGRES_DB', 'stethoscope_db'),
         'USER': os.environ.get('POSTGRES_USER', 'stethoscope_user'),
         'PASSWORD': os.environ.get('POSTGRES_PASSWORD', 'stethoscope_password'),
         'HOST': os.environ.get('POSTGRES_HOST', '127.0.0.1'),
         'PORT': os.environ.get('POSTGRES_PORT', 5432),
+        # соединение возвращается в пул в конце каждого запроса и задачи
+        'CONN_MAX_AGE': 0,
+        'CONN_HEALTH_CHECKS': True,
+        'DISABLE_SERVER_SIDE_CURSORS': POSTGRES_TRANSACTION_POOLER,
+        'POOL': POSTGRES_POOL if POSTGRES_POOL['MAX_SIZE'] else None,
+    },
+}
+
+# реплики для чтения: хосты (host или host:port) через пробел
+for replica_number, replica_host in enumerate(
+    os.getenv('POSTGRES_REPLICA_HOSTS', default='').split(),
+    start=1,
+):
+    replica_hostname, _, replica_port = replica_host.partition(':')
+    DATABASES[f'replica_{replica_number}'] = {
+        **DATABASES['default'],
+        'HOST': replica_hostname,
+        'PORT': replica_port or DATABASES['default']['PORT'],
+        'TEST': {'MIRROR': 'default'},
+    }
+DATABASE_REPLICAS = [alias for alias in DATABASES if alias.startswith('replica_')]
+DATABASE_ROUTERS = ['core.db.routers.ReplicaRouter']
+# сколько секунд после записи пользователь читает из основной базы
+REPLICA_PIN_TIMEOUT = int(os.getenv('REPLICA_PIN_TIMEOUT', default=5))
+REPLICA_PIN_CACHE_ALIAS = 'replica_pins'
+
+# кеш проекта: LRU в памяти процесса перед кешем ALIAS (core.cache)
+PROJECT_CACHE = {
+    'ALIAS': 'project',
+    'LOCAL_MAX_ENTRIES': int(os.getenv('PROJECT_CACHE_LOCAL_MAX_ENTRIES', default=1000)),
+    'LOCAL_TIMEOUT': int(os.getenv('PROJECT_CACHE_LOCAL_TIMEOUT', default=5)),
+    'LOCK_TIMEOUT': 10,
+    'EARLY_EXPIRATION_BETA': 1.0,
+}
+ARTICLE_CACHE_TIMEOUT = int(os.getenv('ARTICLE_CACHE_TIMEOUT', default=300))
+TAG_CACHE_TIMEOUT = int(os.getenv('TAG_CACHE_TIMEOUT', default=3600))
+USER_STATS_CACHE_TIMEOUT = int(os.getenv('USER_STATS_CACHE_TIMEOUT', default=300))
+
+REDIS_CACHE_URL = os.getenv('REDIS_CACHE_URL')
+
+# шина инвалидации кешей процессов (core.invalidation); без Redis события
+# доставляются только в пределах процесса
+INVALIDATION_BUS_URL = os.getenv('INVALIDATION_BUS_URL', default=REDIS_CACHE_URL)
+INVALIDATION_BUS_CHANNEL = os.getenv(
+    'INVALIDATION_BUS_CHANNEL',
+    default='stethoscope:invalidation',
+)
+TOKEN_CACHE_MAX_ENTRIES = int(os.getenv('TOKEN_CACHE_MAX_ENTRIES', default=10000))
+TOKEN_CACHE_TIMEOUT = int(os.getenv('TOKEN_CACHE_TIMEOUT', default=60))
+
+# корзины ограничения частоты запросов (core.ratelimit); без Redis — в памяти процесса
+RATE_LIMIT_REDIS_URL = os.getenv('RATE_LIMIT_REDIS_URL', default=REDIS_CACHE_URL)
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
     },
+    # ранжированные списки id результатов поиска; в Redis размер ограничивается
+    # maxmemory с политикой volatile-lru (см. infra/dev/docker-compose.yml)
+    'search': (
+        {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': REDIS_CACHE_URL,
+            'KEY_PREFIX': 'search',
+        }
+        if REDIS_CACHE_URL
+        else {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+            'LOCATION': 'search',
+            'OPTIONS': {'MAX_ENTRIES': 1000},
+        }
+    ),
+    # общий уровень кеша проекта (core.cache)
+    'project': (
+        {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': REDIS_CACHE_URL,
+            'KEY_PREFIX': 'project',
+        }
+        if REDIS_CACHE_URL
+        else {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+            'LOCATION': 'project',
+            'OPTIONS': {'MAX_ENTRIES': 10000},
+        }
+    ),
+    # пользователи, которые недавно писали в базу (core.db.replicas);
+    # должен быть общим для всех процессов
+    'replica_pins': (
+        {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': REDIS_CACHE_URL,
+            'KEY_PREFIX': 'replica',
+        }
+        if REDIS_CACHE_URL
+        else {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+            'LOCATION': 'replica_pins',
+        }
+    ),
 }
+if DATABASE_REPLICAS and not REDIS_CACHE_URL:
+    # отметки в памяти процесса не видны другим воркерам: пользователь
+    # читал бы с реплики сразу после своей записи
+    raise ImproperlyConfigured('POSTGRES_REPLICA_HOSTS requires REDIS_CACHE_URL.')
 
 AUTH_PASSWORD_VALIDATORS = [
     {
@@ -118,8 +248,28 @@ AUTH_USER_MODEL = 'users.User'
 REST_FRAMEWORK = {
     'DEFAULT_SCHEMA_CLASS': 'drf_spectacular.openapi.AutoSchema',
     'DEFAULT_AUTHENTICATION_CLASSES': [
-        'rest_framework.authentication.TokenAuthentication',
+        'users.authentication.CachedTokenAuthentication',
     ],
+    # JSON через orjson (без него — стандартные JSONRenderer/JSONParser)
+    'DEFAULT_RENDERER_CLASSES': [
+        'api.renderers.ORJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ],
+    'DEFAULT_PARSER_CLASSES': [
+        'api.parsers.ORJSONParser',
+        'rest_framework.parsers.FormParser',
+        'rest_framework.parsers.MultiPartParser',
+    ],
+    # лимиты 'число/период' областей api.throttling; пустое значение отключает лимит
+    'DEFAULT_THROTTLE_CLASSES': ['api.throttling.TokenBucketThrottle'],
+    'DEFAULT_THROTTLE_RATES': {
+        'vote': os.getenv('THROTTLE_RATE_VOTE', default='60/min') or None,
+        'article_view': (
+            os.getenv('THROTTLE_RATE_ARTICLE_VIEW', default='120/min') or None
+        ),
+        'search': os.getenv('THROTTLE_RATE_SEARCH', default='60/min') or None,
+        'login': os.getenv('THROTTLE_RATE_LOGIN', default='10/min') or None,
+    },
 }
 
 CURSOR_PAGINATION_PAGE_SIZE = int(os.getenv('CURSOR_PAGINATION_PAGE_SIZE', default=6))
@@ -146,6 +296,10 @@ SPECTACULAR_SETTINGS = {
     'CONTACT': {'email': 'info@stethoscope.acceleratorpracticum.ru'},
     'LICENSE': {'name': 'BSD License'},
 }
+# заранее сгенерированная схема OpenAPI (manage.py generate_openapi_schema)
+OPENAPI_SCHEMA_ROOT = Path(
+    os.getenv('OPENAPI_SCHEMA_ROOT', default=BASE_DIR / 'data' / 'openapi'),
+)
 
 SITE_NAME = os.environ.get('SITE_NAME')
 DOMAIN = os.environ.get('DOMAIN')
@@ -202,6 +356,34 @@ STATIC_URL = '/static/'
 MEDIA_ROOT = BASE_DIR / 'media'
 MEDIA_URL = '/media/'
 
+STORAGES = {
+    # имена файлов из хеша содержимого, см. core.storage
+    'default': {'BACKEND': 'core.storage.ContentHashedStorage'},
+    'staticfiles': {
+        'BACKEND': 'django.contrib.staticfiles.storage.StaticFilesStorage',
+    },
+}
+
+# MEDIA SERVING SETTINGS
+# django — файл отдаёт Python-процесс (только для разработки);
+# x-accel-redirect (nginx) и x-sendfile (Apache) — передачу выполняет фронтенд
+MEDIA_SERVING = os.getenv(
+    'MEDIA_SERVING',
+    default='django' if DEBUG else 'x-accel-redirect',
+)
+# internal location nginx, из которого отдаются файлы MEDIA_ROOT
+MEDIA_ACCEL_REDIRECT_LOCATION = os.getenv(
+    'MEDIA_ACCEL_REDIRECT_LOCATION',
+    default='/protected-media/',
+)
+# путь к функции (request, path) -> bool; None — доступ к media без проверки
+MEDIA_PERMISSION_CHECK = os.getenv('MEDIA_PERMISSION_CHECK') or None
+MEDIA_IMMUTABLE_MAX_AGE = 365 * 24 * 60 * 60
+MEDIA_MAX_AGE = 60 * 60
+# файлы media без ссылок из базы удаляются не раньше, чем через этот срок
+MEDIA_GC_GRACE_PERIOD = timedelta(hours=1)
+MEDIA_GC_PERIOD = timedelta(days=1)
+
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
 LOGGING_ENABLED = os.environ.get('LOGGING_ENABLED', 'False') == 'True'
@@ -293,3 +475,95 @@ BASE64_IMAGE_MAX_SIZE_BYTES = 1_500_000
 BASE64_AVATAR_MAX_SIZE_BYTES = 200_000
 BASE64_AVATAR_MAX_WIDTH = 500
 BASE64_AVATAR_MAX_HEIGHT = 500
+# защита от «декомпрессионных бомб»: предел разрешения любого загружаемого изображения
+BASE64_IMAGE_MAX_PIXELS = 25_000_000
+# сколько байт multipart-загрузки ждать заголовка изображения (формат, размеры)
+IMAGE_UPLOAD_HEADER_MAX_BYTES = 256 * 1024
+
+
+# RESUMABLE UPLOADS AND IDEMPOTENCY SETTINGS
+# каталог для файлов незавершённых загрузок, не раздаётся как media
+UPLOAD_SESSIONS_ROOT = Path(
+    os.getenv('UPLOAD_SESSIONS_ROOT', default=BASE_DIR / 'data' / 'upload_sessions'),
+)
+UPLOAD_SESSION_LIFETIME = timedelta(days=1)
+IDEMPOTENCY_KEY_LIFETIME = timedelta(days=1)
+UPLOADS_CLEANUP_PERIOD = timedelta(hours=1)
+
+
+# FULL TEXT SEARCH SETTINGS
+# основная конфигурация (стемминг) и запасная (без стемминга: латынь, аббревиатуры)
+SEARCH_CONFIG = os.getenv('SEARCH_CONFIG', default='russian')
+SEARCH_FALLBACK_CONFIG = os.getenv('SEARCH_FALLBACK_CONFIG', default='simple')
+SEARCH_WEIGHTS = {
+    'title': 'A',
+    'annotation': 'B',
+    'tags': 'C',
+    'text': 'D',
+}
+SEARCH_REINDEX_BATCH_SIZE = int(os.getenv('SEARCH_REINDEX_BATCH_SIZE', default=500))
+SEARCH_SUGGEST_LIMIT = int(os.getenv('SEARCH_SUGGEST_LIMIT', default=8))
+SEARCH_SUGGEST_MIN_LENGTH = 2
+SEARCH_SUGGEST_CACHE_TIMEOUT = int(os.getenv('SEARCH_SUGGEST_CACHE_TIMEOUT', default=60))
+SEARCH_HEADLINE_MAX_WORDS = int(os.getenv('SEARCH_HEADLINE_MAX_WORDS', default=35))
+SEARCH_HEADLINE_MIN_WORDS = int(os.getenv('SEARCH_HEADLINE_MIN_WORDS', default=15))
+SEARCH_HEADLINE_MAX_FRAGMENTS = int(
+    os.getenv('SEARCH_HEADLINE_MAX_FRAGMENTS', default=2),
+)
+SEARCH_HEADLINE_WORDS_LIMIT = 100
+SEARCH_HEADLINE_FRAGMENTS_LIMIT = 10
+SEARCH_CACHE_ALIAS = 'search'
+SEARCH_RESULTS_CACHE_TIMEOUT = int(
+    os.getenv('SEARCH_RESULTS_CACHE_TIMEOUT', default=120),
+)
+SEARCH_RESULTS_MAX_IDS = int(os.getenv('SEARCH_RESULTS_MAX_IDS', default=1000))
+
+# максимум статей в одном запросе articles/batch/
+ARTICLE_BATCH_MAX_IDS = int(os.getenv('ARTICLE_BATCH_MAX_IDS', default=100))
+
+# лента изменений articles/changes/ (articles.changes.get_article_changes)
+ARTICLE_CHANGES_PAGE_SIZE = int(os.getenv('ARTICLE_CHANGES_PAGE_SIZE', default=100))
+# изменения моложе этого времени не выдаются: их транзакции могут быть не закоммичены
+ARTICLE_CHANGES_SETTLE_TIME = timedelta(
+    seconds=int(os.getenv('ARTICLE_CHANGES_SETTLE_SECONDS', default=5)),
+)
+# сколько хранятся отметки об удалении; более старые отметки клиентов требуют
+# полной синхронизации
+ARTICLE_TOMBSTONE_LIFETIME = timedelta(
+    days=int(os.getenv('ARTICLE_TOMBSTONE_LIFETIME_DAYS', default=30)),
+)
+ARTICLE_TOMBSTONES_CLEANUP_PERIOD = timedelta(days=1)
+
+# строк в одной выборке серверного курсора при выгрузке статей (articles.export)
+ARTICLE_EXPORT_CHUNK_SIZE = int(os.getenv('ARTICLE_EXPORT_CHUNK_SIZE', default=2000))
+# импорт статей (articles.imports): строк в одной транзакции и потоков
+# сохранения изображений
+ARTICLE_IMPORT_BATCH_SIZE = int(os.getenv('ARTICLE_IMPORT_BATCH_SIZE', default=1000))
+ARTICLE_IMPORT_WORKERS = int(os.getenv('ARTICLE_IMPORT_WORKERS', default=4))
+
+
+# RELATED ARTICLES SETTINGS
+RELATED_ARTICLES_COUNT = int(os.getenv('RELATED_ARTICLES_COUNT', default=10))
+# вклад похожести по тегам и по тексту (TF-IDF лексем search_vector)
+RELATED_ARTICLES_TAGS_WEIGHT = 0.5
+RELATED_ARTICLES_TEXT_WEIGHT = 0.5
+# вес предка тега уменьшается в это число раз на каждый уровень дерева
+RELATED_ARTICLES_ANCESTOR_DECAY = 0.5
+RELATED_ARTICLES_REBUILD_PERIOD = timedelta(days=1)
+# статей в одной части при полном пересчёте: в памяти похожести части со всеми
+RELATED_ARTICLES_CHUNK_SIZE = 500
+# обновление соседей одной статьи: кандидатов по тегам и по тексту и число
+# самых значимых лексем статьи, по которым ищутся кандидаты по тексту
+RELATED_ARTICLES_MAX_CANDIDATES = 1000
+RELATED_ARTICLES_QUERY_LEXEMES = 20
+
+
+# IMAGE RENDITIONS SETTINGS
+# варианты изображений статей и аватаров: имя -> (максимальная ширина, высота)
+IMAGE_RENDITIONS = {
+    'thumb': (300, 300),
+    'card': (800, 600),
+    'full': (1600, 1600),
+}
+IMAGE_RENDITION_FORMATS = ('webp', 'jpeg')
+IMAGE_RENDITION_QUALITY = 80
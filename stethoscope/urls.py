@@ -1,14 +1,23 @@
 from django.conf import settings
 from django.conf.urls.static import static
 from django.contrib import admin
-from django.urls import include, path
+from django.urls import include, path, re_path
+
+from core.views import metrics, serve_media
 
 urlpatterns = [
     path('admin/', admin.site.urls),
     path('api/', include('api.urls', namespace='api')),
+    path('metrics/', metrics, name='metrics'),
 ]
 urlpatterns += static(settings.STATIC_URL, document_root=settings.STATIC_ROOT)
-urlpatterns += static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
+urlpatterns += (
+    re_path(
+        rf'^{settings.MEDIA_URL.lstrip("/")}(?P<path>.+)$',
+        serve_media,
+        name='media',
+    ),
+)
 
 if settings.DEBUG:
     import debug_toolbar
@@ -1,7 +1,14 @@
 import pytest
+from django.conf import settings
+from django.core.cache import caches
 from rest_framework.authtoken.models import Token
 from rest_framework.test import APIClient
 
+from core.cache import get_project_cache
+from core.ratelimit import get_token_bucket
+from stethoscope import celery_app
+from users.authentication import evict_cached_tokens
+
 pytest_plugins = [
     'tests.fixtures.fixture_user',
     'tests.fixtures.fixture_temporary_resources',
@@ -9,6 +16,38 @@ pytest_plugins = [
 ]
 
 
+@pytest.fixture(scope='session')
+def django_db_modify_db_settings(django_db_modify_db_settings_parallel_suffix):
+    # вторая локальная база — реплика для тестов маршрутизации чтения;
+    # в тестах, которые её используют, она включается в DATABASE_REPLICAS
+    default = settings.DATABASES['default']
+    settings.DATABASES['replica'] = {
+        **default,
+        'TEST': {**default['TEST'], 'NAME': f'test_{default["NAME"]}_replica'},
+    }
+
+
+@pytest.fixture(autouse=True, scope='session')
+def celery_eager():
+    # задачи, поставленные в очередь из on_commit, выполняются сразу, без брокера
+    celery_app.conf.task_always_eager = True
+
+
+@pytest.fixture(autouse=True)
+def clear_cache():
+    for cache in caches.all():
+        cache.clear()
+    get_project_cache().local.clear()
+    evict_cached_tokens()
+    get_token_bucket().clear()
+    yield
+    for cache in caches.all():
+        cache.clear()
+    get_project_cache().local.clear()
+    evict_cached_tokens()
+    get_token_bucket().clear()
+
+
 @pytest.fixture()
 def client():
     return APIClient()
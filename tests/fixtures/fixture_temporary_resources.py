@@ -11,5 +11,7 @@ def temp_dir():
     temp_dir = django_settings.BASE_DIR / f'test_temp_folder_{random_suffix}'
     os.mkdir(temp_dir)
     django_settings.MEDIA_ROOT = temp_dir
+    django_settings.UPLOAD_SESSIONS_ROOT = temp_dir / 'upload_sessions'
+    django_settings.OPENAPI_SCHEMA_ROOT = temp_dir / 'openapi'
     yield temp_dir
     shutil.rmtree(temp_dir)
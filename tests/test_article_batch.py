@@ -0,0 +1,92 @@
+import uuid
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from articles.models import Article, Viewer
+
+pytestmark = pytest.mark.django_db
+
+URL = reverse('api:articles-batch')
+
+
+@pytest.fixture()
+def create_article(article_content, user):
+    def create(is_published=True):
+        return Article.objects.create(
+            **article_content,
+            author=user,
+            is_published=is_published,
+        )
+
+    return create
+
+
+def batch(client, *article_ids):
+    return client.get(URL, {'ids': ','.join(str(pk) for pk in article_ids)})
+
+
+def test_batch_preserves_order(client, create_article):
+    articles = [create_article() for _ in range(3)]
+    article_ids = [articles[2].pk, articles[0].pk, articles[1].pk]
+
+    response = batch(client, *article_ids)
+
+    assert response.status_code == 200
+    assert [item['id'] for item in response.data['results']] == [
+        str(pk) for pk in article_ids
+    ]
+    assert response.data['missing'] == []
+
+
+def test_batch_reports_missing_and_unpublished(client, create_article):
+    published = create_article()
+    unpublished = create_article(is_published=False)
+    unknown = uuid.uuid4()
+
+    response = batch(client, unknown, published.pk, unpublished.pk, published.pk)
+
+    assert [item['id'] for item in response.data['results']] == [str(published.pk)]
+    assert response.data['missing'] == [str(unknown), str(unpublished.pk)]
+
+
+def test_batch_user_flags_without_views(authenticated_client, user, create_article):
+    article = create_article()
+    user.favorite_articles.create(article=article)
+
+    response = batch(authenticated_client, article.pk)
+
+    assert response.data['results'][0]['is_favorited'] is True
+    assert response.data['results'][0]['views_count'] == 0
+    assert not Viewer.objects.exists()
+
+
+def test_batch_query_count_independent_of_size(client, create_article):
+    article_ids = [create_article().pk for _ in range(5)]
+    # тип содержимого голосов запоминается при первом запросе
+    batch(client, article_ids[0])
+
+    with CaptureQueriesContext(connection) as one:
+        batch(client, article_ids[0])
+    with CaptureQueriesContext(connection) as many:
+        batch(client, *article_ids)
+
+    assert len(many) == len(one)
+
+
+@pytest.mark.parametrize('ids', ['', 'invalid', ','.join(['x'] * 3)])
+def test_batch_invalid_ids(client, ids):
+    response = client.get(URL, {'ids': ids})
+
+    assert response.status_code == 400
+    assert 'ids' in response.data
+
+
+def test_batch_max_ids(client, settings):
+    settings.ARTICLE_BATCH_MAX_IDS = 2
+
+    response = batch(client, *(uuid.uuid4() for _ in range(3)))
+
+    assert response.status_code == 400
@@ -0,0 +1,151 @@
+import uuid
+from datetime import timedelta
+
+import pytest
+from django.urls import reverse
+from django.utils import timezone
+
+from articles.changes import encode_watermark
+from articles.models import Article, ArticleTombstone
+from articles.tasks import delete_expired_article_tombstones_task
+
+pytestmark = pytest.mark.django_db
+
+URL = reverse('api:articles-changes')
+
+
+@pytest.fixture(autouse=True)
+def changes_settings(settings):
+    settings.ARTICLE_CHANGES_SETTLE_TIME = timedelta(0)
+    settings.ARTICLE_CHANGES_PAGE_SIZE = 2
+
+
+@pytest.fixture()
+def create_article(article_content, user):
+    def create(is_published=True):
+        return Article.objects.create(
+            **article_content,
+            author=user,
+            is_published=is_published,
+        )
+
+    return create
+
+
+def sync(client, watermark=None):
+    """Все страницы ленты после отметки: (изменения, последняя отметка)."""
+    changes = []
+    while True:
+        params = {'since': watermark} if watermark else {}
+        response = client.get(URL, params)
+        assert response.status_code == 200
+        changes += [
+            (change['id'], change['status']) for change in response.data['results']
+        ]
+        watermark = response.data['watermark']
+        if not response.data['has_more']:
+            return changes, watermark
+
+
+def test_changes_full_sync(client, create_article):
+    articles = [create_article() for _ in range(3)]
+
+    changes, _ = sync(client)
+
+    assert changes == [(str(published.pk), 'published') for published in articles]
+
+
+def test_changes_skip_drafts(client, article, create_article):
+    withdrawn = create_article()
+    withdrawn.is_published = False
+    withdrawn.save()
+    deleted_draft = create_article(is_published=False)
+    deleted_draft.delete()
+
+    changes, _ = sync(client)
+
+    assert changes == [(str(withdrawn.pk), 'unpublished')]
+
+
+def test_changes_skip_engagement(client, alt_user, create_article):
+    article = create_article()
+    _, watermark = sync(client)
+
+    article.votes.create(user=alt_user, vote=1)
+
+    assert sync(client, watermark) == ([], watermark)
+
+
+def test_changes_since_watermark(client, create_article):
+    updated, unpublished, deleted, untouched = [create_article() for _ in range(4)]
+    _, watermark = sync(client)
+
+    updated.title = 'Новый заголовок'
+    updated.save()
+    unpublished.is_published = False
+    unpublished.save()
+    deleted_id = deleted.pk
+    deleted.delete()
+    changes, new_watermark = sync(client, watermark)
+
+    assert changes == [
+        (str(updated.pk), 'published'),
+        (str(unpublished.pk), 'unpublished'),
+        (str(deleted_id), 'deleted'),
+    ]
+    assert sync(client, new_watermark) == ([], new_watermark)
+
+
+def test_changes_include_article(authenticated_client, create_article):
+    article = create_article()
+
+    response = authenticated_client.get(URL)
+
+    change = response.data['results'][-1]
+    assert change['article']['id'] == str(article.pk)
+    assert change['article']['is_favorited'] is False
+
+
+def test_changes_wait_for_settle_time(client, create_article, settings):
+    settings.ARTICLE_CHANGES_SETTLE_TIME = timedelta(minutes=1)
+    create_article()
+
+    response = client.get(URL)
+
+    assert response.data['results'] == []
+    assert response.data['watermark'] is None
+
+
+@pytest.mark.parametrize('since', ['invalid', encode_watermark(timezone.now(), 'x')])
+def test_changes_invalid_watermark(client, since):
+    response = client.get(URL, {'since': since})
+
+    assert response.status_code == 400
+    assert 'since' in response.data
+
+
+def test_changes_expired_watermark(client, settings):
+    since = encode_watermark(
+        timezone.now() - settings.ARTICLE_TOMBSTONE_LIFETIME - timedelta(days=1),
+        uuid.uuid4(),
+    )
+
+    response = client.get(URL, {'since': since})
+
+    assert response.status_code == 410
+
+
+def test_delete_expired_article_tombstones(settings):
+    expired_at = timezone.now() - settings.ARTICLE_TOMBSTONE_LIFETIME
+    ArticleTombstone.objects.create(
+        article_id=uuid.uuid4(),
+        deleted_at=expired_at - timedelta(minutes=1),
+    )
+    kept = ArticleTombstone.objects.create(
+        article_id=uuid.uuid4(),
+        deleted_at=timezone.now(),
+    )
+
+    delete_expired_article_tombstones_task()
+
+    assert list(ArticleTombstone.objects.all()) == [kept]
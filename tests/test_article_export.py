@@ -0,0 +1,157 @@
+import gzip
+import json
+from datetime import timedelta
+
+import pytest
+from asgiref.sync import async_to_sync
+from django.core.management import call_command
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+from articles.export import aiter_chunks, iter_gzip, iter_ndjson
+from articles.models import Article, Tag, Viewer
+from users.models import RolesTypes
+
+pytestmark = pytest.mark.django_db
+
+URL = reverse('api:articles-export')
+
+
+@pytest.fixture()
+def admin_client(user):
+    user.role = RolesTypes.ADMIN
+    user.save()
+    admin_client = APIClient()
+    token, _ = Token.objects.get_or_create(user=user)
+    admin_client.credentials(HTTP_AUTHORIZATION='Token ' + token.key)
+    return admin_client
+
+
+@pytest.fixture()
+def engaged_article(article, alt_user):
+    tag = Tag.objects.create(name='Терапия')
+    article.tags.add(tag)
+    article.votes.create(user=alt_user, vote=1)
+    article.viewers.add(Viewer.objects.create(user=alt_user, ipaddress='10.0.0.1'))
+    return article
+
+
+def read_records(response):
+    content = b''.join(response.streaming_content)
+    if response.get('Content-Encoding') == 'gzip':
+        content = gzip.decompress(content)
+    return [json.loads(line) for line in content.splitlines()]
+
+
+def test_export_records(admin_client, engaged_article, alt_user):
+    response = admin_client.get(URL)
+
+    assert response.status_code == 200
+    assert response['Content-Type'] == 'application/x-ndjson'
+    assert 'attachment' in response['Content-Disposition']
+    records = {record['type']: record for record in read_records(response)}
+    assert records['article']['id'] == str(engaged_article.pk)
+    assert records['article']['tag_ids'] == [records['tag']['id']]
+    assert records['vote']['article_id'] == str(engaged_article.pk)
+    assert records['vote']['vote'] == 1
+    assert records['view']['user_id'] == str(alt_user.pk)
+    assert 'ipaddress' not in records['view']
+
+
+def test_export_gzip(admin_client, engaged_article):
+    response = admin_client.get(URL, HTTP_ACCEPT_ENCODING='deflate, gzip;q=0.5')
+
+    assert response['Content-Encoding'] == 'gzip'
+    assert 'Accept-Encoding' in response['Vary']
+    assert len(read_records(response)) == 4
+
+
+@pytest.mark.parametrize('accept_encoding', ['gzip;q=0, deflate', '*;q=0', 'br'])
+def test_export_gzip_not_acceptable(admin_client, engaged_article, accept_encoding):
+    response = admin_client.get(URL, HTTP_ACCEPT_ENCODING=accept_encoding)
+
+    assert 'Content-Encoding' not in response
+    assert len(read_records(response)) == 4
+
+
+def test_export_updated_since(admin_client, engaged_article, user):
+    since = timezone.now()
+    Article.objects.filter(pk=engaged_article.pk).update(
+        changed_at=since - timedelta(days=1),
+    )
+    changed = Article.objects.create(
+        title='Новая статья',
+        annotation='Аннотация',
+        text='Текст',
+        author=user,
+    )
+
+    response = admin_client.get(URL, {'updated_since': since.isoformat()})
+
+    assert [(record['type'], record['id']) for record in read_records(response)] == [
+        ('article', str(changed.pk)),
+    ]
+
+
+def test_export_updated_since_returning_viewer(admin_client, engaged_article, user):
+    since = timezone.now()
+    Article.objects.filter(pk=engaged_article.pk).update(
+        changed_at=since - timedelta(days=1),
+    )
+    Viewer.objects.update(created_at=since - timedelta(days=1))
+    other = Article.objects.create(
+        title='Старая статья',
+        annotation='Аннотация',
+        text='Текст',
+        author=user,
+    )
+    Article.objects.filter(pk=other.pk).update(changed_at=since - timedelta(days=1))
+
+    other.viewers.add(Viewer.objects.get())
+    response = admin_client.get(URL, {'updated_since': since.isoformat()})
+
+    views = [record for record in read_records(response) if record['type'] == 'view']
+    assert [view['article_id'] for view in views] == [str(other.pk)]
+
+
+def test_export_invalid_updated_since(admin_client):
+    response = admin_client.get(URL, {'updated_since': 'invalid'})
+
+    assert response.status_code == 400
+    assert 'updated_since' in response.data
+
+
+def test_export_forbidden(authenticated_client):
+    assert authenticated_client.get(URL).status_code == 403
+
+
+def test_ndjson_chunks():
+    records = [{'index': index} for index in range(100)]
+
+    chunks = list(iter_gzip(iter_ndjson(records, buffer_size=100)))
+
+    lines = gzip.decompress(b''.join(chunks)).splitlines()
+    assert [json.loads(line) for line in lines] == records
+
+
+def test_async_chunks():
+    async def collect():
+        return [chunk async for chunk in aiter_chunks(iter([b'a', b'b']))]
+
+    assert async_to_sync(collect)() == [b'a', b'b']
+
+
+def test_export_articles_command(tmp_path, engaged_article):
+    output = tmp_path / 'articles.ndjson.gz'
+
+    call_command('export_articles', output=str(output), gzip=True)
+
+    lines = gzip.decompress(output.read_bytes()).splitlines()
+    assert sorted(json.loads(line)['type'] for line in lines) == [
+        'article',
+        'tag',
+        'view',
+        'vote',
+    ]
@@ -0,0 +1,177 @@
+import csv
+import json
+
+import pytest
+from django.core.management import call_command
+
+from articles.imports import get_article_id
+from articles.models import Article, Tag
+
+pytestmark = pytest.mark.django_db
+
+
+@pytest.fixture()
+def rows(user, faker):
+    def make_rows(count, **fields):
+        return [
+            {
+                'id': f'legacy-{index}',
+                'title': faker.sentence(),
+                'annotation': faker.sentence(),
+                'text': faker.paragraph(3),
+                'author': user.email,
+                'is_published': True,
+                **fields,
+            }
+            for index in range(count)
+        ]
+
+    return make_rows
+
+
+def write_ndjson(path, rows):
+    path.write_text(
+        ''.join(json.dumps(row, ensure_ascii=False) + '\n' for row in rows),
+        encoding='utf-8',
+    )
+    return str(path)
+
+
+def import_articles(path, **options):
+    call_command('import_articles', path, **options)
+    return Article.objects.filter(
+        pk__in=[get_article_id(f'legacy-{index}') for index in range(10)],
+    )
+
+
+def test_import_ndjson(tmp_path, rows, user, faker):
+    image = tmp_path / 'cover.jpeg'
+    image.write_bytes(faker.image(image_format='jpeg', size=(16, 16)))
+    path = write_ndjson(
+        tmp_path / 'articles.ndjson',
+        rows(3, tags=['Терапия/Кардиология'], image='cover.jpeg'),
+    )
+
+    articles = import_articles(path, batch_size=2)
+
+    assert articles.count() == 3
+    cardiology = Tag.objects.get(name='Кардиология')
+    assert cardiology.parent.name == 'Терапия'
+    for article in articles:
+        assert list(article.tags.all()) == [cardiology]
+        assert article.author == user
+        assert article.image.name.startswith('images/')
+        # search_vector пересчитан после записи тегов
+        assert 'кардиолог' in article.search_vector
+
+
+def test_import_is_idempotent(tmp_path, rows, capsys):
+    path = write_ndjson(tmp_path / 'articles.ndjson', rows(3, tags=['Терапия']))
+    articles = import_articles(path)
+    changed_at = dict(articles.values_list('pk', 'changed_at'))
+    capsys.readouterr()
+
+    articles = import_articles(path)
+
+    assert dict(articles.values_list('pk', 'changed_at')) == changed_at
+    assert 'unchanged: 3' in capsys.readouterr().out
+
+
+def test_import_csv_updates_articles(tmp_path, rows):
+    write_ndjson(tmp_path / 'articles.ndjson', rows(2, tags=['Терапия']))
+    import_articles(str(tmp_path / 'articles.ndjson'))
+    updated = rows(2, tags='Хирургия;Педиатрия')
+    updated[0]['title'] = 'Новый заголовок'
+    path = tmp_path / 'articles.csv'
+    with open(path, 'w', newline='', encoding='utf-8') as csv_file:
+        writer = csv.DictWriter(csv_file, fieldnames=list(updated[0]))
+        writer.writeheader()
+        writer.writerows(updated)
+
+    articles = import_articles(str(path))
+
+    article = articles.get(pk=get_article_id('legacy-0'))
+    assert article.title == 'Новый заголовок'
+    assert sorted(article.tags.values_list('name', flat=True)) == [
+        'Педиатрия',
+        'Хирургия',
+    ]
+
+
+def test_import_reports_invalid_rows(tmp_path, rows, capsys):
+    invalid = rows(3)
+    invalid[0]['title'] = ''
+    invalid[1]['author'] = 'unknown@example.com'
+    path = write_ndjson(tmp_path / 'articles.ndjson', invalid)
+
+    articles = import_articles(path)
+
+    assert list(articles.values_list('pk', flat=True)) == [get_article_id('legacy-2')]
+    output = capsys.readouterr()
+    assert 'Line 1: title is required.' in output.err
+    assert 'Line 2: Unknown author unknown@example.com.' in output.err
+    assert 'inserted: 1' in output.out
+
+
+def test_import_start_after(tmp_path, rows):
+    path = write_ndjson(tmp_path / 'articles.ndjson', rows(3))
+
+    articles = import_articles(path, start_after=2)
+
+    assert list(articles.values_list('pk', flat=True)) == [get_article_id('legacy-2')]
+
+
+def test_import_without_tags_keeps_tags(tmp_path, rows):
+    import_articles(write_ndjson(tmp_path / 'tagged.ndjson', rows(1, tags=['Терапия'])))
+    updated = rows(1, title='Новый заголовок')
+
+    article = import_articles(write_ndjson(tmp_path / 'articles.ndjson', updated)).get()
+
+    assert article.title == 'Новый заголовок'
+    assert list(article.tags.values_list('name', flat=True)) == ['Терапия']
+
+
+def test_import_exported_articles(tmp_path, article, capsys):
+    tag = Tag.objects.create(name='Терапия')
+    article.tags.add(tag)
+    image = article.image.name
+    path = tmp_path / 'articles.ndjson'
+    call_command('export_articles', output=str(path))
+    Article.objects.filter(pk=article.pk).delete()
+
+    call_command('import_articles', str(path))
+
+    imported = Article.objects.get(pk=article.pk)
+    assert imported.title == article.title
+    assert list(imported.tags.all()) == [tag]
+    assert imported.image.name == image
+    capsys.readouterr()
+
+    call_command('import_articles', str(path))
+
+    assert 'unchanged: 1' in capsys.readouterr().out
+    assert list(imported.tags.all()) == [tag]
+
+
+def test_import_unknown_tag_ids(tmp_path, rows, capsys):
+    path = write_ndjson(
+        tmp_path / 'articles.ndjson',
+        rows(1, tag_ids=['3f1c8a52-7d5e-4f0b-9a36-2c1d8e6b4a17']),
+    )
+
+    assert not import_articles(path).exists()
+    assert 'Line 1: Unknown tag ids' in capsys.readouterr().err
+
+
+def test_import_reports_tag_with_another_parent(tmp_path, rows, capsys):
+    surgery = Tag.objects.create(name='Хирургия')
+    Tag.objects.create(name='Кардиология', parent=surgery)
+    path = write_ndjson(
+        tmp_path / 'articles.ndjson',
+        rows(2, tags=['Терапия/Кардиология']),
+    )
+
+    assert not import_articles(path).exists()
+    output = capsys.readouterr()
+    assert "Line 1: Tag 'Кардиология' exists outside of 'Терапия'." in output.err
+    assert 'Line 2:' in output.err
@@ -0,0 +1,171 @@
+import asyncio
+import io
+
+import pytest
+from asgiref.sync import async_to_sync
+from django.core.management import call_command
+from rest_framework.test import APIRequestFactory
+
+from api.views import ArticleViewSet, TagViewSet
+from articles.models import Tag, Viewer
+
+pytestmark = pytest.mark.django_db
+
+
+@pytest.fixture()
+def published_article(article):
+    article.title = 'Лечение гриппа у детей'
+    article.is_published = True
+    article.save()
+    return article
+
+
+@pytest.fixture()
+def tags():
+    root = Tag.objects.create(name='Терапия')
+    child = Tag.objects.create(name='Кардиология', parent=root)
+    Tag.objects.create(name='Аритмии', parent=child)
+    return root
+
+
+def get_view(viewset, actions, is_async, **initkwargs):
+    """View для действий ViewSet, как его создаёт роутер."""
+    for action_name in set(actions.values()):
+        initkwargs.update(getattr(getattr(viewset, action_name), 'kwargs', {}))
+    initkwargs['basename'] = 'articles' if viewset is ArticleViewSet else 'tags'
+    return viewset.as_view(actions, is_async=is_async, **initkwargs)
+
+
+def call(viewset, actions, path, headers=None, **kwargs):
+    """Ответы синхронной и асинхронной версий ViewSet на один и тот же запрос."""
+    responses = []
+    for is_async in (False, True):
+        request = APIRequestFactory().get(path, **(headers or {}))
+        view = get_view(viewset, actions, is_async)
+        if is_async:
+            assert asyncio.iscoroutinefunction(view)
+            response = async_to_sync(view)(request, **kwargs)
+        else:
+            response = view(request, **kwargs)
+        if hasattr(response, 'render'):
+            response.render()
+        responses.append(response)
+    return responses
+
+
+def test_async_article_list(published_article):
+    sync_response, async_response = call(
+        ArticleViewSet,
+        {'get': 'list'},
+        '/api/v1/articles/',
+    )
+
+    assert async_response.status_code == 200
+    assert async_response.content == sync_response.content
+    assert async_response['ETag'] == sync_response['ETag']
+
+
+def test_async_article_detail_counts_viewer(published_article):
+    view = get_view(ArticleViewSet, {'get': 'retrieve'}, is_async=True)
+    path = f'/api/v1/articles/{published_article.pk}/'
+
+    request = APIRequestFactory().get(path)
+    response = async_to_sync(view)(request, pk=published_article.pk)
+    request = APIRequestFactory().get(path, HTTP_IF_NONE_MATCH=response['ETag'])
+    not_modified = async_to_sync(view)(request, pk=published_article.pk)
+
+    assert response.status_code == 200
+    assert response.data['views_count'] == 1
+    assert not_modified.status_code == 304
+    assert Viewer.objects.count() == 1
+
+
+@pytest.mark.parametrize('pk', ['00000000-0000-0000-0000-000000000000', 'invalid'])
+def test_async_article_detail_not_found(pk):
+    view = get_view(ArticleViewSet, {'get': 'retrieve'}, is_async=True)
+
+    response = async_to_sync(view)(APIRequestFactory().get('/'), pk=pk)
+
+    assert response.status_code == 404
+
+
+def test_async_article_search(published_article):
+    sync_response, async_response = call(
+        ArticleViewSet,
+        {'get': 'search'},
+        '/api/v1/articles/search/?query=грипп&facets=tags',
+    )
+
+    assert async_response.status_code == 200
+    assert async_response.data['results'][0]['id'] == str(published_article.pk)
+    assert async_response.content == sync_response.content
+
+
+def test_async_article_search_without_query():
+    sync_response, async_response = call(
+        ArticleViewSet,
+        {'get': 'search'},
+        '/api/v1/articles/search/',
+    )
+
+    assert async_response.status_code == 422
+
+
+def test_async_tag_roots(tags):
+    sync_response, async_response = call(TagViewSet, {'get': 'roots'}, '/')
+
+    assert async_response.status_code == 200
+    assert async_response.content == sync_response.content
+
+    sync_response, async_response = call(
+        TagViewSet,
+        {'get': 'roots'},
+        '/',
+        headers={'HTTP_IF_NONE_MATCH': async_response['ETag']},
+    )
+    assert async_response.status_code == 304
+
+
+def test_async_tag_subtree(tags):
+    sync_response, async_response = call(
+        TagViewSet,
+        {'get': 'subtree'},
+        '/',
+        pk=tags.pk,
+    )
+
+    assert async_response.status_code == 200
+    assert async_response.content == sync_response.content
+    assert len(async_response.data[0]['children']) == 1
+
+
+def test_async_view_sync_fallback(published_article, user):
+    view = get_view(
+        ArticleViewSet,
+        {'post': 'favorite', 'delete': 'favorite'},
+        is_async=True,
+    )
+    request = APIRequestFactory().post('/')
+    request._force_auth_user = user  # noqa: WPS437
+
+    response = async_to_sync(view)(request, pk=published_article.pk)
+
+    assert response.status_code == 201
+    assert user.favorite_articles.filter(article=published_article).exists()
+
+
+@pytest.mark.django_db(transaction=True)
+def test_load_test_command(live_server, published_article):
+    stdout = io.StringIO()
+
+    call_command(
+        'load_test',
+        base_url=f'{live_server.url}/api/v1/',
+        concurrency=2,
+        requests=4,
+        stdout=stdout,
+    )
+
+    output = stdout.getvalue()
+    assert f'articles/{published_article.pk}/: ' in output
+    assert 'errors 0' in output
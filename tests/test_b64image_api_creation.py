@@ -130,6 +130,8 @@ def test_users_me_change_avatar_bad_request(
     old_avatar = ImageFile(file=io.BytesIO(faker.image()), name=old_avatar_name)
     alt_user.avatar = old_avatar
     alt_user.save()
+    # хранилище переименовывает файл по хешу содержимого
+    old_avatar_name = os.path.basename(alt_user.avatar.name)
     with open(
         settings.BASE_DIR / 'tests' / 'fixtures' / 'snapshots' / image_file_name,
     ) as source:
@@ -1,8 +1,13 @@
+import base64
+import io
+
 import pytest
 from drf_extra_fields.fields import Base64ImageField
+from PIL import Image
 from rest_framework import serializers
 from rest_framework.exceptions import ValidationError
 
+from api.fields import ValidatedBase64ImageField
 from api.validators import (
     ImageBytesSizeValidator,
     ImageContentTypeValidator,
@@ -28,6 +33,21 @@ class ImageTypeRestrictedSerializer(serializers.Serializer):
     )
 
 
+class ValidatedImageSerializer(serializers.Serializer):
+    image = ValidatedBase64ImageField(
+        max_size_bytes=5000,
+        max_width=200,
+        max_height=200,
+        allowed_types=('jpg', 'jpeg', 'png'),
+    )
+
+
+def read_snapshot(settings, file_name):
+    snapshots_dir = settings.BASE_DIR / 'tests' / 'fixtures' / 'snapshots'
+    with open(snapshots_dir / file_name) as source:
+        return source.read()
+
+
 def test_image_size_exceeded(settings):
     with open(
         settings.BASE_DIR
@@ -127,3 +147,73 @@ def test_image_type_incorrect(settings):
     assert serializer.data is not None
     assert serializer.data['image'] is not None
     assert serializer.validated_data == {}
+
+
+def test_validated_image_ok(settings, mocker):
+    image_b64string = read_snapshot(settings, 'image_snapshot_jpeg_100_100.txt')
+    image_open = mocker.spy(Image, 'open')
+
+    serializer = ValidatedImageSerializer(
+        data={'image': f'data:image/jpeg;base64,{image_b64string}'},
+    )
+
+    assert serializer.is_valid() is True
+    assert image_open.call_count == 1
+    image = serializer.validated_data['image']
+    assert image.size == get_bytes_length(image_b64string)
+    assert image.name.endswith('.jpg')
+    assert image.content_type == 'image/jpeg'
+
+
+def test_validated_image_size_exceeded_before_decoding(settings, mocker):
+    image_b64string = read_snapshot(settings, 'image_snapshot_approx_1700_kbytes.txt')
+    b64decode = mocker.spy(base64, 'b64decode')
+    image_open = mocker.spy(Image, 'open')
+
+    serializer = ValidatedImageSerializer(data={'image': image_b64string})
+
+    assert serializer.is_valid() is False
+    assert 'File size exceeded' in serializer.errors['image'][0]
+    assert b64decode.call_count == 0
+    assert image_open.call_count == 0
+
+
+def test_validated_image_dimensions_exceeded(settings):
+    image_b64string = read_snapshot(settings, 'image_snapshot_jpg_225_225.txt')
+
+    serializer = ValidatedImageSerializer(data={'image': image_b64string})
+
+    assert serializer.is_valid() is False
+    assert 'Image dimensions exceeded' in serializer.errors['image'][0]
+
+
+def test_validated_image_type_disallowed():
+    buffer = io.BytesIO()
+    Image.new('RGB', (10, 10)).save(buffer, format='gif')
+    image_b64string = base64.b64encode(buffer.getvalue()).decode()
+
+    serializer = ValidatedImageSerializer(data={'image': image_b64string})
+
+    assert serializer.is_valid() is False
+    assert 'Type disallowed' in serializer.errors['image'][0]
+
+
+def test_validated_image_invalid():
+    image_b64string = base64.b64encode(b'not an image').decode()
+
+    serializer = ValidatedImageSerializer(data={'image': image_b64string})
+
+    assert serializer.is_valid() is False
+
+
+def test_validated_image_decompression_bomb(settings):
+    settings.BASE64_IMAGE_MAX_PIXELS = 1_000_000
+    buffer = io.BytesIO()
+    Image.new('1', (2000, 2000)).save(buffer, format='png')
+    image_b64string = base64.b64encode(buffer.getvalue()).decode()
+
+    serializer = ValidatedImageSerializer(data={'image': image_b64string})
+
+    assert len(buffer.getvalue()) < 5000
+    assert serializer.is_valid() is False
+    assert 'Image resolution exceeded' in serializer.errors['image'][0]
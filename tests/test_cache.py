@@ -0,0 +1,190 @@
+import asyncio
+import threading
+import time
+
+import pytest
+from asgiref.sync import async_to_sync, sync_to_async
+from django.contrib.contenttypes.models import ContentType
+from django.urls import reverse
+from prometheus_client import REGISTRY
+
+from articles.models import Tag
+from core import cache as cache_module
+from core.cache import CacheEntry, LocalLRUCache, TwoTierCache
+from likes.models import Vote, VoteTypes
+from users.services import get_users_stats
+
+
+def make_cache(**options):
+    return TwoTierCache('project', **{'lock_poll_interval': 0.01, **options})
+
+
+def get_sample(result, namespace='test'):
+    sample = REGISTRY.get_sample_value(
+        'project_cache_requests_total',
+        {'namespace': namespace, 'result': result},
+    )
+    return sample or 0
+
+
+def test_local_cache_evicts_least_recently_used():
+    local = LocalLRUCache(max_entries=2)
+    local.set('a', 1, 60)
+    local.set('b', 2, 60)
+    local.get('a')
+
+    local.set('c', 3, 60)
+
+    assert local.get('a') == 1
+    assert local.get('b', None) is None
+    assert len(local) == 2
+
+
+def test_local_cache_expires_entries(mocker):
+    local = LocalLRUCache(max_entries=2)
+    local.set('a', 1, 5)
+    expired_at = time.monotonic() + 10
+    mocker.patch.object(cache_module.time, 'monotonic', return_value=expired_at)
+
+    assert local.get('a', None) is None
+
+
+def test_get_or_set_uses_both_tiers():
+    project_cache = make_cache()
+    calls = []
+    local_hits = get_sample('local_hit')
+
+    def compute():
+        calls.append(1)
+        return 'value'
+
+    assert project_cache.get_or_set('test', 'key', compute, 60) == 'value'
+    assert project_cache.get_or_set('test', 'key', compute, 60) == 'value'
+    project_cache.local.clear()
+    assert project_cache.get_or_set('test', 'key', compute, 60) == 'value'
+
+    assert len(calls) == 1
+    assert get_sample('local_hit') == local_hits + 1
+
+
+def test_invalidate_namespace():
+    project_cache = make_cache()
+    project_cache.get_or_set('test', 'key', lambda: 'old', 60)
+
+    project_cache.invalidate_namespace('test')
+
+    assert project_cache.get_or_set('test', 'key', lambda: 'new', 60) == 'new'
+
+
+def test_get_or_set_computes_once_for_concurrent_requests():
+    project_cache = make_cache()
+    calls = []
+    results = []
+
+    def compute():
+        calls.append(1)
+        time.sleep(0.2)
+        return 'value'
+
+    def get():
+        results.append(project_cache.get_or_set('test', 'slow', compute, 60))
+
+    threads = [threading.Thread(target=get) for _ in range(3)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(calls) == 1
+    assert results == ['value'] * 3
+
+
+def test_aget_or_set_waits_outside_thread_sensitive_executor():
+    project_cache = make_cache(lock_timeout=0.5)
+    full_key = project_cache.make_key('test', 'locked')
+    # значение «вычисляет» другой запрос, который так и не сохранит его
+    project_cache.remote.add(f'lock:{full_key}', 1, 1)
+    events = []
+
+    def compute():
+        events.append('compute')
+        return 'value'
+
+    async def requests():
+        return await asyncio.gather(
+            project_cache.aget_or_set('test', 'locked', compute, 60),
+            sync_to_async(events.append)('other request'),
+        )
+
+    assert async_to_sync(requests)()[0] == 'value'
+    assert events == ['other request', 'compute']
+
+
+def test_get_or_set_recomputes_before_expiration(mocker):
+    project_cache = make_cache()
+    full_key = project_cache.make_key('test', 'key')
+    project_cache.remote.set(full_key, CacheEntry('old', 1.0, time.time() + 10), 60)
+    mocker.patch.object(cache_module.random, 'random', return_value=0.99999)
+    early_recomputes = get_sample('early_recompute')
+
+    value = project_cache.get_or_set('test', 'key', lambda: 'new', 60)
+
+    assert value == 'new'
+    assert get_sample('early_recompute') == early_recomputes + 1
+
+
+@pytest.mark.django_db
+def test_tag_roots_cache_invalidated_on_tag_save(client):
+    Tag.objects.create(name='Терапия')
+    url = reverse('api:tags-roots')
+    client.get(url)
+
+    Tag.objects.create(name='Хирургия')
+    response = client.get(url)
+
+    assert {tag['name'] for tag in response.data} == {'Терапия', 'Хирургия'}
+
+
+@pytest.mark.django_db
+def test_user_stats_invalidated_on_vote(authenticated_client, article, alt_user):
+    url = reverse('api:users-me')
+    authenticated_client.get(url)
+
+    Vote.objects.create(
+        content_type=ContentType.objects.get_for_model(article),
+        object_id=article.pk,
+        user=alt_user,
+        vote=VoteTypes.LIKE,
+    )
+    response = authenticated_client.get(url)
+
+    assert response.data['rating'] == 1
+
+
+@pytest.mark.django_db
+def test_users_stats_computed_in_one_query(
+    article, user, alt_user, django_assert_num_queries
+):
+    expected = {
+        user.pk: {'rating': 0, 'publications_amount': 1},
+        alt_user.pk: {'rating': 0, 'publications_amount': 0},
+    }
+
+    with django_assert_num_queries(1):
+        assert get_users_stats([user.pk, alt_user.pk]) == expected
+    with django_assert_num_queries(0):
+        assert get_users_stats([user.pk, alt_user.pk]) == expected
+
+
+@pytest.mark.django_db
+def test_users_list_stats(authenticated_client, user, alt_user, article):
+    user.is_staff = True
+    user.save()
+
+    response = authenticated_client.get(reverse('api:users-list'))
+
+    stats = {
+        item['id']: (item['rating'], item['publications_amount'])
+        for item in response.data
+    }
+    assert stats == {str(user.pk): (0, 1), str(alt_user.pk): (0, 0)}
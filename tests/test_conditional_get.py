@@ -0,0 +1,154 @@
+import pytest
+from django.urls import reverse
+
+from api.serializers import ArticleSerializer
+from articles.models import Article, ArticleEngagement, Tag
+
+pytestmark = pytest.mark.django_db
+
+
+@pytest.fixture()
+def published_article(article):
+    article.is_published = True
+    article.save()
+    return article
+
+
+def detail_url(article):
+    return reverse('api:articles-detail', args=(article.pk,))
+
+
+def test_article_not_modified(client, published_article, mocker):
+    url = detail_url(published_article)
+    response = client.get(url)
+    assert response.status_code == 200
+    assert response['Last-Modified']
+    to_representation = mocker.spy(ArticleSerializer, 'to_representation')
+
+    response = client.get(url, HTTP_IF_NONE_MATCH=response['ETag'])
+
+    assert response.status_code == 304
+    assert to_representation.call_count == 0
+
+
+def test_article_if_modified_since(client, published_article):
+    url = detail_url(published_article)
+    last_modified = client.get(url)['Last-Modified']
+
+    response = client.get(url, HTTP_IF_MODIFIED_SINCE=last_modified)
+
+    assert response.status_code == 304
+
+
+def test_article_etag_changes_on_vote(
+    client,
+    alt_authenticated_client,
+    published_article,
+):
+    url = detail_url(published_article)
+    etag = client.get(url)['ETag']
+
+    alt_authenticated_client.post(
+        reverse('api:articles-add-vote', args=(published_article.pk, 'like')),
+    )
+    response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+
+    assert response.status_code == 200
+    assert response.data['total_likes'] == 1
+
+
+def test_article_vote_keeps_article_row(alt_authenticated_client, published_article):
+    changed_at = published_article.changed_at
+
+    alt_authenticated_client.post(
+        reverse('api:articles-add-vote', args=(published_article.pk, 'like')),
+    )
+
+    assert Article.objects.get(pk=published_article.pk).changed_at == changed_at
+    assert ArticleEngagement.objects.get(article_id=published_article.pk).changed_at
+
+
+def test_deleted_article_engagement(alt_authenticated_client, published_article):
+    alt_authenticated_client.post(
+        reverse('api:articles-add-vote', args=(published_article.pk, 'like')),
+    )
+
+    published_article.delete()
+
+    assert not ArticleEngagement.objects.exists()
+
+
+def test_article_etag_depends_on_user(client, authenticated_client, published_article):
+    url = detail_url(published_article)
+
+    assert client.get(url)['ETag'] != authenticated_client.get(url)['ETag']
+
+
+def test_article_etag_changes_on_author_update(client, published_article, user):
+    url = detail_url(published_article)
+    etag = client.get(url)['ETag']
+
+    user.first_name = 'Другое'
+    user.save()
+
+    assert client.get(url, HTTP_IF_NONE_MATCH=etag).status_code == 200
+
+
+def test_article_list_not_modified(client, published_article):
+    url = reverse('api:articles-list')
+    etag = client.get(url)['ETag']
+
+    assert client.get(url, HTTP_IF_NONE_MATCH=etag).status_code == 304
+
+    published_article.tags.add(Tag.objects.create(name='Кардиология'))
+
+    assert client.get(url, HTTP_IF_NONE_MATCH=etag).status_code == 200
+
+
+def test_article_list_etag_changes_on_vote(
+    client,
+    alt_authenticated_client,
+    published_article,
+):
+    url = reverse('api:articles-list')
+    etag = client.get(url)['ETag']
+
+    alt_authenticated_client.post(
+        reverse('api:articles-add-vote', args=(published_article.pk, 'like')),
+    )
+
+    assert client.get(url, HTTP_IF_NONE_MATCH=etag).status_code == 200
+
+
+def test_article_list_etag_changes_on_unpublish(client, published_article):
+    url = reverse('api:articles-list')
+    etag = client.get(url)['ETag']
+
+    published_article.is_published = False
+    published_article.save()
+
+    assert client.get(url, HTTP_IF_NONE_MATCH=etag).status_code == 200
+
+
+def test_tags_not_modified(client):
+    tag = Tag.objects.create(name='Неврология')
+    url = reverse('api:tags-list')
+    etag = client.get(url)['ETag']
+
+    assert client.get(url, HTTP_IF_NONE_MATCH=etag).status_code == 304
+
+    tag.name = 'Нейрохирургия'
+    tag.save()
+
+    assert client.get(url, HTTP_IF_NONE_MATCH=etag).status_code == 200
+
+
+def test_tag_roots_etag_changes_on_delete(client):
+    Tag.objects.create(name='Неврология')
+    tag = Tag.objects.create(name='Терапия')
+    url = reverse('api:tags-roots')
+    etag = client.get(url)['ETag']
+
+    tag.delete()
+
+    assert client.get(url, HTTP_IF_NONE_MATCH=etag).status_code == 200
@@ -0,0 +1,173 @@
+import pytest
+from django.db import OperationalError, connection
+from django.urls import reverse
+from prometheus_client import REGISTRY
+from psycopg2 import OperationalError as PsycopgOperationalError
+from psycopg2.extensions import TRANSACTION_STATUS_IDLE, TRANSACTION_STATUS_INERROR
+
+from core.db.backends.postgresql import pool as pool_module
+from core.db.backends.postgresql.pool import ConnectionPool
+
+
+class FakeConnection:
+    def __init__(self):
+        self.closed = 0
+        self.transaction_status = TRANSACTION_STATUS_IDLE
+        self.is_alive = True
+
+    def get_transaction_status(self):
+        return self.transaction_status
+
+    def rollback(self):
+        self.transaction_status = TRANSACTION_STATUS_IDLE
+
+    def cursor(self):
+        if not self.is_alive:
+            raise PsycopgOperationalError('server closed the connection')
+        return FakeCursor()
+
+    def close(self):
+        self.closed = 1
+
+
+class FakeCursor:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        return False
+
+    def execute(self, sql):
+        pass
+
+
+def make_pool(**options):
+    return ConnectionPool('test', **{'timeout': 0.01, **options})
+
+
+def get_sample(name, **labels):
+    return REGISTRY.get_sample_value(name, {'alias': 'test', **labels}) or 0
+
+
+def test_pool_reuses_connection():
+    pool = make_pool()
+    connection = pool.getconn(FakeConnection)
+
+    pool.putconn(connection)
+
+    assert pool.getconn(FakeConnection) is connection
+    assert pool.size == 1
+
+
+def test_pool_timeout_when_exhausted():
+    pool = make_pool(max_size=1)
+    pool.getconn(FakeConnection)
+    timeouts = get_sample('db_pool_timeouts_total')
+
+    with pytest.raises(PsycopgOperationalError):
+        pool.getconn(FakeConnection)
+
+    assert get_sample('db_pool_timeouts_total') == timeouts + 1
+
+
+def test_pool_rolls_back_returned_transaction():
+    pool = make_pool()
+    connection = pool.getconn(FakeConnection)
+    connection.transaction_status = TRANSACTION_STATUS_INERROR
+
+    pool.putconn(connection)
+
+    assert connection.get_transaction_status() == TRANSACTION_STATUS_IDLE
+    assert pool.idle_size == 1
+
+
+@pytest.mark.parametrize(
+    ('options', 'break_connection', 'reason'),
+    [
+        ({'max_lifetime': 0}, lambda connection: None, 'lifetime'),
+        ({}, lambda connection: setattr(connection, 'closed', 1), 'broken'),
+    ],
+)
+def test_pool_discards_connection(options, break_connection, reason):
+    pool = make_pool(**options)
+    connection = pool.getconn(FakeConnection)
+    break_connection(connection)
+    discarded = get_sample('db_pool_connections_discarded_total', reason=reason)
+
+    pool.putconn(connection)
+
+    assert pool.size == 0
+    assert pool.getconn(FakeConnection) is not connection
+    assert get_sample('db_pool_connections_discarded_total', reason=reason) == (
+        discarded + 1
+    )
+
+
+def test_pool_health_check_of_idle_connection():
+    pool = make_pool(check_idle=0)
+    connection = pool.getconn(FakeConnection)
+    pool.putconn(connection)
+    connection.is_alive = False
+
+    new_connection = pool.getconn(FakeConnection)
+
+    assert new_connection is not connection
+    assert connection.closed
+    assert pool.size == 1
+
+
+def test_pool_closes_idle_connections_above_min_size():
+    pool = make_pool(min_size=1, max_idle=0)
+    raw_connections = [pool.getconn(FakeConnection) for _ in range(3)]
+
+    for raw_connection in raw_connections:
+        pool.putconn(raw_connection)
+
+    assert pool.size == 1
+    assert pool.idle_size == 1
+
+
+def test_pool_ignores_connections_of_parent_process(mocker):
+    pool = make_pool()
+    connection = pool.getconn(FakeConnection)
+    mocker.patch.object(pool_module.os, 'getpid', return_value=pool.pid + 1)
+
+    pool.putconn(connection)
+
+    assert not connection.closed
+    assert pool.idle_size == 0
+
+
+@pytest.mark.django_db(transaction=True)
+def test_django_connection_returned_to_pool():
+    connection.ensure_connection()
+    raw_connection = connection.connection
+
+    connection.close()
+    connection.ensure_connection()
+
+    assert connection.connection is raw_connection
+    with connection.cursor() as cursor:
+        cursor.execute('SELECT 1')
+
+
+@pytest.mark.django_db(transaction=True)
+def test_django_connection_pool_timeout(mocker):
+    mocker.patch.object(ConnectionPool, 'getconn', side_effect=PsycopgOperationalError)
+    connection.close()
+
+    with pytest.raises(OperationalError):
+        connection.ensure_connection()
+
+
+def test_metrics_view(client):
+    response = client.get(reverse('metrics'))
+
+    assert response.status_code == 200
+    assert b'db_pool_wait_seconds' in response.content
+
+
+def test_metrics_view_forbidden(client):
+    response = client.get(reverse('metrics'), REMOTE_ADDR='10.0.0.1')
+
+    assert response.status_code == 403
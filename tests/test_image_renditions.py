@@ -0,0 +1,139 @@
+import io
+
+import pytest
+from django.core.files.images import ImageFile
+from django.urls import reverse
+from PIL import Image
+
+from articles.tasks import create_article_image_renditions_task
+from core import renditions as renditions_module
+from core.renditions import get_rendition_name
+from users.tasks import create_avatar_renditions_task
+
+pytestmark = pytest.mark.django_db
+
+
+@pytest.fixture()
+def published_article(article):
+    article.is_published = True
+    article.save()
+    return article
+
+
+@pytest.fixture()
+def large_image_article(article, faker):
+    article.image = ImageFile(
+        file=io.BytesIO(faker.image(image_format='png', size=(2000, 1000))),
+        name='large.png',
+    )
+    article.is_published = True
+    article.save()
+    yield article
+
+    article.image.delete()
+
+
+def test_create_renditions(large_image_article, settings):
+    create_article_image_renditions_task(large_image_article.pk)
+
+    large_image_article.refresh_from_db()
+    renditions = large_image_article.image_renditions
+    storage = large_image_article.image.storage
+    assert renditions['source'] == large_image_article.image.name
+    for rendition, (max_width, max_height) in settings.IMAGE_RENDITIONS.items():
+        for image_format in settings.IMAGE_RENDITION_FORMATS:
+            name = renditions[rendition][image_format]
+            assert name == get_rendition_name(
+                large_image_article.image.name,
+                rendition,
+                image_format,
+            )
+            with storage.open(name) as rendition_file:
+                image = Image.open(rendition_file)
+                assert image.format.lower() == image_format
+                assert image.width <= max_width
+                assert image.height <= max_height
+
+
+def test_renditions_fallback_to_original(client, published_article):
+    response = client.get(reverse('api:articles-detail', args=(published_article.pk,)))
+
+    image_renditions = response.data['image_renditions']
+    assert image_renditions['thumb']['webp'] == response.data['image']
+    assert image_renditions['full']['jpeg'] == response.data['image']
+
+
+def test_renditions_in_article_response(client, published_article):
+    create_article_image_renditions_task(published_article.pk)
+
+    response = client.get(reverse('api:articles-detail', args=(published_article.pk,)))
+
+    thumb_url = response.data['image_renditions']['thumb']['webp']
+    assert thumb_url != response.data['image']
+    assert thumb_url.endswith('.thumb.webp')
+
+
+def test_outdated_renditions_ignored(client, published_article, faker):
+    create_article_image_renditions_task(published_article.pk)
+    published_article.refresh_from_db()
+    published_article.image = ImageFile(
+        file=io.BytesIO(faker.image(image_format='jpeg')),
+        name='replaced.jpeg',
+    )
+    published_article.save()
+
+    response = client.get(reverse('api:articles-detail', args=(published_article.pk,)))
+
+    assert response.data['image_renditions']['card']['jpeg'] == response.data['image']
+
+
+def test_renditions_scheduled_on_upload(
+    article,
+    faker,
+    mocker,
+    django_capture_on_commit_callbacks,
+):
+    delay = mocker.patch(
+        'articles.signals.create_article_image_renditions_task.delay',
+    )
+    article.image = ImageFile(
+        file=io.BytesIO(faker.image(image_format='jpeg')),
+        name='new.jpeg',
+    )
+
+    with django_capture_on_commit_callbacks(execute=True):
+        article.save()
+
+    delay.assert_called_once_with(str(article.pk))
+
+
+def test_avatar_renditions(authenticated_client, user, faker):
+    user.avatar = ImageFile(
+        file=io.BytesIO(faker.image(image_format='png', size=(400, 400))),
+        name='avatar.png',
+    )
+    user.save()
+    create_avatar_renditions_task(user.pk)
+
+    response = authenticated_client.get(reverse('api:users-me'))
+
+    assert response.data['avatar_renditions']['thumb']['jpeg'].endswith(
+        '.thumb.jpg',
+    )
+    user.refresh_from_db()
+    user.avatar.delete()
+
+
+def test_no_avatar_renditions(authenticated_client):
+    response = authenticated_client.get(reverse('api:users-me'))
+
+    assert response.data['avatar_renditions'] is None
+
+
+def test_renditions_reused_for_same_image(large_image_article, mocker):
+    create_article_image_renditions_task(large_image_article.pk)
+    render = mocker.spy(renditions_module, '_render')
+
+    create_article_image_renditions_task(large_image_article.pk)
+
+    assert render.call_count == 0
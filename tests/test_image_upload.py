@@ -0,0 +1,126 @@
+import os
+
+import pytest
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.urls import reverse
+from PIL import Image
+
+from api.parsers import ImageUploadHandler
+
+pytestmark = pytest.mark.django_db
+
+
+def upload(client, url, field_name, content, name='upload.jpeg'):
+    return client.put(
+        url,
+        {field_name: SimpleUploadedFile(name, content)},
+        format='multipart',
+    )
+
+
+def test_article_image_upload(authenticated_client, article, faker):
+    old_image_name = article.image.name
+    url = reverse('api:articles-image', args=(article.pk,))
+
+    content = faker.image(image_format='png')
+
+    response = upload(authenticated_client, url, 'image', content)
+
+    assert response.status_code == 200
+    article.refresh_from_db()
+    assert article.image.name != old_image_name
+    assert article.image.name.endswith('.png')
+    assert response.data['image'] == 'http://testserver' + article.image.url
+    assert os.path.exists(article.image.path)
+    assert Image.open(article.image.path).format == 'PNG'
+    article.image.storage.delete(old_image_name)
+
+
+def test_article_image_upload_not_author(alt_authenticated_client, article, faker):
+    url = reverse('api:articles-image', args=(article.pk,))
+
+    response = upload(
+        alt_authenticated_client,
+        url,
+        'image',
+        faker.image(image_format='jpeg'),
+    )
+
+    assert response.status_code == 403
+
+
+def test_article_image_upload_anonymous(client, article, faker):
+    url = reverse('api:articles-image', args=(article.pk,))
+
+    response = upload(client, url, 'image', faker.image(image_format='jpeg'))
+
+    assert response.status_code == 401
+
+
+def test_article_image_size_exceeded_while_streaming(
+    authenticated_client,
+    article,
+    faker,
+    settings,
+    mocker,
+):
+    old_image_name = article.image.name
+    content = faker.image(image_format='jpeg')
+    content += b'\0' * settings.BASE64_IMAGE_MAX_SIZE_BYTES * 2
+    receive_data_chunk = mocker.spy(ImageUploadHandler, 'receive_data_chunk')
+    url = reverse('api:articles-image', args=(article.pk,))
+
+    response = upload(authenticated_client, url, 'image', content)
+
+    assert response.status_code == 400
+    assert 'File size exceeded' in response.data['image'][0]
+    chunks_count = len(content) // ImageUploadHandler.chunk_size + 1
+    assert receive_data_chunk.call_count < chunks_count
+    article.refresh_from_db()
+    assert article.image.name == old_image_name
+
+
+@pytest.mark.parametrize(
+    'content, error',
+    [
+        (b'not an image' * 100, 'Please upload a valid image.'),
+        (None, 'Type disallowed'),
+    ],
+)
+def test_article_image_rejected(authenticated_client, article, faker, content, error):
+    content = content or faker.image(image_format='gif')
+    url = reverse('api:articles-image', args=(article.pk,))
+
+    response = upload(authenticated_client, url, 'image', content)
+
+    assert response.status_code == 400
+    assert error in response.data['image'][0]
+
+
+def test_avatar_upload(authenticated_client, user, faker):
+    response = upload(
+        authenticated_client,
+        reverse('api:users-avatar'),
+        'avatar',
+        faker.image(image_format='jpeg', size=(200, 200)),
+    )
+
+    assert response.status_code == 200
+    user.refresh_from_db()
+    assert user.avatar.name.endswith('.jpg')
+    assert response.data['avatar'] == 'http://testserver' + user.avatar.url
+    user.avatar.delete()
+
+
+def test_avatar_dimensions_exceeded(authenticated_client, user, faker):
+    response = upload(
+        authenticated_client,
+        reverse('api:users-avatar'),
+        'avatar',
+        faker.image(image_format='jpeg', size=(600, 200)),
+    )
+
+    assert response.status_code == 400
+    assert 'Image dimensions exceeded' in response.data['avatar'][0]
+    user.refresh_from_db()
+    assert not user.avatar
@@ -0,0 +1,157 @@
+import json
+import time
+
+import pytest
+import redis
+from celery.signals import worker_process_init
+from django.urls import reverse
+from django.utils import timezone
+from prometheus_client import REGISTRY
+
+from core import invalidation
+from core.cache import TwoTierCache
+from core.invalidation import LocalInvalidationBus, RedisInvalidationBus
+from users.authentication import token_cache
+
+
+@pytest.fixture()
+def evicted(mocker):
+    evicted = []
+    mocker.patch.dict(invalidation._handlers)  # noqa: WPS437
+    invalidation.register_handler('test', evicted.append)
+    return evicted
+
+
+def get_lag_count():
+    sample = REGISTRY.get_sample_value(
+        'cache_invalidation_lag_seconds_count',
+        {'cache': 'test'},
+    )
+    return sample or 0
+
+
+def test_publish_evicts_keys(evicted):
+    lag_count = get_lag_count()
+
+    invalidation.publish('test', ['a', 'b'])
+    invalidation.publish('unknown', ['a'])
+
+    assert evicted == [['a', 'b']]
+    assert get_lag_count() == lag_count + 1
+
+
+def test_project_cache_evicts_keys_of_other_processes(mocker):
+    mocker.patch.dict(invalidation._handlers)  # noqa: WPS437
+    project_cache = TwoTierCache('project', invalidation_name='test')
+    # кеш другого процесса: свой уровень в памяти, общий кеш тот же
+    other_cache = TwoTierCache('project')
+    invalidation.register_handler('test', other_cache.evict_local)
+    other_cache.get_or_set('test', 'key', lambda: 'old', 60)
+
+    project_cache.delete('test', 'key')
+
+    assert other_cache.get_or_set('test', 'key', lambda: 'new', 60) == 'new'
+
+
+def test_redis_bus_publish_error(mocker):
+    bus = RedisInvalidationBus('redis://localhost:1/0', 'test')
+    client = mocker.patch.object(redis, 'Redis').from_url.return_value
+    client.publish.side_effect = redis.ConnectionError
+    errors = REGISTRY.get_sample_value('cache_invalidation_publish_errors_total')
+
+    bus.publish('{}')
+
+    assert REGISTRY.get_sample_value('cache_invalidation_publish_errors_total') == (
+        errors + 1
+    )
+
+
+def test_redis_bus_dispatches_messages(mocker, evicted):
+    bus = RedisInvalidationBus('redis://localhost:1/0', 'test', reconnect_interval=0)
+    message = json.dumps({'cache': 'test', 'keys': ['a'], 'sent_at': time.time()})
+    pubsub = mocker.patch.object(redis, 'Redis').from_url.return_value.pubsub()
+    pubsub.listen.side_effect = [
+        redis.ConnectionError,
+        iter(
+            [
+                {'type': 'message', 'data': b'invalid'},
+                {'type': 'message', 'data': message.encode()},
+            ],
+        ),
+        SystemExit,
+    ]
+
+    with pytest.raises(SystemExit):
+        bus._listen()  # noqa: WPS437
+
+    # после переподключения кеш очищается целиком
+    assert evicted[:2] == [None, ['a']]
+
+
+def test_redis_bus_started_once_per_process(mocker):
+    bus = RedisInvalidationBus('redis://localhost:1/0', 'test')
+    thread = mocker.patch.object(invalidation.threading, 'Thread').return_value
+
+    bus.start()
+    bus.start()
+    mocker.patch.object(invalidation.os, 'getpid', return_value=bus._pid + 1)
+    bus.start()
+
+    assert thread.start.call_count == 2
+
+
+def test_celery_worker_starts_bus(mocker):
+    bus = mocker.patch.object(invalidation, 'get_invalidation_bus').return_value
+
+    worker_process_init.send(sender=None)
+
+    bus.start.assert_called_once_with()
+
+
+def test_default_bus_is_local():
+    assert isinstance(invalidation.get_invalidation_bus(), LocalInvalidationBus)
+
+
+@pytest.mark.django_db
+def test_token_cache_evicted_on_logout(authenticated_client):
+    url = reverse('api:users-me')
+    assert authenticated_client.get(url).status_code == 200
+    assert len(token_cache) == 1
+
+    assert authenticated_client.post(reverse('api:logout')).status_code == 204
+
+    assert len(token_cache) == 0
+    assert authenticated_client.get(url).status_code == 401
+
+
+@pytest.mark.django_db
+def test_token_cache_evicted_on_user_change(authenticated_client, user):
+    url = reverse('api:users-me')
+    authenticated_client.get(url)
+
+    user.is_active = False
+    user.save()
+
+    assert authenticated_client.get(url).status_code == 401
+
+
+@pytest.mark.django_db
+def test_token_cache_kept_on_login(authenticated_client, user):
+    url = reverse('api:users-me')
+    authenticated_client.get(url)
+
+    user.last_login = timezone.now()
+    user.save(update_fields=['last_login'])
+
+    assert len(token_cache) == 1
+
+
+@pytest.mark.django_db
+def test_token_cache_evicted_on_profile_change(authenticated_client):
+    url = reverse('api:users-me')
+    authenticated_client.get(url)
+
+    response = authenticated_client.patch(url, {'first_name': 'Другое'}, format='json')
+
+    assert response.status_code == 200
+    assert len(token_cache) == 0
@@ -0,0 +1,182 @@
+import os
+import time
+from pathlib import Path
+
+import pytest
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.urls import reverse
+
+from core.storage import (
+    collect_media_garbage,
+    get_content_hash,
+    get_media_references,
+    is_content_hashed,
+)
+
+pytestmark = pytest.mark.django_db
+
+
+@pytest.fixture(autouse=True)
+def django_media_serving(settings):
+    settings.MEDIA_SERVING = 'django'
+
+
+def allow_nothing(request, path):
+    return False
+
+
+def media_url(field_file):
+    return reverse('media', args=(field_file.name,))
+
+
+def test_content_hashed_name(article):
+    with article.image.open() as image:
+        content_hash = get_content_hash(image)
+
+    assert os.path.basename(article.image.name).startswith(content_hash)
+    assert article.image.name.endswith('.jpeg')
+    assert article.image.name.startswith('images/')
+    assert is_content_hashed(article.image.name)
+
+
+def test_serve_media(client, article):
+    response = client.get(media_url(article.image))
+
+    assert response.status_code == 200
+    with article.image.open() as image:
+        assert b''.join(response.streaming_content) == image.read()
+    assert response['Content-Type'] == 'image/jpeg'
+    assert response['ETag'] == f'"{os.path.basename(article.image.name)}"'
+    assert 'immutable' in response['Cache-Control']
+
+
+def test_serve_media_not_modified(client, article):
+    url = media_url(article.image)
+    etag = client.get(url)['ETag']
+
+    response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+
+    assert response.status_code == 304
+    assert response['ETag'] == etag
+
+
+def test_serve_media_not_hashed_name(client, faker, settings):
+    path = Path(settings.MEDIA_ROOT) / 'legacy.jpeg'
+    path.write_bytes(faker.image(image_format='jpeg'))
+
+    response = client.get(reverse('media', args=('legacy.jpeg',)))
+
+    assert response.status_code == 200
+    assert 'immutable' not in response['Cache-Control']
+    path.unlink()
+
+
+def test_serve_media_x_accel_redirect(client, article, settings):
+    settings.MEDIA_SERVING = 'x-accel-redirect'
+
+    response = client.get(media_url(article.image))
+
+    assert response.status_code == 200
+    assert response['X-Accel-Redirect'] == f'/protected-media/{article.image.name}'
+    assert response.content == b''
+    assert 'immutable' in response['Cache-Control']
+
+
+def test_serve_media_x_sendfile(client, article, settings):
+    settings.MEDIA_SERVING = 'x-sendfile'
+
+    response = client.get(media_url(article.image))
+
+    assert response['X-Sendfile'] == article.image.path
+
+
+def test_serve_media_permission_denied(client, article, settings):
+    settings.MEDIA_PERMISSION_CHECK = 'tests.test_media.allow_nothing'
+
+    response = client.get(media_url(article.image))
+
+    assert response.status_code == 403
+
+
+def test_serve_media_permission_denied_for_missing_file(client, settings):
+    settings.MEDIA_PERMISSION_CHECK = 'tests.test_media.allow_nothing'
+
+    response = client.get(reverse('media', args=('images/missing.jpeg',)))
+
+    assert response.status_code == 403
+
+
+@pytest.mark.parametrize('path', ['missing.jpeg', '../manage.py', 'images'])
+def test_serve_media_not_found(client, path):
+    response = client.get(reverse('media', args=(path,)))
+
+    assert response.status_code == 404
+
+
+def make_stale(name, settings):
+    expired_at = time.time() - settings.MEDIA_GC_GRACE_PERIOD.total_seconds() - 60
+    os.utime(default_storage.path(name), (expired_at, expired_at))
+
+
+def test_same_content_stored_once(faker):
+    content = faker.image(image_format='png')
+
+    first_name = default_storage.save('images/first.png', ContentFile(content))
+    second_name = default_storage.save('images/second.png', ContentFile(content))
+
+    assert first_name == second_name
+    default_storage.delete(first_name)
+    assert default_storage.exists(first_name)
+
+
+def test_media_references(article):
+    article.image_renditions = {
+        'source': article.image.name,
+        'thumb': {'webp': 'images/thumb.webp'},
+    }
+    article.save()
+
+    references = get_media_references()
+
+    assert references[article.image.name] >= 1
+    assert references['images/thumb.webp'] == 1
+
+
+def test_collect_media_garbage(article, faker, settings):
+    orphan_name = default_storage.save(
+        'images/orphan.png',
+        ContentFile(faker.image(image_format='png', size=(10, 10))),
+    )
+    fresh_name = default_storage.save(
+        'images/fresh.png',
+        ContentFile(faker.image(image_format='png', size=(20, 20))),
+    )
+    legacy_path = Path(settings.MEDIA_ROOT) / 'legacy.jpeg'
+    legacy_path.write_bytes(b'legacy')
+    for name in (orphan_name, article.image.name, 'legacy.jpeg'):
+        make_stale(name, settings)
+
+    assert collect_media_garbage(dry_run=True)[0] >= 1
+    assert default_storage.exists(orphan_name)
+
+    deleted_count, deleted_size = collect_media_garbage()
+
+    assert deleted_count >= 1
+    assert deleted_size > 0
+    assert not default_storage.exists(orphan_name)
+    assert default_storage.exists(article.image.name)
+    assert default_storage.exists(fresh_name)
+    assert legacy_path.exists()
+    legacy_path.unlink()
+
+
+def test_saving_existing_content_protects_it_from_garbage(faker, settings):
+    content = faker.image(image_format='png', size=(30, 30))
+    name = default_storage.save('images/reused.png', ContentFile(content))
+    make_stale(name, settings)
+
+    default_storage.save('images/reused.png', ContentFile(content))
+    collect_media_garbage()
+
+    assert default_storage.exists(name)
@@ -0,0 +1,64 @@
+import gzip
+
+import pytest
+from django.core.management import call_command
+from django.urls import reverse
+from drf_spectacular.views import SpectacularAPIView
+from rest_framework.test import APIRequestFactory
+
+from api.openapi import get_schema_path, load_schema_artefacts
+
+pytestmark = pytest.mark.django_db
+
+
+@pytest.fixture(autouse=True)
+def schema_artefacts():
+    call_command('generate_openapi_schema')
+    yield
+    load_schema_artefacts.cache_clear()
+
+
+def get_live_schema(schema_format):
+    request = APIRequestFactory().get('/api/v1/schema/', {'format': schema_format})
+    response = SpectacularAPIView.as_view()(request)
+    return response.render().content
+
+
+@pytest.mark.parametrize('schema_format', ['yaml', 'json'])
+def test_schema_matches_live_generation(client, schema_format):
+    response = client.get(reverse('api:openapi-schema'), {'format': schema_format})
+
+    assert response.status_code == 200
+    assert response.content == get_live_schema(schema_format)
+    assert gzip.decompress(get_schema_path(schema_format).read_bytes()) == (
+        response.content
+    )
+
+
+def test_schema_gzip(client):
+    url = reverse('api:openapi-schema')
+
+    response = client.get(url, HTTP_ACCEPT_ENCODING='gzip, deflate')
+
+    assert response['Content-Encoding'] == 'gzip'
+    assert gzip.decompress(response.content) == client.get(url).content
+    assert 'Accept-Encoding' in response['Vary']
+
+
+def test_schema_not_modified(client):
+    url = reverse('api:openapi-schema')
+    etag = client.get(url)['ETag']
+
+    response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+
+    assert response.status_code == 304
+
+
+def test_schema_generated_when_missing(client):
+    get_schema_path('yaml').unlink()
+    load_schema_artefacts.cache_clear()
+
+    response = client.get(reverse('api:openapi-schema'))
+
+    assert response.status_code == 200
+    assert get_schema_path('yaml').exists()
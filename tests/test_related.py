@@ -0,0 +1,188 @@
+import pytest
+from django.urls import reverse
+
+from articles import related
+from articles.models import Article, RelatedArticle, Tag
+from articles.related import rebuild_related_articles, update_related_articles
+
+pytestmark = pytest.mark.django_db
+
+
+@pytest.fixture()
+def tags():
+    infections = Tag.objects.create(name='Инфекции')
+    flu = Tag.objects.create(name='Грипп', parent=infections)
+    cardiology = Tag.objects.create(name='Кардиология')
+    return infections, flu, cardiology
+
+
+@pytest.fixture()
+def create_article(article_content, user):
+    def create(text, tags=(), is_published=True):
+        article = Article.objects.create(
+            **{**article_content, 'title': text, 'annotation': text, 'text': text},
+            author=user,
+            is_published=is_published,
+        )
+        article.tags.set(tags)
+        return article
+
+    return create
+
+
+def related_ids(article):
+    return list(
+        RelatedArticle.objects.filter(article=article).values_list(
+            'related_id',
+            flat=True,
+        ),
+    )
+
+
+def test_related_by_text_and_tags(create_article, tags):
+    infections, flu, cardiology = tags
+    flu_article = create_article('Вакцинация от гриппа осенью', tags=[flu])
+    similar = create_article('Вакцинация от гриппа детей', tags=[flu])
+    cardiology_article = create_article('Гипертония и давление', tags=[cardiology])
+
+    rebuild_related_articles()
+
+    assert related_ids(flu_article) == [similar.pk]
+    assert related_ids(cardiology_article) == []
+
+
+def test_related_by_tag_ancestors(create_article, tags):
+    infections, flu, cardiology = tags
+    flu_article = create_article('Осельтамивир', tags=[flu])
+    infections_article = create_article('Антибиотики', tags=[infections])
+    cardiology_article = create_article('Статины', tags=[cardiology])
+
+    rebuild_related_articles()
+
+    assert related_ids(flu_article) == [infections_article.pk]
+    assert cardiology_article.pk not in related_ids(infections_article)
+
+
+def test_related_count_limited(create_article, tags, settings):
+    settings.RELATED_ARTICLES_COUNT = 2
+    infections, flu, cardiology = tags
+    articles = [create_article(f'Грипп {number}', tags=[flu]) for number in range(4)]
+
+    rebuild_related_articles()
+
+    assert len(related_ids(articles[0])) == 2
+
+
+def test_update_related_on_publish(create_article, tags):
+    infections, flu, cardiology = tags
+    flu_article = create_article('Вакцинация от гриппа осенью', tags=[flu])
+    rebuild_related_articles()
+    new_article = create_article('Вакцинация от гриппа детей', tags=[flu])
+
+    update_related_articles(new_article.pk)
+
+    assert related_ids(flu_article) == [new_article.pk]
+    assert related_ids(new_article) == [flu_article.pk]
+
+
+def test_update_related_on_unpublish(create_article, tags):
+    infections, flu, cardiology = tags
+    flu_article = create_article('Вакцинация от гриппа осенью', tags=[flu])
+    similar = create_article('Вакцинация от гриппа детей', tags=[flu])
+    rebuild_related_articles()
+    similar.is_published = False
+    similar.save()
+
+    update_related_articles(similar.pk)
+
+    assert related_ids(flu_article) == []
+    assert related_ids(similar) == []
+
+
+def test_related_endpoint(client, create_article, tags):
+    infections, flu, cardiology = tags
+    flu_article = create_article('Вакцинация от гриппа осенью', tags=[flu])
+    similar = create_article('Вакцинация от гриппа детей', tags=[flu])
+    rebuild_related_articles()
+
+    response = client.get(reverse('api:articles-related', args=(flu_article.pk,)))
+
+    assert response.status_code == 200
+    assert [item['id'] for item in response.data] == [str(similar.pk)]
+
+
+def test_related_endpoint_unpublished(client, article):
+    response = client.get(reverse('api:articles-related', args=(article.pk,)))
+
+    assert response.status_code == 404
+
+
+def test_related_update_scheduled_on_save(
+    article,
+    mocker,
+    django_capture_on_commit_callbacks,
+):
+    delay = mocker.patch('articles.signals.update_related_articles_task.delay')
+
+    with django_capture_on_commit_callbacks(execute=True):
+        article.is_published = True
+        article.save()
+
+    delay.assert_called_once_with(str(article.pk))
+
+
+def test_rebuild_in_chunks(create_article, tags, settings):
+    infections, flu, cardiology = tags
+    articles = [create_article(f'Грипп {number}', tags=[flu]) for number in range(4)]
+    rebuild_related_articles()
+    expected = {article.pk: set(related_ids(article)) for article in articles}
+    settings.RELATED_ARTICLES_CHUNK_SIZE = 1
+
+    rebuild_related_articles()
+
+    assert {article.pk: set(related_ids(article)) for article in articles} == expected
+
+
+def test_update_related_reads_only_candidates(create_article, tags, mocker):
+    infections, flu, cardiology = tags
+    flu_article = create_article('Вакцинация от гриппа осенью', tags=[flu])
+    create_article('Гипертония и давление', tags=[cardiology])
+    rebuild_related_articles()
+    new_article = create_article('Вакцинация от гриппа детей', tags=[flu])
+    get_lexemes = mocker.spy(related, '_get_lexemes')
+
+    update_related_articles(new_article.pk)
+
+    for call in get_lexemes.call_args_list:
+        assert set(call.args[0]) <= {new_article.pk, flu_article.pk}
+    assert related_ids(new_article) == [flu_article.pk]
+
+
+@pytest.mark.parametrize(
+    ('is_published', 'changes', 'scheduled'),
+    [
+        (True, {'title': 'Новый заголовок'}, True),
+        (True, {'source_name': 'Новый источник'}, False),
+        (False, {'title': 'Новый заголовок'}, False),
+        (False, {'is_published': True}, True),
+        (True, {'is_published': False}, True),
+    ],
+)
+def test_related_update_scheduled_on_relevant_changes(
+    article,
+    mocker,
+    django_capture_on_commit_callbacks,
+    is_published,
+    changes,
+    scheduled,
+):
+    Article.objects.filter(pk=article.pk).update(is_published=is_published)
+    article.refresh_from_db()
+    delay = mocker.patch('articles.signals.update_related_articles_task.delay')
+
+    with django_capture_on_commit_callbacks(execute=True):
+        for field, value in changes.items():
+            setattr(article, field, value)
+        article.save()
+
+    assert delay.called is scheduled
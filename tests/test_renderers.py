@@ -0,0 +1,74 @@
+import io
+import json
+import uuid
+from datetime import datetime, timezone
+from decimal import Decimal
+
+import pytest
+from django.core.management import call_command
+from django.urls import reverse
+from django.utils.translation import gettext_lazy as _
+from rest_framework.exceptions import ParseError
+from rest_framework.renderers import JSONRenderer
+
+from api.parsers import ORJSONParser
+from api.renderers import ORJSONRenderer
+
+
+@pytest.fixture()
+def published_article(article):
+    article.is_published = True
+    article.save()
+    return article
+
+
+def test_orjson_renderer_matches_json_renderer():
+    data = {
+        'id': uuid.uuid4(),
+        'created_at': datetime(2023, 7, 1, 12, 30, 15, 500, tzinfo=timezone.utc),
+        'rating': Decimal('4.5'),
+        'detail': _('Not found.'),
+        'text': 'Строка\u2028с разделителем',
+        1: None,
+    }
+
+    assert ORJSONRenderer().render(data) == JSONRenderer().render(data)
+
+
+def test_orjson_renderer_indent_falls_back():
+    data = {'a': [1, 2]}
+
+    rendered = ORJSONRenderer().render(data, 'application/json; indent=4')
+
+    assert rendered == JSONRenderer().render(data, 'application/json; indent=4')
+
+
+@pytest.mark.django_db()
+def test_article_page_rendered_as_json_renderer(client, published_article):
+    response = client.get(reverse('api:articles-list'))
+
+    assert response.status_code == 200
+    assert response.content == JSONRenderer().render(response.data)
+
+
+def test_orjson_parser():
+    body = json.dumps({'title': 'Статья', 'tags': [1, 2]}).encode()
+
+    assert ORJSONParser().parse(io.BytesIO(body)) == {'title': 'Статья', 'tags': [1, 2]}
+
+
+@pytest.mark.parametrize('body', [b'{"title": ', b'{"rating": NaN}'])
+def test_orjson_parser_error(body):
+    with pytest.raises(ParseError):
+        ORJSONParser().parse(io.BytesIO(body))
+
+
+@pytest.mark.django_db()
+def test_benchmark_json_command(published_article):
+    stdout = io.StringIO()
+
+    call_command('benchmark_json', page_size=3, number=1, stdout=stdout)
+
+    output = stdout.getvalue()
+    assert 'render orjson' in output
+    assert 'parse orjson' in output
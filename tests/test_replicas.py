@@ -0,0 +1,133 @@
+import pytest
+from asgiref.sync import async_to_sync
+from django.db import DEFAULT_DB_ALIAS
+from django.urls import reverse
+from rest_framework.test import APIRequestFactory
+
+from api.views import TagViewSet
+from articles.models import Article, Tag
+from core.cache import get_project_cache
+from core.db.replicas import get_read_replica, set_read_from_replicas
+from core.db.routers import ReplicaRouter
+
+pytestmark = pytest.mark.django_db(databases=[DEFAULT_DB_ALIAS, 'replica'])
+
+
+@pytest.fixture(autouse=True)
+def replicas(settings):
+    settings.DATABASE_REPLICAS = ['replica']
+    settings.REPLICA_PIN_TIMEOUT = 60
+
+
+@pytest.fixture()
+def published_article(article):
+    article.is_published = True
+    article.save()
+    return article
+
+
+@pytest.fixture()
+def replica_tag():
+    """Тег, который есть только в реплике: по нему видно, откуда читал запрос."""
+    return Tag.objects.using('replica').create(name='Только в реплике')
+
+
+def tag_names(client):
+    # список тегов не кешируется, по нему видно, из какой базы читает запрос
+    response = client.get(reverse('api:tags-list'))
+    assert response.status_code == 200
+    return [tag['name'] for tag in response.data]
+
+
+def test_router():
+    router = ReplicaRouter()
+
+    assert router.db_for_read(Article) is None
+    set_read_from_replicas(True)
+    try:
+        assert router.db_for_read(Article) == 'replica'
+        assert router.db_for_write(Article) == DEFAULT_DB_ALIAS
+    finally:
+        set_read_from_replicas(False)
+
+
+def test_no_replicas(settings):
+    settings.DATABASE_REPLICAS = []
+    set_read_from_replicas(True)
+    try:
+        assert get_read_replica() is None
+    finally:
+        set_read_from_replicas(False)
+
+
+def test_safe_request_reads_from_replica(client, replica_tag):
+    Tag.objects.create(name='Только в основной базе')
+
+    assert tag_names(client) == [replica_tag.name]
+    # вне запросов к API чтение идёт в основную базу
+    assert not Tag.objects.filter(pk=replica_tag.pk).exists()
+
+
+def test_reads_pinned_to_primary_after_write(
+    authenticated_client,
+    alt_authenticated_client,
+    published_article,
+    replica_tag,
+):
+    response = authenticated_client.post(
+        reverse('api:comments-list', args=(published_article.pk,)),
+        {'text': 'Комментарий'},
+    )
+    assert response.status_code == 201
+
+    assert tag_names(authenticated_client) == []
+    assert tag_names(alt_authenticated_client) == [replica_tag.name]
+
+
+def test_failed_write_does_not_pin(authenticated_client, replica_tag):
+    response = authenticated_client.post(
+        reverse('api:comments-list', args=(replica_tag.pk,)),
+        {'text': 'Комментарий'},
+    )
+    assert response.status_code == 404
+
+    assert tag_names(authenticated_client) == [replica_tag.name]
+
+
+def test_article_written_on_replica_read(client, published_article):
+    published_article.author.save(using='replica')
+    published_article.save(using='replica')
+
+    response = client.get(reverse('api:articles-detail', args=(published_article.pk,)))
+
+    # статья прочитана из реплики, а просмотр записан в основную базу
+    assert response.status_code == 200
+    assert Article.objects.get(pk=published_article.pk).viewers.count() == 1
+
+
+def test_async_view_reads_from_replica(replica_tag):
+    view = TagViewSet.as_view({'get': 'list'}, is_async=True, basename='tags')
+
+    response = async_to_sync(view)(APIRequestFactory().get('/'))
+
+    assert [tag['name'] for tag in response.data] == [replica_tag.name]
+
+
+def test_cached_value_computed_on_primary(client, replica_tag):
+    tag = Tag.objects.create(name='Только в основной базе')
+    get_project_cache().clear()
+
+    response = client.get(reverse('api:tags-roots'))
+
+    # реплика может отставать, поэтому общий кеш заполняется из основной базы
+    assert [root['name'] for root in response.data] == [tag.name]
+
+
+def test_async_cached_value_computed_on_primary(replica_tag):
+    tag = Tag.objects.create(name='Только в основной базе')
+    get_project_cache().clear()
+    view = TagViewSet.as_view({'get': 'roots'}, is_async=True, basename='tags')
+
+    response = async_to_sync(view)(APIRequestFactory().get('/'))
+
+    assert [root['name'] for root in response.data] == [tag.name]
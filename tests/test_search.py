@@ -0,0 +1,355 @@
+import re
+
+import pytest
+from django.core.management import call_command
+from django.db import connection
+from django.urls import reverse
+
+from api import views
+from articles.models import Article, Tag
+from articles.search import _suggest_queryset
+
+pytestmark = pytest.mark.django_db
+
+
+@pytest.fixture()
+def published_article(article):
+    article.title = 'Лечение гриппа у детей'
+    article.annotation = 'Краткий обзор противовирусной терапии'
+    article.text = 'Осельтамивир назначают в первые двое суток болезни.'
+    article.is_published = True
+    article.save()
+    return article
+
+
+def search(client, query):
+    url = reverse('api:articles-search')
+    return client.get(url, {'query': query})
+
+
+def found_ids(response):
+    return [item['id'] for item in response.data['results']]
+
+
+def test_search_russian_stemming(client, published_article):
+    response = search(client, 'грипп')
+
+    assert response.status_code == 200
+    assert found_ids(response) == [str(published_article.pk)]
+
+
+def test_search_by_annotation(client, published_article):
+    response = search(client, 'противовирусная терапия')
+
+    assert found_ids(response) == [str(published_article.pk)]
+
+
+def test_search_simple_config_fallback(client, published_article):
+    response = search(client, 'осельтамивир')
+
+    assert found_ids(response) == [str(published_article.pk)]
+
+
+def test_search_by_tag_name(client, published_article):
+    tag = Tag.objects.create(name='Инфекционные болезни')
+    published_article.tags.add(tag)
+
+    response = search(client, 'инфекционный')
+
+    assert found_ids(response) == [str(published_article.pk)]
+
+
+def test_search_tag_removed(client, published_article):
+    tag = Tag.objects.create(name='Педиатрия')
+    published_article.tags.add(tag)
+    published_article.tags.remove(tag)
+
+    response = search(client, 'педиатрия')
+
+    assert found_ids(response) == []
+
+
+def test_search_tag_renamed(client, published_article):
+    tag = Tag.objects.create(name='Педиатрия')
+    published_article.tags.add(tag)
+    tag.name = 'Неонатология'
+    tag.save()
+
+    assert found_ids(search(client, 'педиатрия')) == []
+    assert found_ids(search(client, 'неонатология')) == [str(published_article.pk)]
+
+
+def test_search_vector_weights(published_article):
+    search_vector = Article.objects.values_list('search_vector', flat=True).get(
+        pk=published_article.pk,
+    )
+
+    assert re.search(r"'грипп':[\d,]+A", search_vector)
+    assert re.search(r"'кратк':[\d,]+B", search_vector)
+    assert re.search(r"'осельтамивир':[\d,]+ ", search_vector)
+
+
+def test_reindex_search_vectors_command(published_article):
+    with connection.cursor() as cursor:
+        cursor.execute(
+            'SET session_replication_role = replica;'
+            'UPDATE articles_article SET search_vector = NULL;'
+            'SET session_replication_role = DEFAULT;',
+        )
+
+    call_command('reindex_search_vectors', batch_size=1)
+
+    published_article.refresh_from_db()
+    assert published_article.search_vector is not None
+
+
+def test_reindex_search_vectors_start_after(published_article, capsys):
+    last_id = Article.objects.order_by('-pk').values_list('pk', flat=True).first()
+
+    call_command('reindex_search_vectors', start_after=str(last_id))
+
+    assert 'total: 0' in capsys.readouterr().out
+
+
+def suggest(client, query):
+    url = reverse('api:articles-suggest')
+    return client.get(url, {'q': query})
+
+
+def test_suggest_titles_and_tags(client, published_article):
+    tag = Tag.objects.create(name='Грипп и ОРВИ')
+
+    response = suggest(client, 'Грипп')
+
+    assert response.status_code == 200
+    assert response.data['tags'] == [{'pk': str(tag.pk), 'name': tag.name}]
+    assert response.data['articles'] == [
+        {'id': str(published_article.pk), 'title': published_article.title},
+    ]
+
+
+def test_suggest_prefix_first(client, published_article, article_content, user):
+    prefixed = Article.objects.create(
+        **{**article_content, 'title': 'Гриппозная пневмония'},
+        author=user,
+        is_published=True,
+    )
+
+    response = suggest(client, 'грипп')
+
+    assert [item['id'] for item in response.data['articles']] == [
+        str(prefixed.pk),
+        str(published_article.pk),
+    ]
+
+
+@pytest.mark.parametrize(
+    ('queryset', 'field', 'index'),
+    [
+        (
+            Article.objects.filter(is_published=True),
+            'title',
+            'article_title_lower_trgm_idx',
+        ),
+        (Tag.objects.all(), 'name', 'tag_name_lower_trgm_idx'),
+    ],
+)
+def test_suggest_uses_trigram_index(queryset, field, index):
+    with connection.cursor() as cursor:
+        cursor.execute('SET LOCAL enable_seqscan = off')
+
+    plan = _suggest_queryset(queryset, field, 'грипп', 5).explain()
+
+    assert f'Bitmap Index Scan on {index}' in plan
+
+
+def test_suggest_skips_unpublished(client, article):
+    response = suggest(client, article.title[:5])
+
+    assert response.data['articles'] == []
+
+
+def test_suggest_short_query(client, published_article):
+    response = suggest(client, 'г')
+
+    assert response.status_code == 200
+    assert response.data == {'articles': [], 'tags': []}
+
+
+def test_suggest_without_query(client):
+    response = client.get(reverse('api:articles-suggest'))
+
+    assert response.status_code == 422
+
+
+def test_suggest_cached(client, published_article, django_assert_num_queries):
+    suggest(client, 'Лечение')
+
+    with django_assert_num_queries(0):
+        response = suggest(client, '  лечение ')
+
+    assert len(response.data['articles']) == 1
+
+
+def test_search_highlight(client, published_article):
+    response = client.get(reverse('api:articles-search'), {'query': 'осельтамивир'})
+
+    highlight = response.data['results'][0]['highlight']
+    assert '<b>Осельтамивир</b>' in highlight
+
+
+def test_search_highlight_words(client, published_article):
+    response = client.get(
+        reverse('api:articles-search'),
+        {'query': 'осельтамивир', 'headline_words': 3, 'headline_fragments': 0},
+    )
+
+    assert len(response.data['results'][0]['highlight'].split()) <= 3
+
+
+def test_search_highlight_only_for_page(
+    client,
+    published_article,
+    article_content,
+    user,
+    mocker,
+    settings,
+):
+    for _ in range(settings.CURSOR_PAGINATION_PAGE_SIZE):
+        Article.objects.create(**article_content, author=user, is_published=True)
+    Article.objects.update(text='Осельтамивир при гриппе.')
+    get_headlines = mocker.spy(views, 'get_headlines')
+
+    response = client.get(reverse('api:articles-search'), {'query': 'грипп'})
+
+    assert response.data['next'] is not None
+    article_ids = get_headlines.call_args.args[0]
+    assert len(article_ids) == settings.CURSOR_PAGINATION_PAGE_SIZE
+
+
+def test_search_pages_ranked_by_relevance(
+    client, published_article, article_content, user
+):
+    in_text = Article.objects.create(
+        **{**article_content, 'text': 'Сезонный грипп.'},
+        author=user,
+        is_published=True,
+    )
+
+    first_page = client.get(
+        reverse('api:articles-search'),
+        {'query': 'грипп', 'page_size': 1},
+    )
+    response = client.get(first_page.data['next'])
+
+    assert found_ids(first_page) == [str(published_article.pk)]
+    assert found_ids(response) == [str(in_text.pk)]
+    assert response.data['next'] is None
+    assert client.get(response.data['previous']).data == first_page.data
+
+
+def test_search_ranked_ids_cached(client, published_article, mocker):
+    rank_article_ids = mocker.spy(views, 'rank_article_ids')
+    url = reverse('api:articles-search')
+
+    client.get(url, {'query': 'грипп'})
+    response = client.get(url, {'query': ' ГРИПП ', 'page_size': 3})
+
+    assert rank_article_ids.call_count == 1
+    assert found_ids(response) == [str(published_article.pk)]
+
+
+def test_search_cache_key_includes_filters(client, published_article):
+    tag = Tag.objects.create(name='Педиатрия')
+    url = reverse('api:articles-search')
+
+    client.get(url, {'query': 'грипп'})
+    response = client.get(url, {'query': 'грипп', 'tags': str(tag.pk)})
+
+    assert found_ids(response) == []
+
+
+def test_search_hides_unpublished_cached_ids(client, published_article):
+    url = reverse('api:articles-search')
+    client.get(url, {'query': 'грипп'})
+    published_article.is_published = False
+    published_article.save()
+
+    response = client.get(url, {'query': 'грипп'})
+
+    assert found_ids(response) == []
+
+
+def test_search_facets(client, published_article, article_content, alt_user):
+    tag = Tag.objects.create(name='Педиатрия')
+    published_article.tags.add(tag)
+    other = Article.objects.create(
+        **{**article_content, 'text': 'Сезонный грипп.'},
+        author=alt_user,
+        is_published=True,
+    )
+    other.tags.add(tag)
+
+    response = client.get(
+        reverse('api:articles-search'),
+        {'query': 'грипп', 'facets': 'tags,author,month', 'page_size': 1},
+    )
+
+    facets = response.data['facets']
+    assert facets['tags'] == [{'value': str(tag.pk), 'label': tag.name, 'count': 2}]
+    assert sorted(item['value'] for item in facets['author']) == sorted(
+        [str(published_article.author.pk), str(alt_user.pk)],
+    )
+    assert [item['count'] for item in facets['month']] == [2]
+
+
+def test_search_facets_count_all_matches(
+    client, published_article, article_content, settings
+):
+    settings.SEARCH_RESULTS_MAX_IDS = 1
+    tag = Tag.objects.create(name='Педиатрия')
+    published_article.tags.add(tag)
+    other = Article.objects.create(
+        **{**article_content, 'text': 'Сезонный грипп.'},
+        author=published_article.author,
+        is_published=True,
+    )
+    other.tags.add(tag)
+
+    response = client.get(
+        reverse('api:articles-search'),
+        {'query': 'грипп', 'facets': 'tags,tags,author'},
+    )
+
+    assert len(response.data['results']) == 1
+    assert response.data['next'] is None
+    assert list(response.data['facets']) == ['tags', 'author']
+    assert [item['count'] for item in response.data['facets']['tags']] == [2]
+    assert [item['count'] for item in response.data['facets']['author']] == [2]
+
+
+def test_search_without_facets(client, published_article):
+    response = client.get(reverse('api:articles-search'), {'query': 'грипп'})
+
+    assert 'facets' not in response.data
+
+
+def test_search_unknown_facet(client, published_article):
+    response = client.get(
+        reverse('api:articles-search'),
+        {'query': 'грипп', 'facets': 'tags,color'},
+    )
+
+    assert response.status_code == 400
+
+
+def test_search_facets_cached(client, published_article, mocker):
+    count_facets = mocker.spy(views, 'count_facets')
+    url = reverse('api:articles-search')
+
+    client.get(url, {'query': 'грипп', 'facets': 'tags'})
+    client.get(url, {'query': 'грипп', 'facets': 'tags', 'page_size': 1})
+    client.get(url, {'query': 'грипп', 'facets': 'tags,month'})
+
+    assert count_facets.call_count == 2
+    assert count_facets.call_args.args[1] == ['month']
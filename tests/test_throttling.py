@@ -0,0 +1,106 @@
+import pytest
+import redis
+from django.urls import reverse
+from prometheus_client import REGISTRY
+
+from core import ratelimit
+from core.ratelimit import LocalTokenBucket, RedisTokenBucket
+
+pytestmark = pytest.mark.django_db
+
+
+@pytest.fixture()
+def rates(settings):
+    def set_rates(**rates):
+        settings.REST_FRAMEWORK = {
+            **settings.REST_FRAMEWORK,
+            'DEFAULT_THROTTLE_RATES': {
+                **settings.REST_FRAMEWORK['DEFAULT_THROTTLE_RATES'],
+                **rates,
+            },
+        }
+
+    return set_rates
+
+
+def get_sample(name, scope):
+    return REGISTRY.get_sample_value(name, {'scope': scope}) or 0
+
+
+def test_local_token_bucket(mocker):
+    bucket = LocalTokenBucket()
+    now = 1000.0
+    mocker.patch.object(ratelimit.time, 'monotonic', side_effect=lambda: now)
+
+    assert bucket.consume('key', rate=0.5, capacity=2) == (True, 0)
+    assert bucket.consume('key', rate=0.5, capacity=2) == (True, 0)
+    assert bucket.consume('key', rate=0.5, capacity=2) == (False, 2)
+    assert bucket.consume('other', rate=0.5, capacity=2)[0]
+
+    now += 2
+    assert bucket.consume('key', rate=0.5, capacity=2) == (True, 0)
+
+
+def test_redis_token_bucket(mocker):
+    client = mocker.patch.object(redis, 'Redis').from_url.return_value
+    client.register_script.return_value.return_value = [0, b'1.5']
+    bucket = RedisTokenBucket('redis://localhost:1/0')
+
+    assert bucket.consume('key', rate=1, capacity=10) == (False, 1.5)
+    client.register_script.return_value.assert_called_once_with(
+        keys=['ratelimit:key'],
+        args=[1, 10],
+    )
+
+
+def test_search_throttled(client, rates):
+    rates(search='2/min')
+    url = reverse('api:articles-search')
+    rejections = get_sample('api_throttle_rejections_total', 'search')
+
+    responses = [client.get(url, {'query': 'грипп'}) for _ in range(3)]
+
+    assert [response.status_code for response in responses] == [200, 200, 429]
+    assert int(responses[-1]['Retry-After']) == 30
+    assert get_sample('api_throttle_rejections_total', 'search') == rejections + 1
+
+
+def test_vote_throttled_per_user(alt_authenticated_client, article, rates):
+    rates(vote='1/min')
+    article.is_published = True
+    article.save()
+    url = reverse('api:articles-unvote', args=(article.pk,))
+
+    assert alt_authenticated_client.post(url).status_code == 204
+    assert alt_authenticated_client.post(url).status_code == 429
+
+
+def test_login_throttled_per_ip(client, rates, user_credentials):
+    rates(login='1/min')
+    url = reverse('api:login')
+
+    assert client.post(url, user_credentials).status_code == 200
+    assert client.post(url, user_credentials).status_code == 429
+    response = client.post(url, user_credentials, REMOTE_ADDR='10.0.0.2')
+    assert response.status_code == 200
+
+
+def test_unlimited_scope(client, rates):
+    rates(search=None)
+    url = reverse('api:articles-search')
+
+    responses = [client.get(url, {'query': 'грипп'}) for _ in range(3)]
+
+    assert all(response.status_code == 200 for response in responses)
+
+
+def test_throttle_allows_requests_without_redis(client, rates, mocker):
+    rates(search='1/min')
+    bucket = mocker.patch('api.throttling.get_token_bucket')
+    bucket.return_value.consume.side_effect = redis.ConnectionError
+    errors = get_sample('api_throttle_errors_total', 'search')
+
+    response = client.get(reverse('api:articles-search'), {'query': 'грипп'})
+
+    assert response.status_code == 200
+    assert get_sample('api_throttle_errors_total', 'search') == errors + 1
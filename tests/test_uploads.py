@@ -0,0 +1,299 @@
+import base64
+import io
+from datetime import timedelta
+
+import pytest
+from django.urls import reverse
+from django.utils import timezone
+
+from articles.models import Article, IdempotencyKey, UploadSession
+from articles.uploads import (
+    UploadOffsetMismatch,
+    append_chunk,
+    delete_expired_idempotency_keys,
+    delete_expired_upload_sessions,
+    get_upload_path,
+)
+
+pytestmark = pytest.mark.django_db
+
+
+@pytest.fixture()
+def image_content(faker):
+    return faker.image(image_format='jpeg', size=(64, 64))
+
+
+def create_session(client, size):
+    return client.post(reverse('api:uploads-list'), {'size': size})
+
+
+def put_chunk(client, session_id, content, start, size):
+    return client.put(
+        reverse('api:uploads-detail', args=(session_id,)),
+        data=content,
+        content_type='application/octet-stream',
+        HTTP_CONTENT_RANGE=f'bytes {start}-{start + len(content) - 1}/{size}',
+    )
+
+
+def finalize(client, session_id):
+    return client.post(reverse('api:uploads-finalize', args=(session_id,)))
+
+
+def upload(client, content, chunk_size=1000):
+    session_id = create_session(client, len(content)).data['id']
+    for start in range(0, len(content), chunk_size):
+        end = start + chunk_size
+        chunk = content[start:end]
+        put_chunk(client, session_id, chunk, start, len(content))
+    return finalize(client, session_id)
+
+
+def test_chunked_upload(authenticated_client, image_content):
+    response = create_session(authenticated_client, len(image_content))
+
+    assert response.status_code == 201
+    assert response.data['offset'] == 0
+    session_id = response.data['id']
+
+    response = put_chunk(
+        authenticated_client,
+        session_id,
+        image_content[:100],
+        0,
+        len(image_content),
+    )
+
+    assert response.status_code == 200
+    assert response.data['offset'] == 100
+
+    response = put_chunk(
+        authenticated_client,
+        session_id,
+        image_content[100:],
+        100,
+        len(image_content),
+    )
+
+    assert response.data['offset'] == len(image_content)
+    response = finalize(authenticated_client, session_id)
+    assert response.status_code == 200
+    assert response.data['token']
+
+
+def test_chunk_offset_mismatch(authenticated_client, image_content):
+    size = len(image_content)
+    session_id = create_session(authenticated_client, size).data['id']
+    put_chunk(authenticated_client, session_id, image_content[:100], 0, size)
+
+    response = put_chunk(
+        authenticated_client,
+        session_id,
+        image_content[200:300],
+        200,
+        size,
+    )
+
+    assert response.status_code == 409
+    assert response.data['offset'] == 100
+    url = reverse('api:uploads-detail', args=(session_id,))
+    assert authenticated_client.get(url).data['offset'] == 100
+
+
+class InterleavedStream(io.BytesIO):
+    """Тело запроса, во время чтения которого сессию обновляет другой запрос."""
+
+    def __init__(self, content, on_read):
+        super().__init__(content)
+        self.on_read = on_read
+
+    def read(self, size=-1):
+        if self.on_read is not None:
+            on_read, self.on_read = self.on_read, None
+            on_read()
+        return super().read(size)
+
+
+def test_concurrent_chunks_with_same_start(user):
+    session = UploadSession.objects.create(user=user, size=300)
+
+    def append_short_chunk():
+        other = UploadSession.objects.get(pk=session.pk)
+        assert append_chunk(other, 0, io.BytesIO(b'a' * 100), 100) == 100
+
+    with pytest.raises(UploadOffsetMismatch) as exc_info:
+        append_chunk(session, 0, InterleavedStream(b'b' * 200, append_short_chunk), 200)
+
+    assert exc_info.value.offset == 100
+    assert session.offset == 100
+    assert get_upload_path(session).read_bytes() == b'a' * 100
+
+
+def test_chunk_invalid_range(authenticated_client, image_content):
+    session_id = create_session(authenticated_client, len(image_content)).data['id']
+
+    response = put_chunk(authenticated_client, session_id, image_content, 0, 10)
+
+    assert response.status_code == 400
+
+
+def test_upload_size_exceeded(authenticated_client, settings):
+    size = settings.BASE64_IMAGE_MAX_SIZE_BYTES + 1
+
+    response = create_session(authenticated_client, size)
+
+    assert response.status_code == 400
+
+
+def test_finalize_incomplete(authenticated_client, image_content):
+    size = len(image_content)
+    session_id = create_session(authenticated_client, size).data['id']
+    put_chunk(authenticated_client, session_id, image_content[:100], 0, size)
+
+    response = finalize(authenticated_client, session_id)
+
+    assert response.status_code == 400
+    assert 'offset' in response.data
+
+
+def test_finalize_invalid_image(authenticated_client, faker):
+    response = upload(authenticated_client, faker.image(image_format='gif'))
+
+    assert response.status_code == 400
+    assert 'Type disallowed' in response.data['image'][0]
+
+
+def test_upload_session_of_another_user(authenticated_client, alt_authenticated_client):
+    session_id = create_session(authenticated_client, 10).data['id']
+    url = reverse('api:uploads-detail', args=(session_id,))
+
+    response = alt_authenticated_client.get(url)
+
+    assert response.status_code == 404
+
+
+def test_create_article_with_upload_token(
+    authenticated_client,
+    article_content,
+    image_content,
+    django_capture_on_commit_callbacks,
+):
+    token = upload(authenticated_client, image_content).data['token']
+    upload_session = UploadSession.objects.get(token=token)
+
+    with django_capture_on_commit_callbacks(execute=True):
+        response = authenticated_client.post(
+            reverse('api:articles-list'),
+            {**article_content, 'image_upload': token},
+            format='json',
+        )
+
+    assert response.status_code == 201
+    article = Article.objects.get(pk=response.data['id'])
+    with article.image.open() as image:
+        assert image.read() == image_content
+    assert not UploadSession.objects.filter(pk=upload_session.pk).exists()
+    assert not get_upload_path(upload_session).exists()
+    article.image.delete()
+
+
+def test_create_article_with_foreign_upload_token(
+    authenticated_client,
+    alt_authenticated_client,
+    article_content,
+    image_content,
+):
+    token = upload(authenticated_client, image_content).data['token']
+
+    response = alt_authenticated_client.post(
+        reverse('api:articles-list'),
+        {**article_content, 'image_upload': token},
+        format='json',
+    )
+
+    assert response.status_code == 400
+    assert 'image_upload' in response.data
+
+
+def test_create_article_without_image(authenticated_client, article_content):
+    response = authenticated_client.post(
+        reverse('api:articles-list'),
+        article_content,
+        format='json',
+    )
+
+    assert response.status_code == 400
+
+
+def post_article(client, data, key):
+    return client.post(
+        reverse('api:articles-list'),
+        data,
+        format='json',
+        HTTP_IDEMPOTENCY_KEY=key,
+    )
+
+
+def test_idempotent_article_create(authenticated_client, article_content, image_content):
+    data = {**article_content, 'image': base64.b64encode(image_content).decode()}
+    articles_count = Article.objects.count()
+
+    first_response = post_article(authenticated_client, data, 'article-1')
+    second_response = post_article(authenticated_client, data, 'article-1')
+
+    assert first_response.status_code == second_response.status_code == 201
+    assert second_response.data['id'] == str(first_response.data['id'])
+    assert Article.objects.count() == articles_count + 1
+    Article.objects.get(pk=first_response.data['id']).image.delete()
+
+
+def test_idempotency_key_reused_with_other_request(
+    authenticated_client,
+    article_content,
+    image_content,
+):
+    data = {**article_content, 'image': base64.b64encode(image_content).decode()}
+    response = post_article(authenticated_client, data, 'article-1')
+    Article.objects.get(pk=response.data['id']).image.delete()
+
+    response = post_article(
+        authenticated_client,
+        {**data, 'title': 'Другой заголовок'},
+        'article-1',
+    )
+
+    assert response.status_code == 422
+
+
+def test_idempotency_key_not_stored_on_error(authenticated_client, article_content):
+    response = post_article(authenticated_client, article_content, 'article-1')
+
+    assert response.status_code == 400
+    assert not IdempotencyKey.objects.exists()
+
+
+def test_delete_expired_uploads(
+    authenticated_client,
+    image_content,
+    user,
+    settings,
+    django_capture_on_commit_callbacks,
+):
+    session_id = create_session(authenticated_client, len(image_content)).data['id']
+    put_chunk(authenticated_client, session_id, image_content, 0, len(image_content))
+    upload_session = UploadSession.objects.get(pk=session_id)
+    expired_at = timezone.now() - settings.UPLOAD_SESSION_LIFETIME - timedelta(hours=1)
+    UploadSession.objects.update(updated_at=expired_at)
+    IdempotencyKey.objects.create(
+        user=user,
+        key='article-1',
+        request_hash='',
+        status_code=201,
+        response={},
+    )
+    IdempotencyKey.objects.update(created_at=expired_at)
+
+    with django_capture_on_commit_callbacks(execute=True):
+        assert delete_expired_upload_sessions() == 1
+    assert delete_expired_idempotency_keys() == 1
+    assert not get_upload_path(upload_session).exists()
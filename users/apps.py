@@ -6,3 +6,6 @@ class UsersConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'users'
     verbose_name = _('users')
+
+    def ready(self):
+        import users.signals  # noqa: F401
@@ -0,0 +1,53 @@
+import copy
+
+from django.conf import settings
+from django.db import transaction
+from rest_framework.authentication import TokenAuthentication
+
+from core import invalidation
+from core.cache import LocalLRUCache
+
+TOKEN_CACHE_NAME = 'tokens'
+
+# ключ токена -> (пользователь, токен)
+token_cache = LocalLRUCache(settings.TOKEN_CACHE_MAX_ENTRIES)
+
+
+def evict_cached_tokens(keys=None):
+    """Удаляет токены (None — все) из памяти процесса."""
+    if keys is None:
+        token_cache.clear()
+        return
+    for key in keys:
+        token_cache.delete(key)
+
+
+def forget_tokens(keys):
+    """Удаляет токены из кеша всех процессов сразу и после коммита транзакции.
+
+    Повторное удаление после коммита убирает пользователя, которого
+    параллельный запрос успел прочитать из базы до коммита.
+    """
+    invalidation.publish(TOKEN_CACHE_NAME, keys)
+    transaction.on_commit(lambda: invalidation.publish(TOKEN_CACHE_NAME, keys))
+
+
+class CachedTokenAuthentication(TokenAuthentication):
+    """TokenAuthentication, запоминающая пользователя токена в памяти процесса.
+
+    Запись удаляется через шину инвалидации при изменении или удалении
+    токена и его пользователя (users.signals) и живёт не дольше
+    TOKEN_CACHE_TIMEOUT секунд.
+    """
+
+    def authenticate_credentials(self, key):
+        cached = token_cache.get(key, None)
+        if cached is None:
+            cached = super().authenticate_credentials(key)
+            token_cache.set(key, cached, settings.TOKEN_CACHE_TIMEOUT)
+        user, token = cached
+        # запрос может менять атрибуты пользователя
+        return copy.copy(user), token
+
+
+invalidation.register_handler(TOKEN_CACHE_NAME, evict_cached_tokens)
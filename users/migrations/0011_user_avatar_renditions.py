@@ -0,0 +1,22 @@
+# Generated by Django 4.2 on 2026-10-19 16:24
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ('users', '0010_alter_user_email'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='user',
+            name='avatar_renditions',
+            field=models.JSONField(
+                blank=True,
+                default=dict,
+                editable=False,
+                verbose_name='avatar renditions',
+            ),
+        ),
+    ]
@@ -60,6 +60,12 @@ class User(TimeStampedMixin, UUIDMixin, AbstractUser):
         max_length=50,
     )
     avatar = models.ImageField(upload_to='avatars/', blank=True)
+    avatar_renditions = models.JSONField(
+        _('avatar renditions'),
+        default=dict,
+        blank=True,
+        editable=False,
+    )
     is_active = models.BooleanField(default=False)
     subscribed = models.BooleanField(default=False)
 
@@ -1,18 +1,61 @@
-from django.db.models import Sum
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, Sum
+from django.db.models.functions import Coalesce
 
 from articles.models import Article
-from likes.models import Vote
+from core.cache import get_project_cache
 
+USER_STATS_NAMESPACE = 'user_stats'
 
-def get_rating(user) -> int:
-    return (
-        Vote.objects.filter(
-            user=user.id,
+
+def get_user_stats(user_id) -> dict[str, int]:
+    """Рейтинг автора (сумма голосов за его статьи) и число его статей."""
+    return get_project_cache().get_or_set(
+        USER_STATS_NAMESPACE,
+        user_id,
+        lambda: Article.objects.filter(author_id=user_id).aggregate(
+            rating=Coalesce(Sum('votes__vote'), 0),
+            publications_amount=Count('pk', distinct=True),
+        ),
+        settings.USER_STATS_CACHE_TIMEOUT,
+    )
+
+
+def get_users_stats(user_ids) -> dict:
+    """Статистика нескольких авторов: из кеша, недостающая — одним запросом."""
+    return get_project_cache().get_or_set_many(
+        USER_STATS_NAMESPACE,
+        list(dict.fromkeys(user_ids)),
+        _count_users_stats,
+        settings.USER_STATS_CACHE_TIMEOUT,
+    )
+
+
+def _count_users_stats(user_ids) -> dict:
+    users_stats = {
+        user_id: {'rating': 0, 'publications_amount': 0} for user_id in user_ids
+    }
+    rows = (
+        Article.objects.filter(author_id__in=user_ids)
+        .order_by()
+        .values('author_id')
+        .annotate(
+            rating=Coalesce(Sum('votes__vote'), 0),
+            publications_amount=Count('pk', distinct=True),
         )
-        .aggregate(Sum('vote'))
-        .get('vote__sum', 0)
     )
+    for row in rows:
+        users_stats[row.pop('author_id')] = row
+    return users_stats
 
 
-def get_publications_amount(user) -> int:
-    return Article.objects.filter(author=user).count()
+def forget_user_stats(user_id):
+    """Удаляет статистику автора из кеша сразу и после коммита транзакции."""
+    if user_id is None:
+        return
+    project_cache = get_project_cache()
+    project_cache.delete(USER_STATS_NAMESPACE, user_id)
+    transaction.on_commit(
+        lambda: project_cache.delete(USER_STATS_NAMESPACE, user_id),
+    )
@@ -0,0 +1,83 @@
+from django.contrib.auth import get_user_model
+from django.contrib.contenttypes.models import ContentType
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+from rest_framework.authtoken.models import Token
+
+from articles.models import Article
+from core.renditions import needs_renditions
+from likes.models import Vote
+from users.authentication import forget_tokens
+from users.services import forget_user_stats
+from users.tasks import create_avatar_renditions_task
+
+User = get_user_model()
+
+# поля пользователя, изменение которых не сбрасывает кеш его токенов:
+# остальные влияют на права или попадают в ответы API (например, /users/me/)
+TOKEN_CACHE_IGNORED_FIELDS = frozenset(('last_login', 'created_at', 'updated_at'))
+
+
+@receiver(post_save, sender=User)
+def schedule_avatar_renditions(sender, instance, **kwargs):
+    """После загрузки аватара ставит в очередь создание его вариантов."""
+    if needs_renditions(instance, 'avatar'):
+        transaction.on_commit(
+            lambda: create_avatar_renditions_task.delay(str(instance.pk)),
+        )
+
+
+@receiver(post_save, sender=Article)
+@receiver(post_delete, sender=Article)
+def forget_author_stats_on_article(sender, instance, **kwargs):
+    forget_user_stats(instance.author_id)
+
+
+@receiver(post_save, sender=Vote)
+@receiver(post_delete, sender=Vote)
+def forget_author_stats_on_vote(sender, instance, **kwargs):
+    """Голос за статью меняет рейтинг её автора."""
+    if instance.content_type_id != ContentType.objects.get_for_model(Article).pk:
+        return
+    author_id = (
+        Article.objects.filter(pk=instance.object_id)
+        .values_list('author_id', flat=True)
+        .first()
+    )
+    forget_user_stats(author_id)
+
+
+@receiver(post_save, sender=Token)
+@receiver(post_delete, sender=Token)
+def evict_cached_token(sender, instance, **kwargs):
+    """Выход и смена токена действуют во всех процессах."""
+    forget_tokens([instance.key])
+
+
+@receiver(pre_save, sender=User)
+def remember_token_user_fields(sender, instance, update_fields, **kwargs):
+    """Запоминает, изменились ли поля пользователя, которые хранит кеш токенов."""
+    if update_fields is not None and set(update_fields) <= TOKEN_CACHE_IGNORED_FIELDS:
+        # например, last_login при каждом входе
+        instance._token_user_changed = False
+        return
+    fields = [
+        field.attname
+        for field in User._meta.concrete_fields
+        if field.name not in TOKEN_CACHE_IGNORED_FIELDS
+    ]
+    previous = User.objects.filter(pk=instance.pk).values(*fields).first()
+    instance._token_user_changed = previous is not None and any(
+        previous[field] != getattr(instance, field) for field in fields
+    )
+
+
+@receiver(post_save, sender=User)
+def evict_cached_user_tokens(sender, instance, **kwargs):
+    """Смена пароля, роли или профиля сразу видна через кеш токенов пользователя."""
+    if not getattr(instance, '_token_user_changed', True):
+        return
+    keys = list(Token.objects.filter(user=instance).values_list('key', flat=True))
+    if keys:
+        forget_tokens(keys)
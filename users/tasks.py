@@ -1,8 +1,21 @@
 from celery import shared_task
+from django.contrib.auth import get_user_model
 
+from articles.changes import touch_user_articles
+from core.renditions import update_renditions
 from users.management.commands._utils import delete_non_activated_users
 
+User = get_user_model()
+
 
 @shared_task
 def delete_non_activated_users_task():
     delete_non_activated_users()
+
+
+@shared_task
+def create_avatar_renditions_task(user_id):
+    user = User.objects.filter(pk=user_id).first()
+    if user:
+        update_renditions(user, 'avatar')
+        touch_user_articles(user)